@@ -0,0 +1,61 @@
+'''
+Compares the pre-XBRL text normalization of edgar.financials with the
+implementation it replaced, which called str.replace on the whole document
+for every regex match
+
+usage: python -m benchmarks.bench_old_normalizer [10-K.htm|filing.txt ...]
+
+Recorded filings (.txt) are searched for their 10-K document. Without
+arguments, the legacy 10-K in tests/data is repeated to the size of a real one
+'''
+import os
+import re
+import sys
+from bs4 import BeautifulSoup
+from edgar.financials import _normalize_old_report_text
+from benchmarks.common import read_file, load_documents, best_of, report
+
+LEGACY_10K_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'tests', 'data',
+                               'legacy_10k.htm')
+
+
+def legacy_normalize_old_report_text(report_text):
+    nonBreakSpace = u'\xa0'
+    report_text = report_text.replace(nonBreakSpace, " ")
+    report_text = re.sub("\n+\\)", ")", report_text)
+    report_text = report_text.replace('\' \'', " ")
+    report_text = re.sub(r" +", " ", report_text)
+    report_text = report_text.replace("’", "")
+    report_text = re.sub(r",\n", ",", report_text)
+    for f in re.findall(r"\w\n\s\w", report_text):
+        report_text = report_text.replace(f, f.replace("\n", ""))
+    for f in re.findall(r"\w+.*\n.*\w+", report_text):
+        report_text = report_text.replace(f, f.replace("\n", ""))
+    return report_text
+
+
+def load_10k_text(path):
+    if path.endswith('.txt'):
+        for document in load_documents(path).values():
+            if document.type in ['10-K', '10-K405']:
+                return document.doc_text.data
+        raise ValueError('{} has no 10-K document'.format(path))
+    return read_file(path)
+
+
+def main(paths):
+    if paths:
+        texts = [(path, BeautifulSoup(load_10k_text(path), 'html.parser').text) for path in paths]
+    else:
+        legacy_10k_text = BeautifulSoup(read_file(LEGACY_10K_PATH), 'html.parser').text
+        texts = [('{} x {}'.format(LEGACY_10K_PATH, repeat), legacy_10k_text * repeat) for repeat in [1, 50, 400]]
+
+    for name, text in texts:
+        print('{} ({:.2f} MB of text)'.format(name, len(text) / 1000000))
+        report('legacy', best_of(lambda: legacy_normalize_old_report_text(text), repeat=1))
+        report('single pass', best_of(lambda: _normalize_old_report_text(text)))
+        print('identical output: {}'.format(legacy_normalize_old_report_text(text) == _normalize_old_report_text(text)))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
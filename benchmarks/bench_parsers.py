@@ -0,0 +1,41 @@
+'''
+Compares the report table parser backends (edgar.financials.PARSERS) on the
+R pages of recorded filings, checking that they give identical results
+
+usage: python -m benchmarks.bench_parsers [filing.txt ...]
+'''
+import re
+import sys
+from datetime import datetime
+from edgar.financials import get_financial_report, FinancialReportEncoder, PARSERS
+from benchmarks.common import SAMPLE_FILING_PATH, load_documents, best_of, report
+
+R_PAGE_REGEX = re.compile(r'R\d+\.htm')
+
+
+def main(paths):
+    encoder = FinancialReportEncoder()
+    date_filed = datetime.now()
+
+    for path in paths:
+        r_pages = [document.doc_text.data for filename, document in load_documents(path).items()
+                   if R_PAGE_REGEX.fullmatch(filename) and isinstance(document.doc_text.data, str)]
+        print('{} ({} R pages)'.format(path, len(r_pages)))
+
+        results = {}
+        for parser in PARSERS:
+            def parse_all():
+                return [get_financial_report(None, date_filed, r_page, parser) for r_page in r_pages]
+            try:
+                results[parser] = [encoder.encode(r) for r in parse_all()]
+            except ImportError as e:
+                print('skipping {}: {}'.format(parser, e))
+                continue
+            report(parser, best_of(parse_all))
+
+        if len({tuple(result) for result in results.values()}) > 1:
+            raise AssertionError('parsers gave different results for {}'.format(path))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or [SAMPLE_FILING_PATH])
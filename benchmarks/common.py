@@ -0,0 +1,41 @@
+'''
+Helpers shared by the benchmark scripts. Benchmarks run on recorded filings
+(the full SGML .txt as downloaded from EDGAR) so that no network is needed
+'''
+import os
+import timeit
+from edgar.dtd import DTD
+from edgar.sgml import Sgml
+from edgar.document import Document
+
+SAMPLE_FILING_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'tests', 'data',
+                                  'sample_filing.txt')
+
+
+def read_file(path):
+    with open(path, mode='r', encoding='utf-8') as f:
+        return f.read()
+
+
+def load_documents(path):
+    '''
+    Returns a {filename:Document} map of the recorded filing at path
+    '''
+    dtd = DTD()
+    sgml = Sgml(read_file(path), dtd)
+    documents = {}
+    for document_raw in sgml.map[dtd.sec_document.tag][dtd.document.tag]:
+        document = Document(document_raw)
+        documents[document.filename] = document
+    return documents
+
+
+def best_of(function, repeat=5, number=1):
+    '''
+    Returns the best time, in seconds, of a single call to function
+    '''
+    return min(timeit.repeat(function, repeat=repeat, number=number)) / number
+
+
+def report(name, seconds):
+    print('{:<40} {:>12.3f} ms'.format(name, seconds * 1000))
@@ -0,0 +1,356 @@
+'''
+Bulk extraction of the statements of many filings, e.g. every 10-K and 10-Q
+of a quarter
+
+The pipeline has three stages linked by bounded queues:
+ - fetch: a few threads download the filings, at most requests_per_second
+   of them per second in total
+ - parse: the filings are parsed on a process pool, with at most queue_size
+   of them waiting to be parsed or being parsed at a time
+ - write: the main thread appends the statements of each filing to one
+   newline delimited JSON file per kind of statement, then records its
+   accession number in a checkpoint. Each line is a record of one statement,
+   {"accession_number": ..., "url": ..., "report": ...} with the report as
+   written by edgar.serialization.dumps (see read_output)
+
+A filing that fails to be fetched, parsed or written is recorded in a
+failures file, with the stage and error, and the batch carries on. Running
+again over the same output directory skips the filings of the checkpoint,
+so a crashed run resumes where it stopped and failed filings are retried.
+A filing whose statements were written but not checkpointed when a run
+crashed is written again (i.e. filings are written at least once), and
+the records of its first write can be told apart by their accession
+number, e.g. by edgar.jobs.merge_outputs
+
+usage: python -m edgar.bulk --year 2020 --quarter 1 --output path/to/output
+'''
+import os
+import json
+import queue
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from edgar.edgar import get_filing_info
+from edgar.filing import Filing
+from edgar.financials import FinancialReport, DEFAULT_PARSER, PARSERS
+from edgar.requests_wrapper import GetRequest, RateLimiter
+from edgar.instrumentation import bind_context
+from edgar.serialization import dumps, build_report
+
+# the kinds of statements that can be extracted, each the name of a Filing.get_<kind> method
+STATEMENT_KINDS = ['income_statements', 'balance_sheets', 'cash_flows']
+DEFAULT_FORMS = ['10-K', '10-Q']
+
+CHECKPOINT_FILE = 'checkpoint.txt'
+FAILURES_FILE = 'failures.ndjson'
+OUTPUT_FILE_EXTENSION = '.ndjson'
+
+FETCH_STAGE = 'fetch'
+PARSE_STAGE = 'parse'
+WRITE_STAGE = 'write'
+
+# put on a queue by a stage once it has nothing more to put on it
+DONE = object()
+
+# start of each line of the outputs, see dumps_record
+RECORD_PREFIX = '{"accession_number": '
+_json_decoder = json.JSONDecoder()
+
+
+def _extract_statements(url, text, company, kinds, parser):
+    '''
+    Returns {kind:[FinancialReport]} of the filing at url given text, its
+    SGML. Runs in the worker processes
+    '''
+    filing = Filing.from_text(url, text, company, parser)
+    statements = {}
+    for kind in kinds:
+        result = getattr(filing, 'get_' + kind)()
+        # the statements of filings in the old format are lists of one report
+        if isinstance(result, FinancialReport):
+            result = [result]
+        statements[kind] = list(result or [])
+    return statements
+
+
+def dumps_record(filing_info, financial_report):
+    '''
+    Returns the record (a line of the outputs, without its newline) of
+    financial_report, one of the statements of the filing of filing_info
+    '''
+    return RECORD_PREFIX + json.dumps(filing_info.accession_number) + ', "url": ' + json.dumps(filing_info.url) + \
+        ', "report": ' + dumps(financial_report) + '}'
+
+
+def get_record_accession_number(line):
+    '''
+    Returns the accession number of the record of line, an output line,
+    without parsing the rest of it
+    '''
+    return _json_decoder.raw_decode(line, len(RECORD_PREFIX))[0]
+
+
+def read_output(file):
+    '''
+    Yields (accession_number, url, FinancialReport) of the records of file,
+    an output of BulkExtractor opened for reading
+    '''
+    for line in file:
+        if line.strip():
+            record = json.loads(line)
+            yield record['accession_number'], record['url'], build_report(record['report'])
+
+
+def read_checkpoint(output_directory):
+    '''
+    Returns the set of accession numbers of the filings that were written to
+    output_directory by previous runs
+    '''
+    path = os.path.join(output_directory, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return set()
+    with open(path, mode='r', encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+class BulkExtractor:
+    '''
+    Extracts the statements of many filings into output_directory, see the
+    module docstring
+    '''
+
+    def __init__(self, output_directory, statements=STATEMENT_KINDS, parser=DEFAULT_PARSER, max_workers=None,
+                 fetchers=2, requests_per_second=10, queue_size=16, rate_limiter=None):
+        '''
+        :param output_directory: directory of the <kind>.ndjson outputs, the
+            checkpoint and the failures
+        :param statements: kinds of statements to extract, see STATEMENT_KINDS
+        :param parser: see edgar.financials.PARSERS
+        :param max_workers: number of parsing processes, None for one per CPU
+        :param fetchers: number of threads downloading filings
+        :param requests_per_second: limit on the downloads of all the fetchers
+        :param queue_size: bound of the queues between the stages, i.e. of the
+            filings that are held in memory at a time
+        :param rate_limiter: object whose wait() is called before each
+            download, e.g. an edgar.jobs.SharedRateLimiter shared by several
+            extractors, instead of a RateLimiter of requests_per_second
+        '''
+        unknown_kinds = [kind for kind in statements if kind not in STATEMENT_KINDS]
+        if unknown_kinds:
+            raise ValueError('Unknown statements {}, expected some of {}'.format(unknown_kinds, STATEMENT_KINDS))
+
+        self.output_directory = output_directory
+        self.statements = list(statements)
+        self.parser = parser
+        self.max_workers = max_workers
+        self.fetchers = fetchers
+        self.rate_limiter = rate_limiter or RateLimiter(requests_per_second)
+        self.queue_size = queue_size
+        self.stopped = threading.Event()
+        self.discarding = threading.Event()
+
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def run(self, filing_infos):
+        '''
+        Extracts the statements of filing_infos, skipping those that were
+        already written to output_directory, and returns the number of filings
+        written by this run
+
+        :param filing_infos: iterable of edgar.edgar.FilingInfo objects, e.g.
+            the result of get_filing_info
+        '''
+        os.makedirs(self.output_directory, exist_ok=True)
+        checkpointed = read_checkpoint(self.output_directory)
+
+        fetch_queue = queue.Queue(self.queue_size)
+        parse_queue = queue.Queue(self.queue_size)
+        result_queue = queue.Queue(self.queue_size)
+
+        threads = [threading.Thread(target=self._feed, args=(filing_infos, checkpointed, fetch_queue), daemon=True)]
+        # the downloads are seen by the listeners of the caller's context
+        threads += [threading.Thread(target=bind_context(self._fetch), args=(fetch_queue, parse_queue, result_queue),
+                                     daemon=True) for _ in range(self.fetchers)]
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            threads.append(threading.Thread(target=self._dispatch, args=(executor, parse_queue, result_queue),
+                                            daemon=True))
+            for thread in threads:
+                thread.start()
+            try:
+                self._write(result_queue)
+            except BaseException:
+                # the pool's done-callbacks block on a full result_queue, so it has to be drained before the
+                # pool is shut down, or leaving the with statement would never return
+                self.stop()
+                while result_queue.get() is not DONE:
+                    pass
+                raise
+            finally:
+                for thread in threads:
+                    thread.join()
+
+        return self.completed
+
+    def stop(self, discard=False):
+        '''
+        Stops run from taking more filings, it returns once those already
+        taken are written
+
+        :param discard: if True, those already taken aren't written either,
+            e.g. because another process took over output_directory
+        '''
+        if discard:
+            self.discarding.set()
+        self.stopped.set()
+
+    def _feed(self, filing_infos, checkpointed, fetch_queue):
+        try:
+            for filing_info in filing_infos:
+                if self.stopped.is_set():
+                    break
+                if filing_info.accession_number in checkpointed:
+                    self.skipped += 1
+                else:
+                    fetch_queue.put(filing_info)
+        finally:
+            for _ in range(self.fetchers):
+                fetch_queue.put(DONE)
+
+    def _fetch(self, fetch_queue, parse_queue, result_queue):
+        try:
+            while True:
+                filing_info = fetch_queue.get()
+                if filing_info is DONE:
+                    return
+                if self.stopped.is_set():
+                    # dropped, run is only waiting for the filings that are already fetched
+                    continue
+                self.rate_limiter.wait()
+                try:
+                    text = GetRequest(filing_info.url).response.text
+                except Exception as e:
+                    result_queue.put((filing_info, FETCH_STAGE, e))
+                else:
+                    parse_queue.put((filing_info, text))
+        finally:
+            parse_queue.put(DONE)
+
+    def _dispatch(self, executor, parse_queue, result_queue):
+        # released once the result of a filing is on result_queue, bounding the filings in the pool
+        in_flight = threading.BoundedSemaphore(self.queue_size)
+
+        def put_result(filing_info, future):
+            try:
+                result_queue.put((filing_info, None, future.result()))
+            except Exception as e:
+                result_queue.put((filing_info, PARSE_STAGE, e))
+            finally:
+                in_flight.release()
+
+        fetchers_done = 0
+        while fetchers_done < self.fetchers:
+            item = parse_queue.get()
+            if item is DONE:
+                fetchers_done += 1
+                continue
+
+            filing_info, text = item
+            if self.stopped.is_set():
+                continue
+            in_flight.acquire()
+            try:
+                future = executor.submit(_extract_statements, filing_info.url, text, filing_info.cik,
+                                         self.statements, self.parser)
+            except Exception as e:
+                result_queue.put((filing_info, PARSE_STAGE, e))
+                in_flight.release()
+            else:
+                future.add_done_callback(lambda future, filing_info=filing_info: put_result(filing_info, future))
+
+        # wait for the results of the filings still in the pool
+        for _ in range(self.queue_size):
+            in_flight.acquire()
+        result_queue.put(DONE)
+
+    def _write(self, result_queue):
+        output_files = {kind: open(os.path.join(self.output_directory, kind + OUTPUT_FILE_EXTENSION),
+                                   mode='a', encoding='utf-8')
+                        for kind in self.statements}
+        try:
+            with open(os.path.join(self.output_directory, CHECKPOINT_FILE), mode='a', encoding='utf-8') as checkpoint, \
+                    open(os.path.join(self.output_directory, FAILURES_FILE), mode='a', encoding='utf-8') as failures:
+                while True:
+                    item = result_queue.get()
+                    if item is DONE:
+                        return
+                    if self.discarding.is_set():
+                        continue
+
+                    filing_info, failed_stage, result = item
+                    if failed_stage is None and filing_info.accession_number is None:
+                        # it couldn't be checkpointed
+                        failed_stage, result = WRITE_STAGE, ValueError(
+                            '{} has no accession number'.format(filing_info.url))
+                    if failed_stage is None:
+                        try:
+                            # serialized first so that a filing is never partially written
+                            lines = {kind: ''.join(dumps_record(filing_info, report) + '\n' for report in reports)
+                                     for kind, reports in result.items()}
+                        except Exception as e:
+                            failed_stage, result = WRITE_STAGE, e
+
+                    if failed_stage is not None:
+                        self._write_failure(failures, filing_info, failed_stage, result)
+                        continue
+
+                    for kind, text in lines.items():
+                        output_files[kind].write(text)
+                        output_files[kind].flush()
+                    # only checkpointed once its statements are flushed
+                    checkpoint.write(filing_info.accession_number + '\n')
+                    checkpoint.flush()
+                    self.completed += 1
+        finally:
+            for output_file in output_files.values():
+                output_file.close()
+
+    def _write_failure(self, failures, filing_info, stage, error):
+        failures.write(json.dumps({
+            'accession_number': filing_info.accession_number,
+            'url': filing_info.url,
+            'company': filing_info.company,
+            'form': filing_info.form,
+            'stage': stage,
+            'error': '{}: {}'.format(type(error).__name__, error),
+        }) + '\n')
+        failures.flush()
+        self.failed += 1
+
+
+def main(args=None):
+    arg_parser = argparse.ArgumentParser(prog='edgar-bulk',
+                                         description='Extracts the statements of the filings of a period')
+    arg_parser.add_argument('--output', required=True, help='directory of the outputs and of the checkpoint')
+    arg_parser.add_argument('--year', type=int, default=0, help='year of the filings, the latest by default')
+    arg_parser.add_argument('--quarter', type=int, default=0, help='quarter of the filings, the latest by default')
+    arg_parser.add_argument('--cik', default='', help='only the filings of this company')
+    arg_parser.add_argument('--forms', nargs='+', default=DEFAULT_FORMS, help='forms of the filings')
+    arg_parser.add_argument('--statements', nargs='+', default=STATEMENT_KINDS, choices=STATEMENT_KINDS)
+    arg_parser.add_argument('--parser', default=DEFAULT_PARSER, choices=PARSERS)
+    arg_parser.add_argument('--workers', type=int, default=None, help='parsing processes, one per CPU by default')
+    arg_parser.add_argument('--fetchers', type=int, default=2, help='downloading threads')
+    arg_parser.add_argument('--rate', type=float, default=10, help='maximum downloads per second')
+    args = arg_parser.parse_args(args)
+
+    filing_infos = get_filing_info(cik=args.cik, forms=args.forms, year=args.year, quarter=args.quarter)
+    extractor = BulkExtractor(args.output, args.statements, args.parser, args.workers, args.fetchers, args.rate)
+    extractor.run(filing_infos)
+    print('{} filings written, {} skipped (already written), {} failed (see {})'.format(
+        extractor.completed, extractor.skipped, extractor.failed, os.path.join(args.output, FAILURES_FILE)))
+
+
+if __name__ == '__main__':
+    main()
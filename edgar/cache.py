@@ -0,0 +1,184 @@
+'''
+Cache of the results of parsing filings, so that extracting the statements
+of the same filing again neither fetches nor parses it
+
+Results are keyed by the accession number of the filing, the kind of result
+(e.g. income_statements) and PARSER_VERSION, so that they're recomputed
+whenever the parsing code changes. They're stored pickled and compressed,
+in memory or in a directory, and the least recently used ones are evicted
+once the cache is bigger than its max_bytes
+
+A ResultCache can be shared by threads, e.g. those of Stock.get_history or
+edgar.panel.get_panel: its bookkeeping is done under a lock, while results
+are pickled and compressed outside of it
+'''
+import os
+import pickle
+import zlib
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from edgar.edgar import get_accession_number
+from edgar.__version__ import __version__
+
+# modules whose code determines the parsed results
+PARSER_MODULES = ['dtd.py', 'sgml.py', 'document.py', 'document_text.py', 'filing.py', 'financials.py',
+                  'html_text.py', 'xbrl.py', 'inline_xbrl.py']
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+CACHE_FILE_EXTENSION = '.pickle.z'
+
+_parser_version = None
+
+
+def get_parser_version():
+    '''
+    Returns a hash of the package version and of the source of PARSER_MODULES,
+    which changes whenever the parsing code does
+    '''
+    global _parser_version
+    if _parser_version is None:
+        version_hash = hashlib.sha1(__version__.encode('utf-8'))
+        edgar_directory = os.path.dirname(os.path.realpath(__file__))
+        for module in PARSER_MODULES:
+            with open(os.path.join(edgar_directory, module), mode='rb') as f:
+                version_hash.update(f.read())
+        _parser_version = version_hash.hexdigest()[:16]
+    return _parser_version
+
+
+class ResultCache:
+    '''
+    Size bounded LRU cache of parsed results (e.g. FinancialReports), stored
+    as compressed pickles in memory, or in directory if one is given. A
+    directory can be shared by successive runs (but not concurrently by
+    several processes). Thread-safe
+    '''
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        '''
+        :param directory: directory of the cache files, if None the cache is
+            only kept in memory
+        :param max_bytes: the least recently used results are evicted once
+            the results take more than this many bytes
+        '''
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # {key:size} from least to most recently used, and {key:data} if in memory
+        self.sizes = OrderedDict()
+        self.data = {}
+        self.total_bytes = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            # files of previous runs, ordered by when they were last used
+            entries = []
+            for filename in os.listdir(directory):
+                if filename.endswith(CACHE_FILE_EXTENSION):
+                    stat = os.stat(os.path.join(directory, filename))
+                    entries.append((stat.st_mtime, filename[:-len(CACHE_FILE_EXTENSION)], stat.st_size))
+            for _, key, size in sorted(entries):
+                self.sizes[key] = size
+                self.total_bytes += size
+            self._evict()
+
+    @staticmethod
+    def get_key(url, kind, *options):
+        '''
+        Returns the key of the result of kind (e.g. income_statements) for the
+        filing at url, given the options it was parsed with (e.g. the parser)
+        '''
+        key_text = '|'.join(str(part) for part in
+                            (get_accession_number(url) or url, kind, get_parser_version()) + options)
+        return hashlib.sha1(key_text.encode('utf-8')).hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key + CACHE_FILE_EXTENSION)
+
+    def get(self, key, default=None):
+        '''
+        Returns the result stored for key, or default if there is none
+        '''
+        with self.lock:
+            if key not in self.sizes:
+                self.misses += 1
+                return default
+
+            if self.directory is None:
+                data = self.data[key]
+            else:
+                try:
+                    with open(self._get_path(key), mode='rb') as f:
+                        data = f.read()
+                    # the modification time is when the result was last used
+                    os.utime(self._get_path(key))
+                except OSError:
+                    self._remove(key)
+                    self.misses += 1
+                    return default
+
+            self.sizes.move_to_end(key)
+            self.hits += 1
+        return pickle.loads(zlib.decompress(data))
+
+    def put(self, key, result):
+        '''
+        Stores result for key, evicting the least recently used results if
+        the cache is over max_bytes
+        '''
+        data = zlib.compress(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+        temporary_path = None
+        if self.directory is not None:
+            # written then renamed so that a partially written file is never read, under a name of its own since
+            # other threads may be writing the same key
+            file_descriptor, temporary_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+            try:
+                with os.fdopen(file_descriptor, mode='wb') as f:
+                    f.write(data)
+            except BaseException:
+                os.remove(temporary_path)
+                raise
+
+        with self.lock:
+            if key in self.sizes:
+                # the file is replaced below
+                self._remove(key, remove_file=False)
+
+            if self.directory is None:
+                self.data[key] = data
+            else:
+                os.replace(temporary_path, self._get_path(key))
+
+            self.sizes[key] = len(data)
+            self.total_bytes += len(data)
+            self._evict()
+
+    def _remove(self, key, remove_file=True):
+        self.total_bytes -= self.sizes.pop(key)
+        if self.directory is None:
+            del self.data[key]
+        elif remove_file:
+            try:
+                os.remove(self._get_path(key))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.sizes:
+            self._remove(next(iter(self.sizes)))
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.sizes):
+                self._remove(key)
+
+    def __contains__(self, key):
+        return key in self.sizes
+
+    def __len__(self):
+        return len(self.sizes)
@@ -0,0 +1,274 @@
+'''
+Search of companies by name, for when neither the ticker nor the cik of a
+company is known, e.g. for autocomplete
+
+A CompanyIndex is built once from the company names of the full indexes of
+the last DEFAULT_QUARTERS quarters and the ciks and symbols of symbols.csv
+(so that a symbol is found even if its company hasn't filed lately, though
+without a name), and has:
+ - the sorted normalized names, so that names starting with a query are
+   found by binary search
+ - the sorted words of the names, so that names with words starting with
+   each of the words of a query are too (e.g. "bank america" finds
+   "BANK OF AMERICA CORP")
+ - an inverted index of the trigrams of the names, so that misspelled
+   queries still find similar names
+'''
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from edgar.edgar import get_filing_info
+from edgar.requests_wrapper import RequestException
+from edgar.symbol_index import get_cik, get_symbol, get_symbol_ciks
+
+NON_ALPHANUMERIC_REGEX = re.compile(r'[^0-9a-z]+')
+# too common to tell names apart by their trigrams
+STOP_WORDS = {'the', 'of', 'and', 'inc', 'corp', 'corporation', 'co', 'company', 'ltd', 'llc', 'lp', 'plc',
+              'group', 'holdings', 'trust', 'fund', 'de', 'sa', 'ag', 'nv'}
+
+DEFAULT_LIMIT = 10
+# quarters whose full indexes the default CompanyIndex is built from, the current one included, so that it has
+# every company that filed a 10-Q or 10-K in the last year even early in a quarter
+DEFAULT_QUARTERS = 4
+# most names checked for the words of a query, keeps lookups fast for very short words
+MAX_WORD_CANDIDATES = 2000
+# trigrams of more names than this are left out of fuzzy search
+MAX_POSTINGS = 5000
+# names compared to the query per result of fuzzy search, those with the most trigrams in common with it
+FUZZY_CANDIDATES = 5
+MIN_SIMILARITY = 0.25
+
+
+def normalize_name(name):
+    '''
+    Returns name in lowercase with only letters and digits, and single spaces
+    between words, e.g. "apple inc" for "Apple Inc."
+    '''
+    return NON_ALPHANUMERIC_REGEX.sub(' ', name.lower()).strip()
+
+
+def get_trigrams(normalized_name):
+    '''
+    Returns the set of trigrams of the words of normalized_name that aren't
+    STOP_WORDS, each word padded with spaces
+    '''
+    text = ' ' + ' '.join(word for word in normalized_name.split() if word not in STOP_WORDS) + ' '
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class Company:
+    __slots__ = ('name', 'cik', 'symbol')
+
+    def __init__(self, name, cik, symbol=None):
+        self.name = name
+        self.cik = cik
+        self.symbol = symbol
+
+    def __repr__(self):
+        return '[{0}, {1}, {2}]'.format(self.name, self.cik, self.symbol)
+
+
+def _get_prefix_range(keys, prefix):
+    '''
+    Returns the range of the indexes of keys (sorted) that start with prefix
+    '''
+    start = bisect_left(keys, prefix)
+    # every key starting with prefix sorts before prefix followed by the last character
+    return range(start, bisect_left(keys, prefix + '\uffff', start))
+
+
+class CompanyIndex:
+    '''
+    Index of company names for search, see the module docstring
+    '''
+
+    def __init__(self, companies, ciks=()):
+        '''
+        :param companies: iterable of (name, cik) tuples. Each cik is indexed
+            once, with its last name (so indexes should be given oldest
+            first)
+        :param ciks: more ciks to find by their symbol (e.g. those of
+            symbols.csv), with None as the name of those not in companies
+        '''
+        names = {}
+        for name, cik in companies:
+            names[cik] = name
+        for cik in ciks:
+            names.setdefault(cik, None)
+        self.companies = [Company(name, cik, get_symbol(cik)) for cik, name in names.items()]
+        self.ids_by_cik = {company.cik: i for i, company in enumerate(self.companies)}
+        # companies without a name are only found by symbol
+        self.normalized_names = [normalize_name(company.name or '') for company in self.companies]
+
+        # (key, id) pairs sorted by key, kept as parallel lists for bisect
+        name_pairs = sorted((name, i) for i, name in enumerate(self.normalized_names))
+        self.name_keys = [name for name, _ in name_pairs]
+        self.name_ids = array('I', (i for _, i in name_pairs))
+
+        word_pairs = sorted((word, i) for i, name in enumerate(self.normalized_names) for word in set(name.split()))
+        self.word_keys = [word for word, _ in word_pairs]
+        self.word_ids = array('I', (i for _, i in word_pairs))
+
+        # {trigram:ids}, and the number of trigrams of each name
+        self.trigrams = {}
+        self.trigram_counts = array('I')
+        for i, name in enumerate(self.normalized_names):
+            trigrams = get_trigrams(name)
+            self.trigram_counts.append(len(trigrams))
+            for trigram in trigrams:
+                postings = self.trigrams.get(trigram)
+                if postings is None:
+                    postings = self.trigrams[trigram] = array('I')
+                postings.append(i)
+
+    @classmethod
+    def from_filing_infos(cls, filing_infos):
+        '''
+        Returns the CompanyIndex of the companies of filing_infos (e.g. of
+        get_filing_info for a quarter)
+        '''
+        return cls((filing_info.company, filing_info.cik) for filing_info in filing_infos)
+
+    def __len__(self):
+        return len(self.companies)
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        '''
+        Returns up to limit Companies matching query, in order: the company
+        whose symbol is query, those whose names start with query, those with
+        words starting with each of the words of query, then those with
+        similar names
+        '''
+        normalized_query = normalize_name(query)
+        if not normalized_query or limit <= 0:
+            return []
+
+        ids = []
+        found = set()
+
+        def add(i):
+            if i in found:
+                return False
+            found.add(i)
+            ids.append(i)
+            return True
+
+        i = self.ids_by_cik.get(get_cik(query.strip().upper()))
+        if i is not None:
+            add(i)
+
+        for index in _get_prefix_range(self.name_keys, normalized_query):
+            if len(ids) >= limit:
+                break
+            add(self.name_ids[index])
+
+        if len(ids) < limit:
+            self._add_word_matches(normalized_query.split(), add, limit - len(ids))
+        if len(ids) < limit:
+            self._add_similar(normalized_query, add, limit - len(ids))
+
+        return [self.companies[i] for i in ids[:limit]]
+
+    def _add_word_matches(self, words, add, limit):
+        # candidates are the names with a word starting with the longest word of the query, the most selective
+        longest_word = max(words, key=len)
+        other_words = list(words)
+        other_words.remove(longest_word)
+        added = 0
+        for index in _get_prefix_range(self.word_keys, longest_word)[:MAX_WORD_CANDIDATES]:
+            i = self.word_ids[index]
+            name_words = self.normalized_names[i].split()
+            if all(any(name_word.startswith(word) for name_word in name_words) for word in other_words) and add(i):
+                added += 1
+                if added >= limit:
+                    return
+
+    def _add_similar(self, normalized_query, add, limit):
+        trigrams = get_trigrams(normalized_query)
+        # {id:number of trigrams in common with the query}, ignoring trigrams that too many names have
+        shared_counts = Counter()
+        for trigram in trigrams:
+            ids = self.trigrams.get(trigram)
+            if ids is not None and len(ids) <= MAX_POSTINGS:
+                shared_counts.update(ids)
+
+        similarities = []
+        for i, shared_count in shared_counts.most_common(limit * FUZZY_CANDIDATES):
+            # Jaccard similarity of the trigrams of the query and of the name
+            similarity = shared_count / (len(trigrams) + self.trigram_counts[i] - shared_count)
+            if similarity >= MIN_SIMILARITY:
+                similarities.append((-similarity, self.normalized_names[i], i))
+        for _, _, i in sorted(similarities):
+            if add(i):
+                limit -= 1
+                if limit == 0:
+                    return
+
+
+_lock = threading.Lock()
+_company_index = None
+
+
+def _get_quarters(count):
+    '''
+    Returns the (year, quarter) tuples of the last count quarters, oldest
+    first
+    '''
+    now = datetime.now()
+    year, quarter = now.year, (now.month - 1) // 3 + 1
+    quarters = []
+    for _ in range(count):
+        quarters.append((year, quarter))
+        year, quarter = (year - 1, 4) if quarter == 1 else (year, quarter - 1)
+    quarters.reverse()
+    return quarters
+
+
+def _iter_recent_companies(quarters):
+    '''
+    Yields (name, cik) of the filings of the full indexes of the last
+    quarters, oldest first, one index at a time. An index that can't be read
+    (e.g. that of a quarter that just started) is left out
+    '''
+    for year, quarter in _get_quarters(quarters):
+        try:
+            filing_infos = get_filing_info(year=year, quarter=quarter)
+        except RequestException:
+            continue
+        for filing_info in filing_infos:
+            yield filing_info.company, filing_info.cik
+
+
+def get_company_index():
+    '''
+    Returns the process-wide CompanyIndex, built from the full indexes of the
+    last DEFAULT_QUARTERS quarters and from symbols.csv when first used
+    '''
+    global _company_index
+    if _company_index is None:
+        with _lock:
+            if _company_index is None:
+                _company_index = CompanyIndex(_iter_recent_companies(DEFAULT_QUARTERS), get_symbol_ciks())
+    return _company_index
+
+
+def set_company_index(company_index):
+    '''
+    Sets the CompanyIndex used by search_companies, e.g. one built from
+    several quarters with CompanyIndex.from_filing_infos
+    '''
+    global _company_index
+    with _lock:
+        _company_index = company_index
+
+
+def search_companies(query, limit=DEFAULT_LIMIT):
+    '''
+    Returns up to limit Companies (name, cik and symbol) whose symbol or name
+    match query, a prefix of a name (e.g. "berkshire h"), words of a name or
+    a misspelled name, see CompanyIndex.search
+    '''
+    return get_company_index().search(query, limit)
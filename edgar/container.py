@@ -0,0 +1,144 @@
+'''
+Container files of pre-parsed filings, so that a filing's SGML only has to
+be parsed once however many times the filing is processed
+
+A container file has:
+ - MAGIC, then the length of the header as an unsigned 64 bit integer
+ - the header, UTF-8 JSON with the url and acceptance date of the filing and
+   its document table: a [type, sequence, filename, description, text_kind,
+   offset, length] entry per document
+ - the UTF-8 text of each document, at offset (relative to the end of the
+   header) with length bytes
+
+Containers are read by memory-mapping them, and each Document is only built
+from its bytes when it is first used, so opening a container costs almost
+nothing and processes reading the same container share its pages
+'''
+import json
+import mmap
+import struct
+from collections.abc import Mapping
+from datetime import datetime
+from edgar.dtd import DTD
+from edgar.document import Document
+
+MAGIC = b'EDGARFC1'
+HEADER_LENGTH_FORMAT = '<Q'
+DATE_FORMAT = '%Y%m%d'
+
+# kinds of document text, either the text as is or the XML element of the text
+TEXT_KIND = 'text'
+XML_KIND = 'xml'
+
+
+class ContainerException(Exception):
+    pass
+
+
+def write_container(filing, path):
+    '''
+    Writes the documents of filing (an edgar.filing.Filing) to a container
+    file at path, see Filing.from_container to read it
+    '''
+    dtd = DTD()
+    document_table = []
+    bodies = []
+    offset = 0
+
+    for document in filing.documents.values():
+        data = document.doc_text.data
+        if isinstance(data, dict):
+            text_kind = XML_KIND
+            body = data.get(dtd.xml.tag, '').encode('utf-8')
+        else:
+            text_kind = TEXT_KIND
+            body = data.encode('utf-8')
+
+        document_table.append([document.type, document.sequence, document.filename, document.description,
+                               text_kind, offset, len(body)])
+        bodies.append(body)
+        offset += len(body)
+
+    header = json.dumps({
+        'url': filing.url,
+        'date_filed': filing.date_filed.strftime(DATE_FORMAT),
+        'documents': document_table,
+    }).encode('utf-8')
+
+    with open(path, mode='wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack(HEADER_LENGTH_FORMAT, len(header)))
+        f.write(header)
+        for body in bodies:
+            f.write(body)
+
+
+class Container:
+    '''
+    A memory-mapped container file. Closing it invalidates the documents
+    that haven't been built yet
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, mode='rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header_start = len(MAGIC) + struct.calcsize(HEADER_LENGTH_FORMAT)
+        if self.mmap[:len(MAGIC)] != MAGIC:
+            self.mmap.close()
+            raise ContainerException('{} is not a filing container'.format(path))
+        header_length, = struct.unpack(HEADER_LENGTH_FORMAT, self.mmap[len(MAGIC):header_start])
+        header = json.loads(self.mmap[header_start:header_start + header_length].decode('utf-8'))
+
+        self.body_start = header_start + header_length
+        self.url = header['url']
+        self.date_filed = datetime.strptime(header['date_filed'], DATE_FORMAT)
+        self.document_table = header['documents']
+        self.documents = ContainerDocuments(self)
+
+    def read_text(self, offset, length):
+        start = self.body_start + offset
+        return self.mmap[start:start + length].decode('utf-8')
+
+    def close(self):
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ContainerDocuments(Mapping):
+    '''
+    {filename:Document} of a Container, like Filing.documents, where each
+    Document is built from the container when it is first used
+    '''
+    dtd = DTD()
+
+    def __init__(self, container):
+        self.container = container
+        # {filename:document table entry}, the last document wins like in Filing
+        self.entries = {entry[2]: entry for entry in container.document_table}
+        self.documents = {}
+
+    def __getitem__(self, filename):
+        if filename not in self.documents:
+            doc_type, sequence, _, description, text_kind, offset, length = self.entries[filename]
+            text = self.container.read_text(offset, length)
+
+            data = {self.dtd.doc_type.tag: doc_type, self.dtd.sequence.tag: sequence,
+                    self.dtd.filename.tag: filename,
+                    self.dtd.doc_text.tag: {self.dtd.xml.tag: text} if text_kind == XML_KIND else text}
+            if description is not None:
+                data[self.dtd.description.tag] = description
+            self.documents[filename] = Document(data)
+        return self.documents[filename]
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
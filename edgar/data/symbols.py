@@ -1,129 +1,510 @@
 '''
 This is used to backload symbols.csv in order to map a cik to a symbol
+
+The ownership forms (3, 4 and 5) of every quarter since 2004 are crawled,
+latest first, and the issuer cik and trading symbol of each form are read
+from its ownership XML document, which is parsed as it is downloaded (the
+download stops as soon as both are found). Ciks that are already in the csv
+aren't fetched again, and the forms of a quarter are fetched concurrently,
+under a shared rate limit
+
+Progress is checkpointed every CHECKPOINT_INTERVAL forms: the csv is
+rewritten, and the quarters done and the position in the current quarter
+are saved in CHECKPOINT_PATH, so an interrupted crawl resumes where it
+stopped. Delete the checkpoint to crawl everything again (which only fetches
+the forms of ciks that aren't in the csv yet)
+
+The csv is kept up to date going forward with SymbolUpdater, which only reads
+the daily indexes after a watermark (the last day it applied, saved in
+WATERMARK_PATH) and fetches the latest form of each issuer that filed since.
+New and changed symbols are then upserted at the top of the csv in one
+write, so the latest symbols win. The watermark doesn't move past the day of
+a form that couldn't be read because of a transient error (e.g. a dropped
+connection, not a 404), so it's read again by the next update
+
+usage: python -m edgar.data.symbols [--update]
 '''
-import pandas as pd
-import sys
-# to overcome no module found error, use "python -m symbols.symbols"
-from edgar.edgar import get_index_json, _get_filing_info, SYMBOLS_DATA_PATH
-from edgar.filing import Filing
+import os
+import csv
+import json
+import argparse
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree.ElementTree import XMLPullParser
+# to overcome no module found error, use "python -m edgar.data.symbols"
+from edgar.edgar import get_index_json, _get_filing_info, get_accession_number, get_daily_index_dates, \
+    get_daily_filing_info, SYMBOLS_DATA_PATH
+from edgar.symbol_index import reset_symbol_index
+from edgar.requests_wrapper import RateLimiter, RequestException
+from edgar.instrumentation import stage, count, request, bind_context, FETCH_STAGE, BYTES_DOWNLOADED
 
 csv_path = SYMBOLS_DATA_PATH
+CHECKPOINT_PATH = os.path.splitext(SYMBOLS_DATA_PATH)[0] + '.checkpoint.json'
+WATERMARK_PATH = os.path.splitext(SYMBOLS_DATA_PATH)[0] + '.watermark.json'
+WATERMARK_FORMAT = '%Y-%m-%d'
 
-def get_all_symbols():
+COLUMNS = ['cik', 'symbol', 'year', 'quarter', 'filing_url']
+# these have issuerTradingSymbol (https://www.sec.gov/fast-answers/answersform345htm.html)
+FORMS = ['3', '4', '5']
+# basically no good/xml data before 2004
+MIN_YEAR = 2004
 
-    # expects a csv with columns=['cik', 'symbol', 'year', 'quarter', 'filing_url']
-    df = pd.read_csv(csv_path, converters={'cik' : str})
-    # df.cik = df.cik.astype(str) # was converting to float
+MAX_WORKERS = 8
+CHECKPOINT_INTERVAL = 500
+# responses of EDGAR that a later request may not get, e.g. when over the rate limit
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
 
-    results = df.to_dict('list')
+XML_START = '<XML>'
+XML_END = '</XML>'
 
-    # dict cik:symbol
-    # results = {
-    # 	'cik':[],
-    # 	'symbol':[],
-    # 	'year':[],
-    # 	'quarter':[],
-    # 	'filing_url':[]
-    # }
 
-    starting_year = ''
-    starting_quarter = ''
-    starting_filing_url = ''
+def read_symbols(path=csv_path):
+    '''
+    Returns the rows of the csv at path, as lists of COLUMNS
+    '''
+    if not os.path.exists(path):
+        return []
+    with open(path, mode='r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return [row for row in reader if row]
 
-    try:
-        starting_year = results['year'][-1]
-        starting_quarter = results['quarter'][-1]
-        starting_filing_url = results['filing_url'][-1]
-    except:
-        print('No previous data; starting from scratch')
-
-    # these have issuerTradingSymbol (https://www.sec.gov/fast-answers/answersform345htm.html)
-    forms = ['3', '4', '5'] 
-                    
-    # starts at full index, reverse to focus on most recent symbol data
-    full_directory_item_list = reversed(get_index_json()['directory']['item'])
-    
-    found_starting_year = True if starting_year == '' else False
-    found_starting_quarter = True if starting_quarter == '' else False
-    found_starting_filing_url = True if starting_filing_url == '' else False
 
+def write_symbols(rows, path=csv_path):
+    '''
+    Writes rows to the csv at path, replacing it only once it's fully written
+    '''
+    temporary_path = path + '.tmp'
+    with open(temporary_path, mode='w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+    os.replace(temporary_path, path)
+
+
+def read_checkpoint(path=CHECKPOINT_PATH):
+    '''
+    Returns the checkpoint at path: the quarters that are done (e.g.
+    '2018/QTR4/'), the quarter in progress and the position and url of the
+    next form to process in that quarter
+    '''
+    if not os.path.exists(path):
+        return {'completed_quarters': [], 'quarter': None, 'position': 0, 'filing_url': None}
+    with open(path, mode='r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_checkpoint(checkpoint, path=CHECKPOINT_PATH):
+    temporary_path = path + '.tmp'
+    with open(temporary_path, mode='w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(temporary_path, path)
+
+
+class TransientRequestException(RequestException):
+    pass
+
+
+def read_issuer(lines):
+    '''
+    Returns a tuple of the cik and symbol of the issuer of a filing given the
+    lines of its SGML, by streaming its ownership XML document (usually of a
+    form 3, 4, or 5) through a pull parser. Stops reading lines once both are
+    found, and returns None for those that aren't there
+    '''
+    parser = None
+    started = False
+    cik = None
+    symbol = None
+
+    for line in lines:
+        if parser is None:
+            if line.strip() == XML_START:
+                parser = XMLPullParser(events=('end',))
+            continue
+        if line.strip() == XML_END:
+            break
+        if not started:
+            # the XML declaration has to come first
+            if not line.strip():
+                continue
+            line = line.lstrip()
+            started = True
+
+        parser.feed(line + '\n')
+        for _, element in parser.read_events():
+            tag = element.tag.rsplit('}', 1)[-1]
+            if tag == 'issuerCik':
+                # remove leading zeroes (can also just keep in, doesn't matter)
+                cik = (element.text or '').strip().lstrip('0')
+            elif tag == 'issuerTradingSymbol':
+                symbol = (element.text or '').strip()
+        if cik is not None and symbol is not None:
+            break
+
+    return cik, symbol
+
+
+def process_symbol_filing(filing_url):
+    '''
+    Helper returning a tuple of cik, symbol given a url of a filing that
+    contains an XML document with issuerCik issuerTradingSymbol tags
+    (usually forms 3, 4, or 5), only downloading the filing up to them
+    '''
+    import requests
+
+    # the same hooks as GetRequest, see edgar.instrumentation
+    request(filing_url)
+    with stage(FETCH_STAGE), requests.get(filing_url, stream=True) as response:
+        if response.status_code in TRANSIENT_STATUS_CODES:
+            raise TransientRequestException('{}: {}'.format(response.status_code, filing_url))
+        if response.status_code != requests.codes.ok:
+            raise RequestException('{}: {}'.format(response.status_code, filing_url))
+        response.encoding = 'utf-8'
+        # bytes of the lines that were read, the rest of the filing isn't downloaded
+        read_bytes = 0
+
+        def iter_lines():
+            nonlocal read_bytes
+            for line in response.iter_lines(decode_unicode=True):
+                read_bytes += len(line.encode('utf-8')) + 1
+                yield line
+
+        result = read_issuer(iter_lines())
+    count(BYTES_DOWNLOADED, read_bytes)
+    return result
+
+
+def fetch_issuer(filing_url, rate_limiter):
+    '''
+    Same as process_symbol_filing, but waits for rate_limiter first and
+    returns (None, None) if the filing can't be read
+    '''
+    rate_limiter.wait()
     try:
-        for directory_item in full_directory_item_list:
-            if directory_item['type'] == 'dir':
-                year = directory_item['href']
-
-                if not found_starting_year and year == starting_year:
-                    found_starting_year = True
-
-                quarter_directory_item_list = reversed(get_index_json(year=year)['directory']['item'])
-
-                for quarter_directory_item in quarter_directory_item_list:
-                    # basically no good/xml data before 2004
-                    if quarter_directory_item['type'] == 'dir' \
-                    and int(directory_item['name']) >= 2004 \
-                    and found_starting_year:
-                        quarter = quarter_directory_item['href']
-
-                        if not found_starting_quarter and quarter == starting_quarter:
-                            found_starting_quarter = True
-                            
-                        print('year {0} quarter {1}'.format(year, quarter))
-                        
-                        filings = _get_filing_info(forms=forms, year=year, quarter=quarter)
-                        
-                        for filing in filings:
-                            filing_url = filing.url
-
-                            if not found_starting_filing_url and filing_url == starting_filing_url:
-                                found_starting_filing_url = True
-
-                            # see Accession Number in
-                            # https://www.sec.gov/edgar/searchedgar/accessing-edgar-data.htm
-                            # e.g. url: https://www.sec.gov/Archives/edgar/data/filing_cik/0..filing_cik-18-000137.txt
-                            # For conglomerates, the ciks in the url may be
-                            # different, depending on the entity that actually
-                            # files
-                            filing_url_list = filing_url.split('/')
-                            filing_cik_dir = filing_url_list[6]
-                            filing_cik = filing_url_list[7].split('-')[0].lstrip('0')
-                            # print(filing_cik)
-
-                            # process only if we haven't seen the cik before
-                            # helps with performance
-                            if filing_cik_dir not in results['cik'] \
-                                and filing_cik not in results['cik'] \
-                                and found_starting_quarter \
-                                and found_starting_filing_url:
-                                cik, symbol = process_symbol_filing(filing_url)
-                                
-                                # add to results only if it's not already in there
-                                # or if the symbol has changed (get most recent)
-                                # but this latter condition is handled by reverse
-                                if cik not in results['cik'] and cik != '' and cik is not None:
-                                    results['cik'] += [cik]
-                                    results['symbol'] += [symbol]
-                                    results['year'] += [year]
-                                    results['quarter'] += [quarter]
-                                    results['filing_url'] += [filing_url]
+        return process_symbol_filing(filing_url)
     except Exception as e:
-        print(e)
-    finally:
-        df = pd.DataFrame(results, columns=['cik', 'symbol', 'year', 'quarter', 'filing_url'])
-        df = df.set_index('cik')
-        df.to_csv(csv_path)
+        print('could not read symbol of {}: {}'.format(filing_url, e))
+        return None, None
 
 
+def is_transient(error):
+    '''
+    Returns whether error, raised by process_symbol_filing, may not happen
+    again (e.g. a dropped connection or a 503), unlike e.g. a 404 or a form
+    whose XML is malformed
+    '''
+    # the errors of requests (connections, timeouts) are OSErrors
+    return isinstance(error, (TransientRequestException, OSError))
 
-def process_symbol_filing(filing_url):
+
+def get_filing_ciks(filing_url):
+    '''
+    Returns the ciks in filing_url, that of its directory and that of its
+    accession number, which are different when a filing agent or an owner
+    filed it, e.g. https://www.sec.gov/Archives/edgar/data/filing_cik/0..filing_cik-18-000137.txt
+    '''
+    filing_url_list = filing_url.split('/')
+    return filing_url_list[6], filing_url_list[7].split('-')[0].lstrip('0')
+
+
+class SymbolCrawler:
+    '''
+    Adds the cik and symbol of the issuers of the ownership forms on EDGAR to
+    the csv at csv_path, see the module docstring
+    '''
+
+    def __init__(self, csv_path=csv_path, checkpoint_path=CHECKPOINT_PATH, max_workers=MAX_WORKERS,
+                 rate_limiter=None, checkpoint_interval=CHECKPOINT_INTERVAL):
+        '''
+        :param max_workers: number of forms fetched at a time
+        :param rate_limiter: shared by the index and form downloads, 10
+            requests per second by default
+        '''
+        self.csv_path = csv_path
+        self.checkpoint_path = checkpoint_path
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.checkpoint_interval = checkpoint_interval
+
+        self.rows = read_symbols(csv_path)
+        self.ciks = {row[0] for row in self.rows}
+        self.checkpoint = read_checkpoint(checkpoint_path)
+
+    def get_quarters(self):
+        '''
+        Yields the (year, quarter) hrefs of the quarters since MIN_YEAR, latest
+        first, e.g. ('2018/', 'QTR4/')
+        '''
+        self.rate_limiter.wait()
+        # starts at full index, reverse to focus on most recent symbol data
+        for directory_item in reversed(get_index_json()['directory']['item']):
+            if directory_item['type'] != 'dir' or int(directory_item['name']) < MIN_YEAR:
+                continue
+            year = directory_item['href']
+            self.rate_limiter.wait()
+            for quarter_directory_item in reversed(get_index_json(year=year)['directory']['item']):
+                if quarter_directory_item['type'] == 'dir':
+                    yield year, quarter_directory_item['href']
+
+    def run(self):
+        completed_quarters = set(self.checkpoint['completed_quarters'])
+        for year, quarter in self.get_quarters():
+            if year + quarter in completed_quarters:
+                continue
+            print('year {0} quarter {1}'.format(year, quarter))
+            self._crawl_quarter(year, quarter)
+
+            self.checkpoint['completed_quarters'].append(year + quarter)
+            completed_quarters.add(year + quarter)
+            self.checkpoint.update(quarter=None, position=0, filing_url=None)
+            write_checkpoint(self.checkpoint, self.checkpoint_path)
+
+    def _get_start_position(self, year, quarter, filing_urls):
+        if self.checkpoint['quarter'] != year + quarter:
+            return 0
+        position = self.checkpoint['position']
+        filing_url = self.checkpoint['filing_url']
+        if position < len(filing_urls) and filing_urls[position] == filing_url:
+            return position
+        # the index of the quarter changed since the checkpoint
+        return filing_urls.index(filing_url) if filing_url in filing_urls else 0
+
+    def _fetch(self, filing_url):
+        return fetch_issuer(filing_url, self.rate_limiter)
+
+    def _crawl_quarter(self, year, quarter):
+        self.rate_limiter.wait()
+        filing_urls = [filing_info.url for filing_info in _get_filing_info(forms=FORMS, year=year, quarter=quarter)]
+        # the index has a form once for each of the entities that it's about
+        fetched = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            start = self._get_start_position(year, quarter, filing_urls)
+            for batch_start in range(start, len(filing_urls), self.checkpoint_interval):
+                batch = []
+                batch_ciks = set()
+                for filing_url in filing_urls[batch_start:batch_start + self.checkpoint_interval]:
+                    filing_cik_dir, filing_cik = get_filing_ciks(filing_url)
+                    accession_number = get_accession_number(filing_url)
+                    # process only if we haven't seen the cik before, helps with performance
+                    if filing_cik_dir in self.ciks or filing_cik in self.ciks or filing_cik_dir in batch_ciks \
+                            or accession_number in fetched:
+                        continue
+                    batch.append(filing_url)
+                    batch_ciks.add(filing_cik_dir)
+                    fetched.add(accession_number)
+
+                # results are added in the order of the index, as if they were fetched one by one
+                for filing_url, (cik, symbol) in zip(batch, executor.map(bind_context(self._fetch), batch)):
+                    if cik and cik not in self.ciks:
+                        self.ciks.add(cik)
+                        self.rows.append([cik, symbol or '', year, quarter, filing_url])
+
+                write_symbols(self.rows, self.csv_path)
+                batch_end = batch_start + self.checkpoint_interval
+                self.checkpoint.update(quarter=year + quarter, position=batch_end,
+                                       filing_url=filing_urls[batch_end] if batch_end < len(filing_urls) else None)
+                write_checkpoint(self.checkpoint, self.checkpoint_path)
+
+
+def get_year_quarter(date):
+    '''
+    Returns the year and quarter hrefs of date, e.g. ('2019/', 'QTR1/')
+    '''
+    return '{}/'.format(date.year), 'QTR{}/'.format((date.month - 1) // 3 + 1)
+
+
+def read_watermark(path=WATERMARK_PATH, rows=None):
+    '''
+    Returns the watermark at path, the last day whose daily index was applied
+    to the csv. Without a watermark, that's the day before the start of the
+    latest quarter of rows, or None if there are no rows
+    '''
+    if os.path.exists(path):
+        with open(path, mode='r', encoding='utf-8') as f:
+            return datetime.strptime(json.load(f)['date'], WATERMARK_FORMAT)
+    if not rows:
+        return None
+    year, quarter = max((row[2], row[3]) for row in rows)
+    quarter_start = datetime(int(year.strip('/')), int(quarter.strip('QTR/')) * 3 - 2, 1)
+    return quarter_start - timedelta(days=1)
+
+
+def write_watermark(date, path=WATERMARK_PATH):
+    temporary_path = path + '.tmp'
+    with open(temporary_path, mode='w', encoding='utf-8') as f:
+        json.dump({'date': date.strftime(WATERMARK_FORMAT)}, f)
+    os.replace(temporary_path, path)
+
+
+class SymbolUpdater:
     '''
-    Helper returning a tuple of cik, symbol given a url of a filing that 
-    contains an XML document with issuerCik issuerTradingSymbol tags 
-    (usually forms 3, 4, or 5)
+    Upserts the symbols of the issuers that filed ownership forms since the
+    watermark into the csv at csv_path, see the module docstring
     '''
-    filing = Filing(filing_url) # we don't care about the company here
-    document = list(filing.documents.values())[0]
-    return document.get_issuer_trading_symbol()
+
+    def __init__(self, csv_path=csv_path, watermark_path=WATERMARK_PATH, max_workers=MAX_WORKERS,
+                 rate_limiter=None):
+        self.csv_path = csv_path
+        self.watermark_path = watermark_path
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter or RateLimiter()
+
+    def _fetch(self, filing_url):
+        '''
+        Same as fetch_issuer, but returns the error if the filing can't be
+        read
+        '''
+        self.rate_limiter.wait()
+        try:
+            return process_symbol_filing(filing_url)
+        except Exception as e:
+            print('could not read symbol of {}: {}'.format(filing_url, e))
+            return e
+
+    def get_dates(self, since, until):
+        '''
+        Returns the dates after since, up to until, that have a daily index
+        '''
+        dates = []
+        year, quarter = since.year, (since.month - 1) // 3 + 1
+        while (year, quarter) <= (until.year, (until.month - 1) // 3 + 1):
+            self.rate_limiter.wait()
+            dates += [date for date in get_daily_index_dates(year, quarter) if since < date <= until]
+            year, quarter = (year + 1, 1) if quarter == 4 else (year, quarter + 1)
+        return dates
+
+    def get_latest_issuers(self, dates):
+        '''
+        Returns ({cik:(symbol, filing_url, date)}, [(filing_url, date)]): the
+        issuers of the ownership forms of the daily indexes of dates, from the
+        latest form of each issuer, and the forms that couldn't be read
+        because of a transient error (see is_transient), which are worth
+        reading again. Forms that can never be read are left out. Only
+        fetches the forms that may be about issuers that haven't been read
+        from a later form yet
+
+        The index doesn't tell which of the ciks of a form is its issuer, so a
+        form is skipped only when it has the cik of an issuer that was read
+        and its other ciks were only seen as the owners in the forms that were
+        read. A parent company, for one, is the issuer of its own forms and an
+        owner in those of its subsidiaries, which are still fetched
+        '''
+        # [(filing_url, ciks, date)], latest first, with one entry per form even though the index lists a form
+        # once for each of the entities that it's about (the issuer and its owners)
+        filings = []
+        ciks_by_accession_number = {}
+        for date in sorted(dates, reverse=True):
+            self.rate_limiter.wait()
+            for filing_info in get_daily_filing_info(date, forms=FORMS):
+                accession_number = filing_info.accession_number
+                if accession_number not in ciks_by_accession_number:
+                    ciks_by_accession_number[accession_number] = set()
+                    filings.append((filing_info.url, ciks_by_accession_number[accession_number], date))
+                ciks_by_accession_number[accession_number].add(filing_info.cik)
+
+        issuers = {}
+        # ciks that were seen as the owners (not the issuer) of the forms that were read
+        owners = set()
+        failed = []
+        batch = []
+        batch_ciks = set()
+        batch_size = self.max_workers * 4
+
+        def fetch_batch():
+            results = executor.map(bind_context(lambda filing: self._fetch(filing[0])), batch)
+            for (filing_url, ciks, date), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    if is_transient(result):
+                        failed.append((filing_url, date))
+                    continue
+                cik, symbol = result
+                if cik:
+                    owners.update(ciks - {cik})
+                    if cik not in issuers:
+                        issuers[cik] = (symbol, filing_url, date)
+            batch.clear()
+            batch_ciks.clear()
+
+        def is_read(ciks):
+            # forms about issuers that were read from a later form already are skipped
+            unread_ciks = ciks.difference(issuers)
+            return len(unread_ciks) < len(ciks) and unread_ciks <= owners
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for filing in filings:
+                ciks = filing[1]
+                if is_read(ciks):
+                    continue
+                # a form with ciks in common with a form of the batch may be about the same issuer, so that form
+                # is read first
+                if len(batch) == batch_size or not ciks.isdisjoint(batch_ciks):
+                    fetch_batch()
+                    if is_read(ciks):
+                        continue
+                batch.append(filing)
+                batch_ciks.update(ciks)
+            fetch_batch()
+        return issuers, failed
+
+    def run(self, since=None, until=None):
+        '''
+        Upserts the symbols of the issuers that filed since the watermark (or
+        since) up to until (today by default), moves the watermark, and
+        returns the rows that were added or changed
+        '''
+        rows = read_symbols(self.csv_path)
+        since = since or read_watermark(self.watermark_path, rows)
+        if since is None:
+            raise ValueError('No watermark or symbols to update from, give the date to update since')
+        until = until or datetime.now()
+
+        dates = self.get_dates(since, until)
+        if not dates:
+            return []
+        print('updating symbols from {} daily indexes since {}'.format(len(dates), since.strftime(WATERMARK_FORMAT)))
+        issuers, failed = self.get_latest_issuers(dates)
+
+        symbols = {row[0]: row[1] for row in rows}
+        changed_rows = []
+        for cik, (symbol, filing_url, date) in issuers.items():
+            # forms of companies without a (new) symbol don't change anything
+            if symbol and symbols.get(cik) != symbol:
+                year, quarter = get_year_quarter(date)
+                changed_rows.append([cik, symbol, year, quarter, filing_url])
+
+        # upserted in one write, with the changed rows first so that their symbols win over older rows
+        changed_ciks = {row[0] for row in changed_rows}
+        write_symbols(changed_rows + [row for row in rows if row[0] not in changed_ciks], self.csv_path)
+        # the forms that couldn't be read because of a transient error are read again by the next run, which
+        # starts the day before the earliest of them
+        if failed:
+            watermark = min(date for _, date in failed) - timedelta(days=1)
+            print('could not read {} forms, the next update starts at {}'.format(
+                len(failed), watermark.strftime(WATERMARK_FORMAT)))
+        else:
+            watermark = dates[-1]
+        write_watermark(watermark, self.watermark_path)
+        if self.csv_path == SYMBOLS_DATA_PATH:
+            reset_symbol_index()
+        return changed_rows
+
+
+def get_all_symbols():
+    SymbolCrawler().run()
+
+
+def update_symbols():
+    changed_rows = SymbolUpdater().run()
+    print('{} symbols added or changed'.format(len(changed_rows)))
 
 
 if __name__ == '__main__':
-    get_all_symbols()
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description='Builds the cik-to-symbol database, symbols.csv')
+    arg_parser.add_argument('--update', action='store_true',
+                            help='only add the symbols of the filings since the last update, from the daily indexes')
+    if arg_parser.parse_args().update:
+        update_symbols()
+    else:
+        get_all_symbols()
@@ -1,6 +1,6 @@
-from bs4 import BeautifulSoup
 from edgar.dtd import DTD
 from edgar.document_text import DocumentText
+from edgar.inline_xbrl import get_inline_xbrl_financial_report
 
 
 class Document:
@@ -36,3 +36,24 @@ class Document:
             print('document does not have xml, cannot determine symbol')
 
         return cik, symbol
+
+    def get_text(self):
+        '''
+        Returns the text of the document as is (e.g. its html), or None if it
+        has no text
+        '''
+        if self.doc_text.xml_text is not None:
+            # inline XBRL documents are wrapped in an XBRL element
+            return self.doc_text.xml_text
+        if isinstance(self.doc_text.data, str):
+            return self.doc_text.data
+        return None
+
+    def get_inline_xbrl_financial_report(self, company, date_filed, include_dimensions=False,
+                                         include_non_numeric=False):
+        '''
+        Returns a FinancialReport with the facts tagged in this document, which
+        must be an inline XBRL document, see edgar.inline_xbrl
+        '''
+        return get_inline_xbrl_financial_report(company, date_filed, self.get_text() or '', include_dimensions,
+                                                include_non_numeric)
@@ -1,5 +1,5 @@
-from bs4 import BeautifulSoup
 from edgar.dtd import DTD
+from edgar.instrumentation import stage, SOUP_STAGE
 
 # according to the EDGAR SGML specs, DOCUMENT.TEXT has the following children
 attrs = ['pdf', 'xml', 'xbrl', 'table', 'caption', 'stub', 'column', 'footnotes_section']
@@ -10,6 +10,8 @@ class DocumentText:
     Used to model a DOCUMENT.TEXT element within an EDGAR SGML
     '''
     dtd = DTD()
+    xml_text = None
+    _xml = None
 
     def __init__(self, data):
         '''
@@ -29,7 +31,21 @@ class DocumentText:
                 value = data[tag]
 
                 if attr == 'xml':
-                    # for everything else, we take the text as is
-                    value = BeautifulSoup(value, 'html.parser')
+                    # parsed on first use of xml, see below
+                    self.xml_text = value
+                    continue
 
+                # for everything else, we take the text as is
                 setattr(self, attr, value)
+
+    @property
+    def xml(self):
+        '''
+        BeautifulSoup of the XML element, parsed when first used since large
+        documents (e.g. XBRL instances) are often read with other parsers
+        '''
+        if self._xml is None and self.xml_text is not None:
+            from bs4 import BeautifulSoup
+            with stage(SOUP_STAGE):
+                self._xml = BeautifulSoup(self.xml_text, 'html.parser')
+        return self._xml
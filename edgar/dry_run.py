@@ -0,0 +1,194 @@
+'''
+Dry runs, to know how many requests and roughly how many bytes a backfill
+takes before running it
+
+Within a DryRun, the discovery APIs (e.g. Stock.get_filing,
+Stock.iter_filings(prefetch=0), Stock.plan_history, get_filing_info) run as
+usual, since they only download index data, and every index they read is
+recorded, including the quarters that get_filing goes back through. The
+filings they find are then added with add_filing or add_filing_infos, which
+records them as cache hits or misses without downloading them:
+
+    with DryRun(cache=cache) as dry_run:
+        stock = Stock('AAPL')
+        for year in range(2010, 2021):
+            dry_run.add_filing(stock.get_filing('annual', year), ['income_statements'])
+    dry_run.estimate_sizes()
+    print(dry_run)
+
+Anything else that tries to download a filing within the DryRun (e.g. a
+statement that is used) raises a DryRunException, after its url is recorded
+as a miss. The DryRun only listens to the context it is entered in, i.e. its
+thread and the work that thread hands off to the pools of the package (see
+edgar.instrumentation.listen), so downloads on other threads go ahead
+'''
+import json
+import random
+from edgar.edgar import FULL_INDEX_URL, DAILY_INDEX_URL, INDEX_JSON, get_accession_number
+from edgar.bulk import STATEMENT_KINDS
+from edgar.financials import DEFAULT_PARSER
+from edgar.instrumentation import Listener, listen, BYTES_DOWNLOADED
+from edgar.requests_wrapper import GetRequest
+
+# filings whose index.json is read by estimate_sizes
+DEFAULT_SAMPLE_SIZE = 20
+
+
+class DryRunException(Exception):
+    pass
+
+
+def is_index_url(url):
+    '''
+    Returns whether url is index data: a full or daily index, or an
+    index.json of a directory
+    '''
+    return url.startswith(FULL_INDEX_URL) or url.startswith(DAILY_INDEX_URL) or url.endswith('/' + INDEX_JSON)
+
+
+def get_filing_index_url(url):
+    '''
+    Returns the url of the index.json of the directory of the filing at url,
+    e.g. https://www.sec.gov/Archives/edgar/data/320193/000032019316000070/index.json
+    for https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000070.txt
+    '''
+    accession_number = get_accession_number(url)
+    directory = url.rsplit('/', 1)[0]
+    return '{}/{}/{}'.format(directory, accession_number.replace('-', ''), INDEX_JSON)
+
+
+def get_filing_size(index_json, accession_number):
+    '''
+    Returns the size in bytes of the filing given the index.json of its
+    directory: that of its complete submission text file, or else the sum of
+    the sizes of its files
+    '''
+    items = index_json['directory']['item']
+    sizes = {item['name']: int(item['size']) for item in items if str(item.get('size', '')).isdigit()}
+    return sizes.get(accession_number + '.txt', sum(sizes.values()))
+
+
+class DryRun(Listener):
+    '''
+    Records the requests of discovery APIs and the filings that would be
+    downloaded, see the module docstring
+    '''
+
+    def __init__(self, cache=None, requests_per_second=10):
+        '''
+        :param cache: optional edgar.cache.ResultCache that the filings would
+            be extracted with, filings whose statements are all in it are hits
+        :param requests_per_second: rate limit the filings would be fetched at
+        '''
+        self.cache = cache
+        self.requests_per_second = requests_per_second
+        # urls of the index data that was downloaded
+        self.index_urls = []
+        self.index_bytes = 0
+        # urls of the filings that would be downloaded (misses) or are read from the cache (hits)
+        self.misses = []
+        self.hits = []
+        # {url:size in bytes} of the misses whose size was read by estimate_sizes
+        self.sizes = {}
+        self.estimated_bytes = None
+        # whether requests are recorded through the listener
+        self.active = False
+        self._listening = None
+
+    def __enter__(self):
+        self._listening = listen(self)
+        self._listening.__enter__()
+        self.active = True
+        return self
+
+    def __exit__(self, *exc_info):
+        self._listening.__exit__(*exc_info)
+        self._listening = None
+        self.active = False
+        return False
+
+    def request(self, url):
+        if is_index_url(url):
+            self.index_urls.append(url)
+            return
+        self.misses.append(url)
+        raise DryRunException('{} would be downloaded'.format(url))
+
+    def count(self, name, value):
+        # only index data is downloaded during a dry run
+        if name == BYTES_DOWNLOADED:
+            self.index_bytes += value
+
+    def add_filing(self, filing, statements=STATEMENT_KINDS):
+        '''
+        Records the Filing (e.g. of Stock.get_filing), which isn't downloaded,
+        as a hit if the cache has all of its statements or else as a miss
+
+        :param statements: kinds of statements that would be extracted
+        '''
+        self._add(filing.url, statements, filing.company, filing.cache or self.cache, filing.parser)
+
+    def add_filing_infos(self, filing_infos, statements=STATEMENT_KINDS, company=None, parser=DEFAULT_PARSER,
+                         completed=()):
+        '''
+        Records the filings of filing_infos (e.g. of get_filing_info, for
+        edgar.bulk) as hits or misses, see add_filing
+
+        :param company: company of the filings' statements in the cache, by
+            default their cik
+        :param completed: accession numbers of filings to leave out, e.g.
+            edgar.bulk.read_checkpoint of the output directory of a bulk run
+        '''
+        completed = set(completed)
+        for filing_info in filing_infos:
+            if filing_info.accession_number in completed:
+                continue
+            self._add(filing_info.url, statements, company or filing_info.cik, self.cache, parser)
+
+    def _add(self, url, statements, company, cache, parser):
+        if cache is not None and all(cache.get_key(url, kind, parser, company) in cache for kind in statements):
+            self.hits.append(url)
+        else:
+            self.misses.append(url)
+
+    def estimate_sizes(self, sample_size=DEFAULT_SAMPLE_SIZE):
+        '''
+        Sets estimated_bytes, the bytes the misses would download, from the
+        sizes listed in the index.json of (up to) sample_size of them, picked
+        at random. These index.json requests are recorded as index data
+        '''
+        urls = list(dict.fromkeys(self.misses))
+        sample = [url for url in random.sample(urls, min(sample_size, len(urls))) if url not in self.sizes]
+        for url in sample:
+            index_url = get_filing_index_url(url)
+            response = GetRequest(index_url).response
+            if not self.active:
+                self.index_urls.append(index_url)
+                self.index_bytes += len(response.content)
+            self.sizes[url] = get_filing_size(json.loads(response.text), get_accession_number(url))
+
+        if self.sizes:
+            self.estimated_bytes = int(sum(self.sizes.values()) / len(self.sizes) * len(urls))
+        else:
+            self.estimated_bytes = 0
+        return self.estimated_bytes
+
+    @property
+    def request_count(self):
+        '''
+        Number of requests that the filings would take, one per miss
+        '''
+        return len(set(self.misses))
+
+    @property
+    def estimated_seconds(self):
+        '''
+        Seconds that the requests would take at requests_per_second, not
+        counting the time of the downloads themselves
+        '''
+        return self.request_count / self.requests_per_second
+
+    def __repr__(self):
+        return '[index_requests={0}, index_bytes={1}, hits={2}, misses={3}, estimated_bytes={4}, ' \
+               'estimated_seconds={5:.1f}]'.format(len(self.index_urls), self.index_bytes, len(set(self.hits)),
+                                                   self.request_count, self.estimated_bytes, self.estimated_seconds)
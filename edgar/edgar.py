@@ -30,6 +30,7 @@ import json
 import re
 from datetime import datetime
 import os
+import sys
 
 
 SYMBOLS_DATA_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data', 'symbols.csv')
@@ -45,6 +46,9 @@ EDGAR_MIN_YEAR = 1993
 
 ARCHIVES_URL = 'https://www.sec.gov/Archives/'
 FULL_INDEX_URL = ARCHIVES_URL+'edgar/full-index/'
+# daily indexes only list the filings of one day, e.g. daily-index/2019/QTR1/master.20190102.idx
+DAILY_INDEX_URL = ARCHIVES_URL+'edgar/daily-index/'
+DAILY_MASTER_IDX_REGEX = re.compile(r'master\.(\d{8})\.idx')
 INDEX_JSON = 'index.json'
 # company.idx gives us a list of all companies that filed in the period
 COMPANY_IDX = 'company.idx' # sorted by company name
@@ -53,6 +57,9 @@ MASTER_IDX = 'master.idx' # sorted by cik
 #CRAWLER_IDX = 'crawler.idx'
 #XBRL_IDX = 'xbrl.idx'
 
+# e.g. 0000320193-16-000070
+ACCESSION_NUMBER_REGEX = re.compile(r'(\d{10}-\d{2}-\d{6})')
+
 
 # don't need the following structures, commenting them just in case
 # class Directory():
@@ -74,20 +81,44 @@ MASTER_IDX = 'master.idx' # sorted by cik
 
 
 
+def _intern(value):
+    # only strings can be interned, other values (e.g. a cik given as an int, or None) are kept as they are
+    return sys.intern(value) if type(value) is str else value
+
+
 class FilingInfo:
     '''
     FilingInfo class will model crawler.idx filing information
     '''
+    # indexes have many filings, so they don't get a __dict__
+    __slots__ = ('company', 'form', 'cik', 'date_filed', 'url')
+
     def __init__(self, company, form, cik, date_filed, file):
-        self.company = company
-        self.form = form
-        self.cik = cik
-        self.date_filed = date_filed
+        # the same companies, forms, ciks and dates repeat across filings, so they're interned
+        self.company = _intern(company)
+        self.form = _intern(form)
+        self.cik = _intern(cik)
+        self.date_filed = _intern(date_filed)
         self.url = ARCHIVES_URL+file
 
+    @property
+    def accession_number(self):
+        return get_accession_number(self.url)
+
     def __repr__(self):
         return '[{0}, {1}, {2}, {3}, {4}]'.format(
             self.company, self.form, self.cik, self.date_filed, self.url)
+
+
+def get_accession_number(url):
+    '''
+    Returns the accession number (unique id of a filing) in the url of a
+    filing, e.g. 0000320193-16-000070 for
+    https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000070.txt,
+    or None if the url has none
+    '''
+    match = ACCESSION_NUMBER_REGEX.search(url)
+    return None if match is None else match.group(1)
         
 
 
@@ -269,6 +300,45 @@ def _get_filing_info(cik='', forms=[], year='', quarter=''):
 
 
 
+def get_daily_index_dates(year, quarter):
+    '''
+    Returns the dates (datetimes) that have a daily master index in the given
+    year and quarter (e.g. 2019 and 1), in order
+    '''
+    url = '{}{}/QTR{}/{}'.format(DAILY_INDEX_URL, year, quarter, INDEX_JSON)
+    items = json.loads(GetRequest(url).response.text)['directory']['item']
+
+    dates = []
+    for item in items:
+        match = DAILY_MASTER_IDX_REGEX.fullmatch(item['name'])
+        if match is not None:
+            dates.append(datetime.strptime(match.group(1), '%Y%m%d'))
+    return sorted(dates)
+
+
+def get_daily_filing_info(date, forms=[]):
+    '''
+    Returns a List of FilingInfo of the filings of the daily master index of
+    date (a datetime), i.e. of the filings made that day. If forms are
+    specified, only filings with the given value will be returned
+    '''
+    url = '{}{}/QTR{}/master.{}.idx'.format(DAILY_INDEX_URL, date.year, (date.month - 1) // 3 + 1,
+                                            date.strftime('%Y%m%d'))
+    rows = GetRequest(url).response.text.split('\n')
+
+    # the data rows come after the line of dashes under the header
+    start = next((index + 1 for index, row in enumerate(rows) if row.startswith('-----')), len(rows))
+
+    filing_infos = []
+    for row in rows[start:]:
+        data = row.split('|')
+        if len(data) == 5 and (forms == [] or data[2] in forms):
+            # daily indexes have YYYYMMDD dates, full indexes YYYY-MM-DD
+            date_filed = data[3] if '-' in data[3] else '{}-{}-{}'.format(data[3][:4], data[3][4:6], data[3][6:8])
+            filing_infos.append(FilingInfo(data[1], data[2], data[0], date_filed, data[4].strip()))
+    return filing_infos
+
+
 def get_financial_filing_info(period, cik, year='', quarter=''):
     if period not in FINANCIAL_FORM_MAP:
         raise KeyError('period must be either "annual" or "quarterly"')
@@ -0,0 +1,115 @@
+'''
+Exports FinancialReports as long (tidy) tables, with one row per financial
+element per period, to pandas, Arrow and Parquet
+
+The rows of all of the reports are written straight into one buffer per
+column, so exporting many reports (e.g. for cross-company analysis) doesn't
+build a dict or a DataFrame per element
+'''
+from array import array
+from numbers import Number
+from itertools import repeat
+import numpy as np
+import pandas as pd
+
+# columns of the exported tables, in order
+COLUMNS = ['company', 'date_filed', 'date', 'months', 'element', 'label', 'value']
+
+
+def _get_columns(financial_reports):
+    '''
+    Returns {column:values} for COLUMNS given financial_reports, where the
+    values of the value column are an array of doubles and those of the
+    other columns are lists. Elements with non-numeric values (e.g. inline
+    XBRL text facts) are left out
+
+    :param financial_reports: iterable of FinancialReport objects
+    '''
+    companies = []
+    dates_filed = []
+    dates = []
+    months = []
+    elements = []
+    labels = []
+    values = array('d')
+
+    for financial_report in financial_reports:
+        for financial_info in financial_report.reports:
+            row_count = len(elements)
+            for element, financial_element in financial_info.map.items():
+                value = financial_element.value
+                if isinstance(value, Number) and not isinstance(value, bool):
+                    elements.append(element)
+                    labels.append(financial_element.label)
+                    values.append(value)
+            row_count = len(elements) - row_count
+
+            companies.extend(repeat(financial_report.company, row_count))
+            dates_filed.extend(repeat(financial_report.date_filed, row_count))
+            dates.extend(repeat(financial_info.date, row_count))
+            months.extend(repeat(financial_info.months, row_count))
+
+    return {'company': companies, 'date_filed': dates_filed, 'date': dates, 'months': months,
+            'element': elements, 'label': labels, 'value': values}
+
+
+def reports_to_frame(financial_reports):
+    '''
+    Returns a pandas DataFrame with COLUMNS and one row per financial element
+    per period of financial_reports
+
+    :param financial_reports: iterable of FinancialReport objects
+    '''
+    columns = _get_columns(financial_reports)
+    return pd.DataFrame({
+        'company': columns['company'],
+        'date_filed': pd.to_datetime(columns['date_filed']),
+        'date': pd.to_datetime(columns['date']),
+        # balance sheets have no months
+        'months': pd.array(columns['months'], dtype='Int64'),
+        'element': columns['element'],
+        'label': columns['label'],
+        'value': np.frombuffer(columns['value'], dtype=np.float64),
+    }, columns=COLUMNS)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('Arrow and Parquet export require pyarrow, install it with "pip install pyarrow"') from None
+    return pyarrow
+
+
+def reports_to_table(financial_reports):
+    '''
+    Same as reports_to_frame, but returns a pyarrow Table. Requires the
+    optional pyarrow dependency
+
+    :param financial_reports: iterable of FinancialReport objects
+    '''
+    pa = _import_pyarrow()
+    columns = _get_columns(financial_reports)
+    return pa.table([
+        pa.array(columns['company'], pa.string()),
+        pa.array(columns['date_filed'], pa.timestamp('us')),
+        pa.array(columns['date'], pa.timestamp('us')),
+        pa.array(columns['months'], pa.int32()),
+        pa.array(columns['element'], pa.string()),
+        pa.array(columns['label'], pa.string()),
+        pa.array(np.frombuffer(columns['value'], dtype=np.float64), pa.float64()),
+    ], names=COLUMNS)
+
+
+def write_parquet(financial_reports, path, **kwargs):
+    '''
+    Writes the table of reports_to_table to a Parquet file at path. Requires
+    the optional pyarrow dependency
+
+    :param financial_reports: iterable of FinancialReport objects
+    :param kwargs: passed on to pyarrow.parquet.write_table, e.g. compression
+    '''
+    _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    pq.write_table(reports_to_table(financial_reports), path, **kwargs)
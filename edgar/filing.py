@@ -5,10 +5,23 @@ from edgar.requests_wrapper import GetRequest
 from edgar.document import Document
 from edgar.sgml import Sgml
 from edgar.dtd import DTD
-from edgar.financials import get_financial_report, get_old_financial_report
+from edgar.container import Container, write_container
+from edgar.financials import get_financial_report, get_old_financial_report, DEFAULT_PARSER, PARSERS
+from edgar.xbrl import get_xbrl_financial_report, XbrlParsingException, INSTANCE_DOCUMENT_TYPE, \
+    EXTRACTED_INSTANCE_SUFFIX, LABEL_DOCUMENT_TYPE
+from edgar.instrumentation import stage, count, SGML_STAGE, CACHE_HITS, CACHE_MISSES, DOCUMENTS
 from datetime import datetime
+import threading
 
 FILING_SUMMARY_FILE = 'FilingSummary.xml'
+# returned by the cache when it doesn't have a result, since results can be None
+CACHE_MISS = object()
+# types of the primary documents of annual and quarterly filings
+PERIODIC_REPORT_TYPES = ['10-K', '10-Q', '10-K/A', '10-Q/A']
+
+_process_pools_lock = threading.Lock()
+# {max_workers:ProcessPoolExecutor} shared by get_financial_data calls, so the worker processes are started once
+_process_pools = {}
 
 
 class Statements:
@@ -50,30 +63,90 @@ class Statements:
 
 class Filing:
     STATEMENTS = Statements()
-    sgml = None
 
-    def __init__(self, url, company=None):
+    def __init__(self, url, company=None, parser=DEFAULT_PARSER, cache=None):
+        '''
+        The filing is only fetched and parsed when its data is first used, so
+        that results found in the cache cost nothing
+
+        :param cache: optional edgar.cache.ResultCache of the statements
+        '''
         self.url = url
         # made this company instead of symbol since not all edgar companies are publicly traded
         self.company = company
+        # backend used to read the statement tables, see edgar.financials.PARSERS
+        if parser not in PARSERS:
+            raise ValueError('parser must be one of {}'.format(', '.join(PARSERS)))
+        self.parser = parser
+        self.cache = cache
 
-        response = GetRequest(url).response
-        text = response.text
+        self._text = None
+        self._sgml = None
+        self._documents = None
+        self._date_filed = None
+        # edgar.container.Container the filing was read from, if any
+        self.container = None
 
-        self.text = text
+    @classmethod
+    def from_text(cls, url, text, company=None, parser=DEFAULT_PARSER, cache=None):
+        '''
+        Returns the Filing at url given text, its SGML, that was already fetched
+        '''
+        filing = cls(url, company, parser, cache)
+        filing._parse(text)
+        return filing
+
+    @classmethod
+    def from_container(cls, path, company=None, parser=DEFAULT_PARSER, cache=None):
+        '''
+        Returns the Filing in the container file at path (see to_container),
+        without fetching or parsing its SGML. Its documents are read from the
+        memory-mapped file when first used; text and sgml are None
+        '''
+        container = Container(path)
+        filing = cls(container.url, company, parser, cache)
+        filing.container = container
+        filing._date_filed = container.date_filed
+        filing._documents = container.documents
+        return filing
+
+    def to_container(self, path):
+        '''
+        Writes the documents of the filing to a container file at path, so that
+        it can be reopened with from_container without parsing it again
+        '''
+        write_container(self, path)
+
+    def _load(self):
+        '''
+        Fetches and parses the SGML of the filing, if it hasn't been already
+        '''
+        if self._documents is not None:
+            return
+
+        response = GetRequest(self.url).response
+        self._parse(response.text)
+
+    def _parse(self, text):
+        '''
+        Parses text, the SGML of the filing
+        '''
+        self._text = text
 
         # print('Processing SGML at ' + url)
 
         dtd = DTD()
-        sgml = Sgml(text, dtd)
+        with stage(SGML_STAGE):
+            sgml = Sgml(text, dtd)
 
-        self.sgml = sgml
+            self._sgml = sgml
 
-        # {filename:Document}
-        self.documents = {}
-        for document_raw in sgml.map[dtd.sec_document.tag][dtd.document.tag]:
-            document = Document(document_raw)
-            self.documents[document.filename] = document
+            # {filename:Document}
+            documents = {}
+            for document_raw in sgml.map[dtd.sec_document.tag][dtd.document.tag]:
+                document = Document(document_raw)
+                documents[document.filename] = document
+        count(DOCUMENTS, len(documents))
         if dtd.acceptance_datetime.tag in sgml.map[dtd.sec_document.tag][dtd.sec_header.tag]:
             acceptance_datetime_element = sgml.map[dtd.sec_document.tag][dtd.sec_header.tag][
                 dtd.acceptance_datetime.tag]
@@ -83,47 +156,167 @@ class Filing:
             acceptance_datetime_text = acceptance_datetime_element.split("\n", maxsplit=1)[0].split(" : ")[1]
 
         # not concerned with time/timezones
-        self.date_filed = datetime.strptime(acceptance_datetime_text, '%Y%m%d')
+        self._date_filed = datetime.strptime(acceptance_datetime_text, '%Y%m%d')
+        self._documents = documents
+
+    @property
+    def text(self):
+        self._load()
+        return self._text
+
+    @property
+    def sgml(self):
+        self._load()
+        return self._sgml
+
+    @property
+    def documents(self):
+        self._load()
+        return self._documents
+
+    @property
+    def date_filed(self):
+        self._load()
+        return self._date_filed
+
+    def _get_cached(self, kind, get_result):
+        '''
+        Returns the result of kind (e.g. income_statements) from the cache if
+        it's there, otherwise returns get_result() after caching it
+        '''
+        if self.cache is None:
+            return get_result()
+
+        key = self.cache.get_key(self.url, kind, self.parser, self.company)
+        result = self.cache.get(key, CACHE_MISS)
+        if result is CACHE_MISS:
+            count(CACHE_MISSES)
+            result = get_result()
+            self.cache.put(key, result)
+        else:
+            count(CACHE_HITS)
+        return result
 
-    def get_financial_data(self):
+    def get_financial_data(self, max_workers=None, executor=None):
         '''
         This is mostly just for easy QA to return all financial statements
         in a given file, but the intended workflow is for he user to pick
         the specific statement they want (income, balance, cash flows)
+
+        Statements are returned in the order they appear in FilingSummary.xml
+
+        :param max_workers: if set, the statement tables are parsed
+            concurrently on a process pool with this many workers, which is
+            started by the first call and reused by the next ones
+        :param executor: optional concurrent.futures.Executor to parse the
+            statement tables on instead, e.g. a ProcessPoolExecutor shared
+            with other work
         '''
-        return self._get_financial_data(self.STATEMENTS.all_statements, True)
+        return self._get_cached('financial_data', lambda: self._get_financial_data(
+            self.STATEMENTS.all_statements, True, max_workers, executor))
 
-    def _get_financial_data(self, statement_short_names, get_all):
+    def _get_financial_data(self, statement_short_names, get_all, max_workers=None, executor=None):
         '''
         Returns financial data used for processing 10-Q and 10-K documents
         '''
+        # outside of the try, so that a failed download isn't retried by the fallback to the old format
+        self._load()
         financial_data = []
         try:
-            for names in self._get_statement(statement_short_names):
+            statement_names = self._get_statement(statement_short_names)
+
+            if get_all:
+                statement_names = self._sort_by_filing_summary(statement_names)
+        except Exception as e:
+            return self._get_old_financial_data(financial_data)
+
+        if get_all and (max_workers or executor) and len(statement_names) > 1:
+            # outside of the try, so that a failure of the executor reaches the caller rather than falling back
+            financial_data = self._get_financial_data_concurrently(statement_names, max_workers, executor)
+            return financial_data if financial_data is not None else self._get_old_financial_data([])
+
+        try:
+            for names in statement_names:
                 short_name = names[0]
                 filename = names[1]
                 # print('Getting financial data for {0} (filename: {1})'
                 #       .format(short_name, filename))
                 financial_html_text = self.documents[filename].doc_text.data
 
-                financial_report = get_financial_report(self.company, self.date_filed, financial_html_text)
+                financial_report = get_financial_report(self.company, self.date_filed, financial_html_text,
+                                                        self.parser)
 
                 if get_all:
                     financial_data.append(financial_report)
                 else:
                     return financial_report
         except Exception as e:
-            # parse old formatting
-            for filename in self.documents:
-                if self.documents[filename].type in ["10-K", "10-Q"]:
-                    financial_html_text = self.documents[filename].doc_text.data
-                    months = 12 if self.documents[filename].type == "10-K" else 3
-                    financial_report = get_old_financial_report(self.company, self.date_filed, financial_html_text,
-                                                                months=months)
-                    return [financial_report]
+            return self._get_old_financial_data(financial_data)
+
+        return financial_data
 
+    def _get_old_financial_data(self, financial_data):
+        '''
+        Returns the financial data of a filing in the old format, or
+        financial_data if it has no 10-K or 10-Q document
+        '''
+        # parse old formatting
+        for filename in self.documents:
+            if self.documents[filename].type in ["10-K", "10-Q"]:
+                financial_html_text = self.documents[filename].doc_text.data
+                months = 12 if self.documents[filename].type == "10-K" else 3
+                financial_report = get_old_financial_report(self.company, self.date_filed, financial_html_text,
+                                                            months=months)
+                return [financial_report]
         return financial_data
 
+    def _get_financial_data_concurrently(self, statement_names, max_workers, executor=None):
+        '''
+        Returns the FinancialReports of statement_names, parsing each statement
+        table as a task of executor, or else of the shared process pool of
+        max_workers. Results keep the order of statement_names. Returns None
+        if a statement table can't be parsed, like the tables that are parsed
+        one by one, but raises the errors of the executor (e.g. a
+        BrokenProcessPool, or a RuntimeError once it's shut down)
+        '''
+        from concurrent.futures import BrokenExecutor
+
+        financial_html_texts = [self.documents[filename].doc_text.data for _, filename in statement_names]
+
+        shared_executor = executor is None
+        if shared_executor:
+            executor = _get_process_pool(max_workers)
+        try:
+            futures = [executor.submit(get_financial_report, self.company, self.date_filed, financial_html_text,
+                                       self.parser) for financial_html_text in financial_html_texts]
+            financial_data = []
+            for future in futures:
+                try:
+                    financial_data.append(future.result())
+                except BrokenExecutor:
+                    raise
+                except Exception:
+                    for other_future in futures:
+                        other_future.cancel()
+                    return None
+            return financial_data
+        except BrokenExecutor:
+            # a worker process died, the next call starts a new pool
+            if shared_executor:
+                _discard_process_pool(max_workers, executor)
+            raise
+
+    def _sort_by_filing_summary(self, statement_names):
+        '''
+        Returns statement_names, a list of (short_name, filename) tuples, sorted
+        by the position of their Report in FilingSummary.xml
+        '''
+        filing_summary_xml = self.documents[FILING_SUMMARY_FILE].doc_text.xml
+        positions = {html_file_name.get_text(): position
+                     for position, html_file_name in enumerate(filing_summary_xml.find_all('htmlfilename'))}
+
+        return sorted(statement_names, key=lambda names: positions.get(names[1], len(positions)))
+
     def _get_statement(self, statement_short_names):
         '''
         Return a list of tuples of (short_names, filenames) for
@@ -175,11 +368,69 @@ class Filing:
         # print(f'could not find anything for ShortName {report_short_name.lower()}')
         return None
 
+    def get_xbrl_financial_data(self, include_dimensions=False):
+        '''
+        Returns a FinancialReport with every numeric fact of the filing's XBRL
+        instance document, with one FinancialInfo per period. This reads the
+        facts directly, so it is much faster than the statements rendered in
+        the R*.htm reports and has the exact values and units of the filing,
+        but it isn't split into statements. Filings without an instance
+        document are read from the facts tagged in their primary (inline
+        XBRL) document
+
+        :param include_dimensions: whether to include facts that are broken
+            down by dimensions (e.g. by segment), see edgar.xbrl._process_facts
+        '''
+        instance_document = self._get_document(lambda document: document.type == INSTANCE_DOCUMENT_TYPE) or \
+            self._get_document(lambda document: document.filename.endswith(EXTRACTED_INSTANCE_SUFFIX))
+        if instance_document is None or instance_document.doc_text.xml_text is None:
+            # the facts may still be tagged in the primary (inline XBRL) document
+            primary_document = self._get_document(lambda document: document.type in PERIODIC_REPORT_TYPES)
+            if primary_document is None:
+                raise XbrlParsingException('{} has no XBRL instance document'.format(self.url))
+            return primary_document.get_inline_xbrl_financial_report(self.company, self.date_filed,
+                                                                     include_dimensions)
+
+        label_document = self._get_document(lambda document: document.type == LABEL_DOCUMENT_TYPE)
+        label_xml_text = None if label_document is None else label_document.doc_text.xml_text
+
+        return get_xbrl_financial_report(self.company, self.date_filed, instance_document.doc_text.xml_text,
+                                         label_xml_text, include_dimensions)
+
+    def _get_document(self, matches):
+        '''
+        Returns the first Document for which matches(document) is True, or None
+        '''
+        return next((document for document in self.documents.values() if matches(document)), None)
+
     def get_income_statements(self):
-        return self._get_financial_data(self.STATEMENTS.income_statements, False)
+        return self._get_cached('income_statements', lambda: self._get_financial_data(
+            self.STATEMENTS.income_statements, False))
 
     def get_balance_sheets(self):
-        return self._get_financial_data(self.STATEMENTS.balance_sheets, False)
+        return self._get_cached('balance_sheets', lambda: self._get_financial_data(
+            self.STATEMENTS.balance_sheets, False))
 
     def get_cash_flows(self):
-        return self._get_financial_data(self.STATEMENTS.cash_flows, False)
+        return self._get_cached('cash_flows', lambda: self._get_financial_data(
+            self.STATEMENTS.cash_flows, False))
+
+
+def _get_process_pool(max_workers):
+    '''
+    Returns the shared ProcessPoolExecutor of max_workers, started on first use
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _process_pools_lock:
+        executor = _process_pools.get(max_workers)
+        if executor is None:
+            executor = _process_pools[max_workers] = ProcessPoolExecutor(max_workers=max_workers)
+        return executor
+
+
+def _discard_process_pool(max_workers, executor):
+    with _process_pools_lock:
+        if _process_pools.get(max_workers) is executor:
+            del _process_pools[max_workers]
+    executor.shutdown(wait=False)
@@ -2,11 +2,34 @@
 Handles financial logic
 '''
 import re
-from bs4 import BeautifulSoup
+import sys
+from bisect import bisect_left
 from json import JSONEncoder
 from datetime import datetime
-import pandas as pd
-from word2number import w2n
+from edgar.html_text import extract_text
+from edgar.instrumentation import stage, STATEMENTS_STAGE
+
+
+def get_attributes(o):
+    '''
+    Returns {attribute:value} of o, whether its attributes are in __slots__
+    (including those of its base classes) or in __dict__
+    '''
+    attributes = {}
+    for cls in reversed(type(o).__mro__):
+        for slot in getattr(cls, '__slots__', ()):
+            if hasattr(o, slot):
+                attributes[slot] = getattr(o, slot)
+    attributes.update(getattr(o, '__dict__', {}))
+    return attributes
+
+
+def _intern(text):
+    '''
+    Returns the interned text, so that the same names and labels in different
+    periods, reports and filings share a single string
+    '''
+    return sys.intern(text) if type(text) is str else text
 
 
 class FinancialReportEncoder(JSONEncoder):
@@ -14,20 +37,22 @@ class FinancialReportEncoder(JSONEncoder):
     def default(self, o):
         if isinstance(o, datetime):
             return o.isoformat()
-        return o.__dict__
+        return get_attributes(o)
 
 
 class FinancialElement:
     '''
     Models financial elements
     '''
+    # there are many elements per report, so they don't get a __dict__
+    __slots__ = ('label', 'value')
 
     def __init__(self, label, value):
-        self.label = label
+        self.label = _intern(label)
         self.value = value
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str(get_attributes(self))
 
 
 class FinancialInfo:
@@ -35,6 +60,7 @@ class FinancialInfo:
     Models financial data provided in a financial report
     financial elements are stored in a map to retain flexibility
     '''
+    __slots__ = ('date', 'months', 'map')
 
     def __init__(self, date, months, map):
         '''
@@ -47,7 +73,7 @@ class FinancialInfo:
         self.map = map
 
     def __repr__(self):
-        return str(self.__dict__)
+        return str(get_attributes(self))
 
 
 class FinancialReport:
@@ -55,8 +81,9 @@ class FinancialReport:
     Models financial reports from an edgar filing
     financial elements are stored in a map to retain flexibility
     '''
+    __slots__ = ('company', 'date_filed', 'reports')
 
-    def __init__(self, company, date_filed, reports=[]):
+    def __init__(self, company, date_filed, reports=None):
         '''
         :param company: identifier for a company (not using the term "symbol"
             because not all companies that file on edgar are publicly traded)
@@ -64,19 +91,32 @@ class FinancialReport:
         '''
         self.company = company
         self.date_filed = date_filed
-        self.reports = reports
+        self.reports = [] if reports is None else reports
 
     def add_financial_info(self, financial_info: FinancialInfo):
         self.reports.append(financial_info)
 
+    def to_frame(self):
+        '''
+        Returns a pandas DataFrame with one row per financial element per
+        period, see edgar.export.reports_to_frame
+        '''
+        from edgar.export import reports_to_frame
+        return reports_to_frame([self])
+
     def __repr__(self):
-        return str(self.__dict__)
+        return str(get_attributes(self))
 
 
 class MetaDataParsingException(Exception):
     pass
 
 
+# BeautifulSoup's html.parser is always available, lxml is an optional (faster)
+# alternative; see PARSERS for all of the supported backends
+DEFAULT_PARSER = 'html.parser'
+
+
 # https://pypi.org/project/python-xbrl/
 
 '''
@@ -115,6 +155,32 @@ The next part differs based on 10-K and 10-Q
 '''
 
 
+class LineItems(list):
+    '''
+    The lines of a pre-XBRL financial statement, with an index of the
+    positions of each line so that labels can be found without scanning the
+    statement. Must not be modified once created
+    '''
+
+    def __init__(self, lines):
+        super().__init__(lines)
+        # {line:[positions]}, positions in ascending order
+        self.positions = {}
+        for position, line in enumerate(self):
+            self.positions.setdefault(line, []).append(position)
+
+    def index(self, line, start=0, end=None):
+        '''
+        Same as list.index, returns the position of the first line equal to
+        line at or after start (and before end)
+        '''
+        positions = self.positions.get(line, [])
+        i = bisect_left(positions, start)
+        if i < len(positions) and (end is None or positions[i] < end):
+            return positions[i]
+        raise ValueError('{} is not in list'.format(line))
+
+
 def get_units_date_items(text):
     units = re.findall(r"(?:(?:I|i)n(?:[\s\n])?([A-Za-z]+))", text, re.MULTILINE)[0]
     try:
@@ -124,17 +190,23 @@ def get_units_date_items(text):
             raise
     except:
         dates = [datetime.strptime(date, "%B %d,%Y") for date in re.findall(r"\w+\s\d{1,2},\d{4}", text)][:1]
-    items = [i.strip() for i in text.split("\n") if (i.strip() != "" and i.strip() != "$")]
+    items = LineItems(line for line in (i.strip() for i in text.split("\n")) if line != "" and line != "$")
     return dates, items, units, text
 
 
+def _get_items_before_notes(items):
+    '''
+    Returns the LineItems items up until the first "See Note" reference
+    '''
+    for position, item in enumerate(items):
+        if "See Note" in item:
+            return items[:position]
+    return items
+
+
 def _get_balance_sheet(text, months=12):
     dates, items, units, changed_text = get_units_date_items(text)
-    extra = [item for item in items if "See Note" in item]
-    if len(extra) > 0:
-        maybe_relevant_items = items[:items.index(extra[0])]
-    else:
-        maybe_relevant_items = items
+    maybe_relevant_items = _get_items_before_notes(items)
     maybe_relevant_items = [item for item in maybe_relevant_items if
                             not item.isupper() and item[0].isupper()]
     maybe_relevant_items = maybe_relevant_items[maybe_relevant_items.index('Current assets:'):]
@@ -164,11 +236,7 @@ def _get_balance_sheet(text, months=12):
 
 def _get_cash_flow(text, months=12):
     dates, items, units, changed_text = get_units_date_items(text)
-    extra = [item for item in items if "See Note" in item]
-    if len(extra) > 0:
-        maybe_relevant_items = items[:items.index(extra[0])]
-    else:
-        maybe_relevant_items = items
+    maybe_relevant_items = _get_items_before_notes(items)
     maybe_relevant_items = [item for item in maybe_relevant_items if
                             not item.isupper() and item[0].isupper()]
     if 'Cash and cash equivalents, beginning of the period' in maybe_relevant_items:
@@ -203,11 +271,7 @@ def _get_cash_flow(text, months=12):
 
 def _get_income_statement(text, months=12):
     dates, items, units, changed_text = get_units_date_items(text)
-    extra = [item for item in items if "See Note" in item]
-    if len(extra) > 0:
-        maybe_relevant_items = items[:items.index(extra[0])]
-    else:
-        maybe_relevant_items = items
+    maybe_relevant_items = _get_items_before_notes(items)
     maybe_relevant_items = [item for item in maybe_relevant_items if
                             not item.isupper() and item[0].isupper() and item != "Basic" and item != "Diluted"]
     relevant_items = maybe_relevant_items[maybe_relevant_items.index('Net sales'):]
@@ -225,8 +289,8 @@ def _get_income_statement(text, months=12):
         item_index = items.index(item)
         if items[item_index + 1] == "Basic":
             clean_item = item.strip(":")
-            base_index = items[item_index:].index("Basic")
-            diluted_index = items[item_index:].index("Diluted")
+            base_index = items.index("Basic", item_index) - item_index
+            diluted_index = items.index("Diluted", item_index) - item_index
             base_value = items[item_index + base_index + 1:item_index + base_index + 1 + len(dates)][0]
             diluted_value = items[item_index + diluted_index + 1:item_index + diluted_index + 1 + len(dates)][0]
             adjusted_units = "thousands" if "per share" in clean_item else units
@@ -250,29 +314,83 @@ def _get_income_statement(text, months=12):
     return FinancialInfo(dates[0], months, {key: FinancialElement(key, val) for key, val in data.items()})
 
 
+# substitutions applied, in order, to the text of pre-XBRL filings to put each
+# label and value of their financial statements on its own line
+OLD_REPORT_TEXT_SUBSTITUTIONS = [
+    (re.compile('\xa0'), ' '),  # non-breaking spaces
+    (re.compile(r'\n+\)'), ')'),  # closing bracket of a negative value in its own cell
+    (re.compile(r"' '"), ' '),
+    (re.compile(r' +'), ' '),
+    (re.compile('’'), ''),
+    (re.compile(r',\n'), ','),  # numbers and labels wrapped after a comma
+    (re.compile(r'\w\n\s\w'), lambda match: match.group(0).replace('\n', '')),  # labels wrapped mid-sentence
+    # lines wrapped over two lines; anchored at the start of the line so that failed matches aren't retried mid-line
+    (re.compile(r'^([^\w\n]*\w[^\n]*)\n([^\n]*\w)', re.MULTILINE), r'\1\2'),
+]
+
+
+def _normalize_old_report_text(report_text):
+    '''
+    Returns report_text, the text of a pre-XBRL filing, after applying
+    OLD_REPORT_TEXT_SUBSTITUTIONS. Each substitution is a single pass over the
+    text, so this is linear in the size of the document
+    '''
+    for regex, replacement in OLD_REPORT_TEXT_SUBSTITUTIONS:
+        report_text = regex.sub(replacement, report_text)
+    return report_text
+
+
+# headings of the statements of operations, balance sheets, and statements of
+# cash flows in pre-XBRL filings; each statement ends at the next "See" (note)
+OLD_STATEMENTS_OF_OPERATIONS_HEADING = "STATEMENTS ?OF ?OPERATIONS"
+OLD_BALANCE_SHEETS_HEADING = "BALANCE ?SHEETS"
+OLD_STATEMENTS_OF_CASH_FLOW_HEADING = "STATEMENTS ?OF ?CASH ?FLOW"
+OLD_STATEMENT_HEADINGS = [OLD_STATEMENTS_OF_OPERATIONS_HEADING, OLD_BALANCE_SHEETS_HEADING,
+                          OLD_STATEMENTS_OF_CASH_FLOW_HEADING]
+
+
+class OldStatementsRead:
+    '''
+    Stop condition for edgar.html_text.extract_text that is True once the
+    text read so far has every one of OLD_STATEMENT_HEADINGS followed by a
+    "See", i.e. once all of the statements have been read
+    '''
+    # characters kept between chunks, enough for a heading split across chunks
+    OVERLAP = 64
+
+    def __init__(self):
+        self.headings = [re.compile(heading) for heading in OLD_STATEMENT_HEADINGS]
+        # end of the first match of each heading, relative to the start of all the text
+        self.heading_ends = [None] * len(self.headings)
+        self.statement_ends_found = [False] * len(self.headings)
+        self.tail = ''
+        self.tail_start = 0
+
+    def __call__(self, text):
+        window = self.tail + text
+
+        for i, heading in enumerate(self.headings):
+            if self.heading_ends[i] is None:
+                match = heading.search(window)
+                if match is not None:
+                    self.heading_ends[i] = self.tail_start + match.end()
+            if self.heading_ends[i] is not None and not self.statement_ends_found[i]:
+                self.statement_ends_found[i] = window.find("See", max(self.heading_ends[i] - self.tail_start, 0)) >= 0
+
+        self.tail = window[-self.OVERLAP:]
+        self.tail_start += len(window) - len(self.tail)
+        return all(self.statement_ends_found)
+
+
 def _process_old_financial_info(financial_html_text, months=12):
-    try:
-        source_soup = BeautifulSoup(financial_html_text, 'html.parser')
-    except:
-        pass
-    nonBreakSpace = u'\xa0'
-    report_text = source_soup.text.replace(nonBreakSpace, " ")
-    report_text = re.sub(f"\n+\)", ")", report_text)
-    report_text = report_text.replace('\' \'', " ")
-    report_text = re.sub(r" +", " ", report_text)
-    report_text = report_text.replace("’", "")
-    report_text = re.sub(r",\n", ",", report_text)
-    for f in re.findall(r"\w\n\s\w", report_text):
-        report_text = report_text.replace(f, f.replace("\n", ""))
-    for f in re.findall(r"\w+.*\n.*\w+", report_text):
-        report_text = report_text.replace(f, f.replace("\n", ""))
-    soo_start = report_text.find(re.findall("STATEMENTS ?OF ?OPERATIONS", report_text)[0])
+    report_text = _normalize_old_report_text(extract_text(financial_html_text, stop=OldStatementsRead()))
+    soo_start = report_text.find(re.findall(OLD_STATEMENTS_OF_OPERATIONS_HEADING, report_text)[0])
     soo_end = report_text[soo_start:].find("See")
     soo_text = report_text[soo_start:soo_start + soo_end]
-    bs_start = report_text.find(re.findall("BALANCE ?SHEETS", report_text)[0])
+    bs_start = report_text.find(re.findall(OLD_BALANCE_SHEETS_HEADING, report_text)[0])
     bs_end = report_text[bs_start:].find("See")
     bs_text = report_text[bs_start:bs_start + bs_end]
-    socf_start = report_text.find(re.findall("STATEMENTS ?OF ?CASH ?FLOW", report_text)[0])
+    socf_start = report_text.find(re.findall(OLD_STATEMENTS_OF_CASH_FLOW_HEADING, report_text)[0])
     socf_end = report_text[socf_start:].find("See")
     if socf_end < 0:
         match = next(re.finditer(r"\n+\d+[\n\s]+[A-Z]{2,}", report_text[socf_start:]))
@@ -284,18 +402,20 @@ def _process_old_financial_info(financial_html_text, months=12):
     income_statement_info = _get_income_statement(soo_text, months)
     numbers = re.findall(r"(\w+) Months Ended", socf_text, re.IGNORECASE)
     if len(numbers) > 0:
+        from word2number import w2n
         months = w2n.word_to_num(numbers[0])
     cash_flow_info = _get_cash_flow(socf_text, months)
     return [balance_sheet_info, income_statement_info, cash_flow_info]
 
 
 def get_old_financial_report(company, date_filed, financial_html_text, months=12):
-    financial_info = _process_old_financial_info(financial_html_text, months)
+    with stage(STATEMENTS_STAGE):
+        financial_info = _process_old_financial_info(financial_html_text, months)
     financial_report = FinancialReport(company, date_filed, financial_info)
     return financial_report
 
 
-def get_financial_report(company, date_filed, financial_html_text):
+def get_financial_report(company, date_filed, financial_html_text, parser=DEFAULT_PARSER):
     '''
     Returns a FinancialReport from html-structured financial data
     
@@ -304,26 +424,30 @@ def get_financial_report(company, date_filed, financial_html_text):
     :param date_filed: datetime representing ACCEPTANCE-DATETIME of Filing
     :param financial_html_text: html-structured financial data from an annual
         or quarterly Edgar filing
+    :param parser: backend used to read the html table, one of PARSERS
     '''
-    financial_info = _process_financial_info(financial_html_text)
+    with stage(STATEMENTS_STAGE):
+        financial_info = _process_financial_info(financial_html_text, parser)
     financial_report = FinancialReport(company, date_filed, financial_info)
     return financial_report
 
 
-def _process_financial_info(financial_html_text):
+def _process_financial_info(financial_html_text, parser=DEFAULT_PARSER):
     '''
     Return a list of FinancialInfo objects from html-structured financial data
     
     :param financial_html_text: html-structured financial data from an annual
         or quarterly Edgar filing
+    :param parser: backend used to read the html table, one of PARSERS
     '''
-    source_soup = BeautifulSoup(financial_html_text, 'html.parser')
-    report = source_soup.find('table', {'class': 'report'})
-    rows = report.find_all('tr')
+    if parser not in PARSERS:
+        raise ValueError('parser must be one of {}'.format(', '.join(PARSERS)))
+
+    header_rows, data_rows = PARSERS[parser](financial_html_text)
 
     financial_info = []
 
-    dates, period_units, unit_text = _get_statement_meta_data(rows)
+    dates, period_units, unit_text = _get_statement_meta_data(header_rows)
 
     for i, date in enumerate(dates):
         dt = datetime.strptime(date, '%b. %d, %Y')
@@ -335,56 +459,54 @@ def _process_financial_info(financial_html_text):
         ('us-gaap_GrossProfit', 'Gross margin'): "Gross margin"
     }
 
-    for row_num, row in enumerate(rows):
-        data = row.find_all('td')
+    # numeric cells are collected as (index, xbrl_element, label, info_text)
+    # and their values are processed all at once for the whole table
+    numeric_cells = []
 
+    for row_num, data in enumerate(data_rows):
         xbrl_element = None
         label = None
         numeric_data_available = False
 
-        for index, info in enumerate(data):
-            info_text = info.get_text().strip()
-
-            class_list = None
-            try:
+        for index, (class_list, info_text, row_xbrl_element) in enumerate(data):
+            if class_list is None:
                 # handle cases where the row is just a separator or something
-                class_list = info.attrs['class']
-            except KeyError as e:
-                # print('KeyError {} from below table data, moving along'.format(e))
-                # print(info)
                 continue
 
-            processed_financial_value = None
-
             if 'pl' in class_list:
                 # pl class indicates the td is the financial label
-                xbrl_element = _process_xbrl_element(info)
+                xbrl_element = row_xbrl_element
                 # print(xbrl_element)
                 label = info_text
 
             elif 'nump' in class_list or 'num' in class_list:
                 # nump class indicates td, and so more generally, the row, has numeric data
                 numeric_data_available = True
-                processed_financial_value = _process_financial_value(info_text, xbrl_element, unit_text)
+                numeric_cells.append((index, xbrl_element, label, info_text))
 
             elif 'text' in class_list:
                 if numeric_data_available:
                     # this corner case occurs when a given element appears sparsely (e.g. not collected in every period)
-                    processed_financial_value = _process_financial_value(info_text, xbrl_element, unit_text)
+                    numeric_cells.append((index, xbrl_element, label, info_text))
                 # else:
                 # 	# super label (abstract - no financial data)
                 # 	print(xbrl_element)
 
-            if processed_financial_value is not None:
-                # print(index)
-                if index - 1 not in range(len(financial_info)):
-                    print('index-1 {} is too big to capture {}'.format(index - 1, processed_financial_value))
-                financial_info_map = financial_info[index - 1].map
+    processed_financial_values = _process_financial_values(
+        [cell[3] for cell in numeric_cells], [cell[1] for cell in numeric_cells], unit_text)
+
+    for (index, xbrl_element, label, _), processed_financial_value in zip(numeric_cells,
+                                                                          processed_financial_values):
+        if processed_financial_value is not None:
+            # print(index)
+            if index - 1 not in range(len(financial_info)):
+                print('index-1 {} is too big to capture {}'.format(index - 1, processed_financial_value))
+            financial_info_map = financial_info[index - 1].map
 
-                if xbrl_element not in financial_info_map:
-                    # handles adjustment details
-                    # e.g. https://www.sec.gov/Archives/edgar/data/867773/0000867773-18-000082.txt
-                    financial_info_map[xbrl_element] = FinancialElement(label, processed_financial_value)
+            if xbrl_element not in financial_info_map:
+                # handles adjustment details
+                # e.g. https://www.sec.gov/Archives/edgar/data/867773/0000867773-18-000082.txt
+                financial_info_map[_intern(xbrl_element)] = FinancialElement(label, processed_financial_value)
 
     # clean reports
     # colspans sometimes cause duplicate reports with empty maps
@@ -395,11 +517,107 @@ def _process_financial_info(financial_html_text):
     return financial_info
 
 
-def _get_statement_meta_data(rows):
+def _read_report_table_soup(financial_html_text):
     '''
-    Returns the dates, period_units, unit_text given the html table rows of a
+    Returns the header_rows and data_rows of the report table in
+    financial_html_text, read with BeautifulSoup's html.parser
+
+    :return: tuple of:
+        header_rows - for the first two rows of the table, a list of
+            (class_list, colspan, info_text, title_parts) tuples, one per th
+        data_rows - for every row of the table, a list of
+            (class_list, info_text, xbrl_element) tuples, one per td
+    '''
+    from bs4 import BeautifulSoup
+
+    source_soup = BeautifulSoup(financial_html_text, 'html.parser')
+    report = source_soup.find('table', {'class': 'report'})
+    rows = report.find_all('tr')
+
+    header_rows = []
+    for row_num, row in enumerate(rows[:2]):
+        header_row = []
+        for info in row.find_all('th'):
+            class_list = info.attrs['class']
+            title_parts = None
+            if row_num == 0 and 'tl' in class_list:
+                title_parts = info.find('div').get_text('|', strip=True).split('|')
+            header_row.append((class_list, info.attrs.get('colspan'), info.get_text().replace('\n', ''),
+                               title_parts))
+        header_rows.append(header_row)
+
+    data_rows = []
+    for row in rows:
+        data_row = []
+        for info in row.find_all('td'):
+            class_list = info.attrs.get('class')
+            xbrl_element = None
+            if class_list is not None and 'pl' in class_list:
+                xbrl_element = _process_xbrl_element(info)
+            data_row.append((class_list, info.get_text().strip(), xbrl_element))
+        data_rows.append(data_row)
+
+    return header_rows, data_rows
+
+
+def _read_report_table_lxml(financial_html_text):
+    '''
+    Same as _read_report_table_soup, but reads the report table with lxml in
+    a single pass over its rows. Requires the optional lxml dependency
+    '''
+    try:
+        from lxml import html
+    except ImportError:
+        raise ImportError('the lxml parser requires lxml, install it with "pip install lxml"') from None
+
+    source_tree = html.fromstring(financial_html_text)
+    report = next(iter(source_tree.xpath(
+        '//table[contains(concat(" ", normalize-space(@class), " "), " report ")]')), None)
+    rows = report.xpath('.//tr')
+
+    header_rows = []
+    data_rows = []
+    for row_num, row in enumerate(rows):
+        if row_num < 2:
+            header_row = []
+            for info in row.xpath('.//th'):
+                class_list = info.attrib['class'].split()
+                title_parts = None
+                if row_num == 0 and 'tl' in class_list:
+                    div = info.find('.//div')
+                    title_parts = '|'.join(
+                        text.strip() for text in div.itertext() if text.strip()).split('|')
+                header_row.append((class_list, info.get('colspan'), ''.join(info.itertext()).replace('\n', ''),
+                                   title_parts))
+            header_rows.append(header_row)
+
+        data_row = []
+        for info in row.xpath('.//td'):
+            class_attr = info.get('class')
+            class_list = None if class_attr is None else class_attr.split()
+            xbrl_element = None
+            if class_list is not None and 'pl' in class_list:
+                anchor = info.find('.//a')
+                xbrl_element = _get_xbrl_element_name(anchor.attrib['onclick'])
+            data_row.append((class_list, ''.join(info.itertext()).strip(), xbrl_element))
+        data_rows.append(data_row)
+
+    return header_rows, data_rows
+
+
+# backends that can be used to read the report table of a financial statement
+PARSERS = {
+    'html.parser': _read_report_table_soup,
+    'lxml': _read_report_table_lxml,
+}
+
+
+def _get_statement_meta_data(header_rows):
+    '''
+    Returns the dates, period_units, unit_text given the header rows of a
     financial statement filing
 
+    :param header_rows: header rows as returned by one of the PARSERS
     :return: tuple of:
         dates - list of the different dates of the filing,
         period_units - list of the period (in months) that each date covers,
@@ -414,26 +632,20 @@ def _get_statement_meta_data(rows):
     title_repeat = 0
 
     # all the meta data we need is in the first two tables rows
-    for row_num, row in enumerate(rows[:2]):
+    for row_num, data in enumerate(header_rows[:2]):
         # meta data comes from the table headers
-        data = row.find_all('th')
-
-        for index, info in enumerate(data):
-            info_text = info.get_text().replace('\n', '')
+        for index, (class_list, colspan, info_text, title_parts) in enumerate(data):
 
-            class_list = info.attrs['class']
-
-            repeat = 1 if 'colspan' not in info.attrs else int(info.attrs['colspan'])
+            repeat = 1 if colspan is None else int(colspan)
 
             if row_num == 0:
 
                 if 'tl' in class_list:
                     # first col is for xbrl_element, so we're concerned if it has a colspan greater than 1
                     # so that we can determine our table structure
-                    title_repeat = 0 if 'colspan' not in info.attrs or int(info.attrs['colspan']) == 1 else int(
-                        info.attrs['colspan']) - 1
+                    title_repeat = 0 if colspan is None or int(colspan) == 1 else int(colspan) - 1
                     # first th with tl class has title and unit specification
-                    info_list = info.find('div').get_text('|', strip=True).split('|')
+                    info_list = title_parts
                     # e.g. shares in Thousands, $ in Millions
                     unit_text = info_list[1]
                     # e.g. CONSOLIDATED STATEMENTS OF INCOME - USD ($)
@@ -500,6 +712,15 @@ def _process_xbrl_element(info):
     # us-gaap namespace element is in the onclick of the anchor tag
     anchor = info.find('a')
     onclick_attr = anchor.attrs['onclick']
+
+    return _get_xbrl_element_name(onclick_attr)
+
+
+def _get_xbrl_element_name(onclick_attr):
+    '''
+    Returns <xbrl_name> given an onclick attribute of the form:
+        top.Show.showAR( this, 'defref_<xbrl_name>', window );
+    '''
     # strip javascript
     xbrl_element = onclick_attr.replace(
         'top.Show.showAR( this, \'defref_', ''
@@ -508,42 +729,88 @@ def _process_xbrl_element(info):
     return xbrl_element
 
 
-def _process_financial_value(text, xbrl_element, unit_text):
+# separates the cell texts of a table so that they can be cleaned in one pass
+CELL_SEPARATOR = '\x00'
+NON_NUMERIC_REGEX = re.compile('[^0-9\\.' + CELL_SEPARATOR + ']')
+
+UNIT_MULTIPLIERS = [('billions', 1000000000), ('millions', 1000000), ('thousands', 1000)]
+
+
+def _get_unit_multipliers(unit_text):
     '''
-    Returns float representation of text after stripping special characters
+    Returns a tuple of the multipliers for shares and for dollars given
+    unit_text, e.g. (1000, 1000000) for "shares in Thousands, $ in Millions"
 
-    :param text: the monetary value, which if in brackets, is negative
-    :param xbrl_element: text of html element that contains xbrl info
-        for the value of the text (i.e. the context)
     :param unit_text: text of the form "x in y" where
         x is either "shares" or "$"
         y is either "thousands", "millions", or "billions"
     '''
-    is_negative = True if '(' in text else False
+    unit_text = unit_text.lower()
+
+    shares_multiplier = 1
+    dollars_multiplier = 1
+    for units, multiplier in reversed(UNIT_MULTIPLIERS):
+        # going from smallest to largest, so the largest units win
+        if 'shares in ' + units in unit_text:
+            shares_multiplier = multiplier
+        if '$ in ' + units in unit_text:
+            dollars_multiplier = multiplier
+
+    return shares_multiplier, dollars_multiplier
+
+
+def _process_financial_values(texts, xbrl_elements, unit_text):
+    '''
+    Returns a list with the float representation of each of texts after
+    stripping special characters, or None where a text is not numeric.
+    All of the texts are converted together and scaled by their units
+
+    :param texts: the monetary values, which if in brackets, are negative
+    :param xbrl_elements: for each of texts, the xbrl element of the value
+        (i.e. the context)
+    :param unit_text: text of the form "x in y" where
+        x is either "shares" or "$"
+        y is either "thousands", "millions", or "billions"
+    '''
+    if not texts:
+        return []
+    import numpy as np
+
     # strip special characters
-    amount_text = re.sub('[^0-9\\.]', '', text)
-    value = None
+    amount_texts = np.array(NON_NUMERIC_REGEX.sub('', CELL_SEPARATOR.join(texts)).split(CELL_SEPARATOR))
+    # only digits and dots are left, so a text is numeric if it has a digit and at most one dot
+    dot_counts = np.char.count(amount_texts, '.')
+    is_numeric = (dot_counts <= 1) & (np.char.str_len(amount_texts) > dot_counts)
+
+    amounts = np.zeros(len(texts))
+    amounts[is_numeric] = amount_texts[is_numeric].astype(np.float64)
+    is_negative = np.char.find(np.array(texts), '(') >= 0
+
+    # handle units, which only depend on the xbrl element once the table's units are known
+    element_multipliers = {}
+    unit_multipliers = None
+    for xbrl_element in xbrl_elements:
+        if xbrl_element in element_multipliers:
+            continue
+        if 'PerShare' in xbrl_element:
+            element_multipliers[xbrl_element] = 1  # no change
+            continue
+        if unit_multipliers is None:
+            unit_multipliers = _get_unit_multipliers(unit_text)
+        shares_multiplier, dollars_multiplier = unit_multipliers
+        element_multipliers[xbrl_element] = shares_multiplier if 'Shares' in xbrl_element else dollars_multiplier
+    multipliers = np.array([element_multipliers[xbrl_element] for xbrl_element in xbrl_elements], dtype=np.float64)
+
+    values = np.where(is_negative, -amounts, amounts) * multipliers
+
+    processed_values = []
+    for text, xbrl_element, amount_text, numeric, value in zip(texts, xbrl_elements, amount_texts.tolist(),
+                                                               is_numeric.tolist(), values.tolist()):
+        if numeric:
+            processed_values.append(value)
+        else:
+            print('Warning: {} (from {}) is not numeric even after removing special characters () - ignoring'.format(
+                text, xbrl_element, amount_text))
+            processed_values.append(None)
 
-    try:
-        amount = float(amount_text)
-        value = -amount if is_negative else amount
-
-        # handle units
-        if ('PerShare' in xbrl_element):
-            value = value  # no change
-        elif (('Shares' in xbrl_element and 'shares in billions' in unit_text.lower())
-              or ('Shares' not in xbrl_element and '$ in billions' in unit_text.lower())):
-            value = value * 1000000000
-        elif (('Shares' in xbrl_element and 'shares in millions' in unit_text.lower())
-              or ('Shares' not in xbrl_element and '$ in millions' in unit_text.lower())):
-            value = value * 1000000
-        elif (('Shares' in xbrl_element and 'shares in thousands' in unit_text.lower())
-              or ('Shares' not in xbrl_element and '$ in thousands' in unit_text.lower())):
-            value = value * 1000
-
-    except ValueError:
-        print('Warning: {} (from {}) is not numeric even after removing special characters () - ignoring'.format(text,
-                                                                                                                 xbrl_element,
-                                                                                                                 amount_text))
-
-    return value
+    return processed_values
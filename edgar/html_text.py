@@ -0,0 +1,82 @@
+'''
+Streaming extraction of the text of html documents, used for filings that
+predate XBRL where the financial statements are only available as html
+'''
+from html.parser import HTMLParser
+
+NON_BREAK_SPACE = u'\xa0'
+
+# the html is fed to the parser in chunks of this many characters
+CHUNK_SIZE = 64 * 1024
+
+# the text of these elements isn't part of the document's text
+SKIPPED_TAGS = ['script', 'style']
+
+
+class HtmlTextExtractor(HTMLParser):
+    '''
+    Incrementally collects the text of an html document without building a
+    tree. The text is the same as BeautifulSoup(html, 'html.parser').text,
+    except that non-breaking spaces are replaced with regular spaces
+    '''
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks = []
+        self.skip_depth = 0
+        # number of chunks returned by get_new_text so far
+        self.read_chunks = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS and self.skip_depth > 0:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if self.skip_depth == 0:
+            self.chunks.append(data.replace(NON_BREAK_SPACE, ' '))
+
+    def unknown_decl(self, data):
+        # CDATA sections are kept as text, other declarations are not
+        if data.startswith('CDATA['):
+            self.handle_data(data[len('CDATA['):])
+
+    def get_new_text(self):
+        '''
+        Returns the text collected since the last call
+        '''
+        new_text = ''.join(self.chunks[self.read_chunks:])
+        self.read_chunks = len(self.chunks)
+        return new_text
+
+    def get_text(self):
+        return ''.join(self.chunks)
+
+
+def extract_text(html_text, stop=None, chunk_size=CHUNK_SIZE):
+    '''
+    Returns the text of html_text, see HtmlTextExtractor
+
+    :param html_text: html document
+    :param stop: optional callable that is given the text extracted from each
+        chunk, in order. Once it returns True, one more chunk is read (so that
+        the lines around the end of the wanted text are complete) and the rest
+        of the document is skipped
+    :param chunk_size: number of characters of html_text fed at a time
+    '''
+    extractor = HtmlTextExtractor()
+    stopping = False
+
+    for start in range(0, len(html_text), chunk_size):
+        extractor.feed(html_text[start:start + chunk_size])
+
+        if stopping:
+            return extractor.get_text()
+        if stop is not None:
+            stopping = stop(extractor.get_new_text())
+
+    extractor.close()
+    return extractor.get_text()
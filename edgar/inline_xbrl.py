@@ -0,0 +1,282 @@
+'''
+Reads financial data from inline XBRL (iXBRL) documents, i.e. 10-K and 10-Q
+html documents with their facts tagged in the html itself with
+ix:nonFraction and ix:nonNumeric, and their contexts and units in ix:resources
+
+The html is streamed through an HTMLParser, so only the primary document of
+a filing is needed and no html tree or table is ever built. The text of
+ix:nonNumeric facts split with continuedAt is joined from their
+ix:continuation elements once the whole document is read
+'''
+import re
+from html.parser import HTMLParser
+from edgar.html_text import CHUNK_SIZE, NON_BREAK_SPACE
+from edgar.xbrl import FinancialInfoBuilder, XbrlParsingException, get_context
+from edgar.financials import FinancialReport
+from edgar.instrumentation import stage, XBRL_STAGE
+
+NON_FRACTION_TAG = 'ix:nonfraction'
+NON_NUMERIC_TAG = 'ix:nonnumeric'
+# rest of the text of an ix:nonNumeric (or of another continuation) whose continuedAt is its id
+CONTINUATION_TAG = 'ix:continuation'
+FACT_TAGS = [NON_FRACTION_TAG, NON_NUMERIC_TAG, CONTINUATION_TAG]
+RESOURCES_TAG = 'ix:resources'
+# content of ix:exclude isn't part of the facts that contain it
+EXCLUDE_TAG = 'ix:exclude'
+
+# ixt transformation formats (the part after the prefix) that need special handling
+ZERO_FORMATS = ['zerodash', 'fixed-zero', 'fixedzero']
+COMMA_DECIMAL_FORMATS = ['numcommadecimal', 'num-comma-decimal', 'numdotcomma', 'num-dot-comma']
+WORD_FORMATS = ['numwordsen', 'num-word-en']
+NO_WORDS = ['no', 'none']
+
+NON_NUMERIC_REGEX = re.compile('[^0-9.]')
+
+
+class InlineXbrlParsingException(XbrlParsingException):
+    pass
+
+
+def _get_local_tag(tag):
+    '''
+    Returns the tag without its prefix, e.g. context for xbrli:context
+    '''
+    return tag.rsplit(':', 1)[-1]
+
+
+def _process_inline_value(text, format=None, scale=None, sign=None):
+    '''
+    Returns the value of an ix:nonFraction given its displayed text and its
+    format, scale and sign attributes, e.g. -1019000000.0 for text 1,019 with
+    scale 6 and sign -. Raises ValueError if the text isn't a number
+
+    :param format: ixt transformation of the text, e.g. ixt:numdotdecimal
+    '''
+    text = text.strip()
+    format = _get_local_tag(format.lower()) if format else ''
+
+    if format in ZERO_FORMATS or text in ['', '-', '—', '–']:
+        number_text = '0'
+    elif format in WORD_FORMATS:
+        from word2number import w2n
+        number_text = '0' if text.lower() in NO_WORDS else str(w2n.word_to_num(text))
+    else:
+        if format in COMMA_DECIMAL_FORMATS:
+            text = text.replace('.', '').replace(',', '.')
+        number_text = NON_NUMERIC_REGEX.sub('', text)
+        if not number_text:
+            raise ValueError('{} is not a number'.format(text))
+
+    # scaling with the exponent, rather than multiplying, so that e.g. 14.4 with scale -2 is exactly 0.144
+    value = float('{}e{}'.format(number_text, int(scale or 0)))
+    return -value if sign == '-' else value
+
+
+class InlineXbrlParser(HTMLParser):
+    '''
+    Incrementally reads the facts, contexts and units of an iXBRL document
+    into a FinancialInfoBuilder. Tag and attribute names are lowercase since
+    the document is parsed as html
+    '''
+
+    def __init__(self, builder, include_non_numeric=False):
+        '''
+        :param builder: FinancialInfoBuilder that the facts are added to
+        :param include_non_numeric: whether to also add ix:nonNumeric facts,
+            with their text as value
+        '''
+        super().__init__(convert_charrefs=True)
+        self.builder = builder
+        self.include_non_numeric = include_non_numeric
+
+        # facts that have been started and not ended, as (tag, attrs, label, text_parts)
+        self.open_facts = []
+        self.exclude_depth = 0
+
+        # context and unit being read in ix:resources
+        self.in_resources = False
+        self.context = None
+        self.unit = None
+        # [text_parts] of the element whose text is being read in ix:resources
+        self.resource_text = None
+
+        # [[text_parts]] of the cells of the current table row, for the labels of facts
+        self.row_cells = None
+
+        # ix:nonNumeric facts continued elsewhere, as (attrs, label, text), added once the document is read
+        self.continued_facts = []
+        # {id:(text, continuedat)} of the ix:continuation elements
+        self.continuations = {}
+
+    def handle_starttag(self, tag, attrs):
+        if tag in FACT_TAGS:
+            self.open_facts.append((tag, dict(attrs), self._get_row_label(), []))
+        elif tag == EXCLUDE_TAG:
+            self.exclude_depth += 1
+        elif tag == RESOURCES_TAG:
+            self.in_resources = True
+        elif self.in_resources:
+            self._handle_resource_starttag(_get_local_tag(tag), dict(attrs))
+        elif tag == 'tr':
+            self.row_cells = []
+        elif tag in ['td', 'th'] and self.row_cells is not None:
+            self.row_cells.append([])
+
+    def handle_endtag(self, tag):
+        if tag in FACT_TAGS:
+            if self.open_facts and self.open_facts[-1][0] == tag:
+                self._add_fact(*self.open_facts.pop())
+        elif tag == EXCLUDE_TAG:
+            self.exclude_depth = max(self.exclude_depth - 1, 0)
+        elif tag == RESOURCES_TAG:
+            self.in_resources = False
+        elif self.in_resources:
+            self._handle_resource_endtag(_get_local_tag(tag))
+        elif tag == 'tr':
+            self.row_cells = None
+
+    def handle_data(self, data):
+        if self.resource_text is not None:
+            self.resource_text.append(data)
+        if self.exclude_depth == 0:
+            for fact in self.open_facts:
+                fact[3].append(data)
+        if self.row_cells:
+            self.row_cells[-1].append(data)
+
+    def _get_row_label(self):
+        '''
+        Returns the text of the first non-empty cell of the current row before
+        the current cell (i.e. the label of a fact in that row), or None
+        '''
+        if not self.row_cells:
+            return None
+        for cell in self.row_cells[:-1]:
+            text = ''.join(cell).replace(NON_BREAK_SPACE, ' ').strip()
+            if text:
+                return ' '.join(text.split())
+        return None
+
+    def _handle_resource_starttag(self, local_tag, attrs):
+        if local_tag == 'context':
+            self.context = {'id': attrs.get('id'), 'dimensions': []}
+        elif local_tag == 'unit':
+            self.unit = {'id': attrs.get('id'), 'numerator': [], 'denominator': None}
+        elif local_tag == 'unitdenominator' and self.unit is not None:
+            self.unit['denominator'] = []
+        elif local_tag in ['instant', 'startdate', 'enddate', 'explicitmember', 'typedmember', 'measure']:
+            self.resource_text = []
+            if local_tag in ['explicitmember', 'typedmember'] and self.context is not None:
+                self.context['dimensions'].append([attrs.get('dimension'), None])
+
+    def _handle_resource_endtag(self, local_tag):
+        text = None if self.resource_text is None else ''.join(self.resource_text).strip()
+
+        if local_tag == 'context' and self.context is not None:
+            self.builder.add_context(get_context(
+                self.context['id'], self.context.get('instant'), self.context.get('startdate'),
+                self.context.get('enddate'), [tuple(dimension) for dimension in self.context['dimensions']]))
+            self.context = None
+        elif local_tag == 'unit' and self.unit is not None:
+            unit = '*'.join(self.unit['numerator'])
+            if self.unit['denominator'] is not None:
+                unit += '/' + '*'.join(self.unit['denominator'])
+            self.builder.add_unit(self.unit['id'], unit)
+            self.unit = None
+        elif local_tag in ['instant', 'startdate', 'enddate'] and self.context is not None:
+            self.context[local_tag] = text
+        elif local_tag in ['explicitmember', 'typedmember'] and self.context is not None:
+            self.context['dimensions'][-1][1] = text
+        elif local_tag == 'measure' and self.unit is not None:
+            if self.unit['denominator'] is not None:
+                self.unit['denominator'].append(text)
+            else:
+                self.unit['numerator'].append(text)
+
+        if local_tag in ['instant', 'startdate', 'enddate', 'explicitmember', 'typedmember', 'measure']:
+            self.resource_text = None
+
+    def close(self):
+        super().close()
+        for attrs, label, text in self.continued_facts:
+            parts = [text]
+            continued_at = attrs.get('continuedat')
+            # a chain of continuations, which can't loop back on itself
+            seen = set()
+            while continued_at in self.continuations and continued_at not in seen:
+                seen.add(continued_at)
+                continuation_text, continued_at = self.continuations[continued_at]
+                parts.append(continuation_text)
+            self._add_non_numeric_fact(attrs, label, ' '.join(parts))
+        self.continued_facts = []
+
+    def _add_fact(self, tag, attrs, label, text_parts):
+        if tag == CONTINUATION_TAG:
+            self.continuations[attrs.get('id')] = (''.join(text_parts), attrs.get('continuedat'))
+            return
+        name = attrs.get('name')
+        if name is None or attrs.get('xsi:nil') == 'true':
+            return
+        # same names as the rendered reports, e.g. us-gaap_Revenues for us-gaap:Revenues
+        local_name = _get_local_tag(name)
+        name = name.replace(':', '_')
+        text = ''.join(text_parts)
+
+        if tag == NON_FRACTION_TAG:
+            try:
+                value = _process_inline_value(text, attrs.get('format'), attrs.get('scale'), attrs.get('sign'))
+            except (ValueError, TypeError):
+                # one badly displayed value (e.g. n/a) shouldn't fail the whole document
+                print('Warning: {} (from {}) is not numeric - ignoring'.format(text, name))
+                return
+            self.builder.add_fact(name, local_name, attrs.get('contextref'), attrs.get('unitref'),
+                                  attrs.get('decimals'), value, label)
+        elif self.include_non_numeric:
+            if attrs.get('continuedat'):
+                self.continued_facts.append((attrs, label, text))
+            else:
+                self._add_non_numeric_fact(attrs, label, text)
+
+    def _add_non_numeric_fact(self, attrs, label, text):
+        name = attrs['name']
+        self.builder.add_fact(name.replace(':', '_'), _get_local_tag(name), attrs.get('contextref'), None, None,
+                              ' '.join(text.replace(NON_BREAK_SPACE, ' ').split()), label)
+
+
+def _process_inline_facts(html_text, include_dimensions=False, include_non_numeric=False,
+                          chunk_size=CHUNK_SIZE):
+    '''
+    Returns a list of FinancialInfo objects, one per period, with the facts of
+    the iXBRL document html_text, in one pass over html_text
+
+    :param include_dimensions: see edgar.xbrl.FinancialInfoBuilder
+    :param include_non_numeric: see InlineXbrlParser
+    '''
+    builder = FinancialInfoBuilder(include_dimensions=include_dimensions)
+    parser = InlineXbrlParser(builder, include_non_numeric)
+
+    for start in range(0, len(html_text), chunk_size):
+        parser.feed(html_text[start:start + chunk_size])
+    parser.close()
+
+    financial_info = builder.get_financial_info()
+    if not financial_info:
+        raise InlineXbrlParsingException('Document has no inline XBRL facts')
+    return financial_info
+
+
+def get_inline_xbrl_financial_report(company, date_filed, html_text, include_dimensions=False,
+                                     include_non_numeric=False):
+    '''
+    Returns a FinancialReport with the facts of an iXBRL document
+
+    :param company: identifier of the company that the document belongs to
+    :param date_filed: datetime representing ACCEPTANCE-DATETIME of Filing
+    :param html_text: html of the iXBRL document, e.g. the primary document
+        of a 10-K or 10-Q filing
+    :param include_dimensions: see edgar.xbrl.FinancialInfoBuilder
+    :param include_non_numeric: see InlineXbrlParser
+    '''
+    with stage(XBRL_STAGE):
+        financial_info = _process_inline_facts(html_text, include_dimensions, include_non_numeric)
+    return FinancialReport(company, date_filed, financial_info)
@@ -0,0 +1,304 @@
+'''
+Instrumentation of where the time of getting a filing's statements goes
+
+The package marks its stages (downloads, SGML parsing, BeautifulSoup
+building, statement and XBRL parsing) with stage(name), counts bytes
+downloaded, cache hits and misses and documents with count(name, value),
+and announces each url it fetches with request(url).
+These are passed on to listeners, e.g. a Report, which sums the wall and
+CPU time of each stage and the counts:
+
+    with collect() as report:
+        stock.get_filing(...).get_income_statements()
+    print(report)
+    print(report.to_prometheus())
+
+Listeners are either scoped to a context with listen (as collect does), so
+that they only get the stages of the code run within it, on its thread or
+on the threads it hands work off to in the pools of the package (see
+bind_context), or process-wide with add_listener (e.g. to export every
+stage as OpenTelemetry spans). Stages of worker processes (e.g. of
+get_financial_data(max_workers=...)) aren't instrumented.
+
+While there is no listener (the default) stage returns a shared do-nothing
+context manager and count returns right away, so the instrumentation costs
+next to nothing. The time of a stage includes that of the stages within it
+'''
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+FETCH_STAGE = 'fetch'
+SGML_STAGE = 'sgml'
+SOUP_STAGE = 'soup'
+STATEMENTS_STAGE = 'statements'
+XBRL_STAGE = 'xbrl'
+
+REQUESTS = 'requests'
+BYTES_DOWNLOADED = 'bytes_downloaded'
+CACHE_HITS = 'cache_hits'
+CACHE_MISSES = 'cache_misses'
+DOCUMENTS = 'documents'
+
+_lock = threading.Lock()
+# process-wide listeners, replaced rather than changed when listeners are added or removed, so that it's read
+# without the lock
+_listeners = ()
+# listeners of the current context, see listen
+_context_listeners = contextvars.ContextVar('edgar_listeners', default=())
+
+
+class Listener:
+    '''
+    Base class of the listeners of stages and counts, see add_listener. The
+    methods are called on the thread of the instrumented code
+    '''
+
+    def start_stage(self, name):
+        '''
+        Called when stage name starts, returns a state passed to end_stage
+        '''
+        return None
+
+    def end_stage(self, name, state, wall_time, cpu_time):
+        '''
+        Called when stage name ends, with its wall and CPU (of its thread)
+        times in seconds
+        '''
+        pass
+
+    def count(self, name, value):
+        pass
+
+    def request(self, url):
+        '''
+        Called before url is fetched, raising prevents it
+        '''
+        pass
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('name', 'listeners', 'states', 'wall_start', 'cpu_start')
+
+    def __init__(self, name, listeners):
+        self.name = name
+        self.listeners = listeners
+
+    def __enter__(self):
+        self.states = [listener.start_stage(self.name) for listener in self.listeners]
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        wall_time = time.perf_counter() - self.wall_start
+        cpu_time = time.thread_time() - self.cpu_start
+        for listener, state in zip(self.listeners, self.states):
+            listener.end_stage(self.name, state, wall_time, cpu_time)
+        return False
+
+
+def _get_listeners():
+    context_listeners = _context_listeners.get()
+    if not _listeners:
+        return context_listeners
+    return _listeners + context_listeners if context_listeners else _listeners
+
+
+def stage(name):
+    '''
+    Returns a context manager timing stage name for the listeners
+    '''
+    listeners = _get_listeners()
+    if not listeners:
+        return _NULL_STAGE
+    return _Stage(name, listeners)
+
+
+def count(name, value=1):
+    '''
+    Adds value to the count name (e.g. BYTES_DOWNLOADED) of the listeners
+    '''
+    listeners = _get_listeners()
+    if listeners:
+        for listener in listeners:
+            listener.count(name, value)
+
+
+def request(url):
+    '''
+    Tells the listeners that url is about to be fetched
+    '''
+    listeners = _get_listeners()
+    if listeners:
+        for listener in listeners:
+            listener.request(url)
+
+
+@contextmanager
+def listen(listener):
+    '''
+    Context manager adding listener for the code run within it, see the
+    module docstring
+    '''
+    token = _context_listeners.set(_context_listeners.get() + (listener,))
+    try:
+        yield listener
+    finally:
+        _context_listeners.reset(token)
+
+
+def bind_context(function):
+    '''
+    Returns function run in (a copy of) the current context, so that work
+    handed off to another thread (e.g. of a ThreadPoolExecutor) is seen by
+    the listeners of the current context
+    '''
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # a context can only be entered by one thread at a time
+        return context.copy().run(function, *args, **kwargs)
+    return run
+
+
+def add_listener(listener):
+    '''
+    Adds listener for the whole process, until remove_listener
+    '''
+    global _listeners
+    with _lock:
+        _listeners = _listeners + (listener,)
+
+
+def remove_listener(listener):
+    global _listeners
+    with _lock:
+        _listeners = tuple(other for other in _listeners if other is not listener)
+
+
+class StageStats:
+    __slots__ = ('calls', 'wall_time', 'cpu_time')
+
+    def __init__(self):
+        self.calls = 0
+        self.wall_time = 0.0
+        self.cpu_time = 0.0
+
+    def __repr__(self):
+        return '[calls={0}, wall_time={1:.6f}, cpu_time={2:.6f}]'.format(self.calls, self.wall_time, self.cpu_time)
+
+
+class Report(Listener):
+    '''
+    Listener summing the times of each stage ({name:StageStats} in stages)
+    and the counts ({name:value} in counts)
+    '''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counts = {}
+
+    def end_stage(self, name, state, wall_time, cpu_time):
+        with self.lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.calls += 1
+            stats.wall_time += wall_time
+            stats.cpu_time += cpu_time
+
+    def count(self, name, value):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def request(self, url):
+        self.count(REQUESTS, 1)
+
+    def to_prometheus(self, prefix='edgar'):
+        '''
+        Returns the report in the Prometheus text format, with the stages as
+        <prefix>_stage_calls_total, <prefix>_stage_wall_seconds_total and
+        <prefix>_stage_cpu_seconds_total labeled by stage, and each count as
+        <prefix>_<name>_total
+        '''
+        lines = []
+        with self.lock:
+            for metric, attribute in [('stage_calls_total', 'calls'), ('stage_wall_seconds_total', 'wall_time'),
+                                      ('stage_cpu_seconds_total', 'cpu_time')]:
+                if self.stages:
+                    lines.append('# TYPE {}_{} counter'.format(prefix, metric))
+                for name in sorted(self.stages):
+                    lines.append('{}_{}{{stage="{}"}} {}'.format(prefix, metric, name,
+                                                                 getattr(self.stages[name], attribute)))
+            for name in sorted(self.counts):
+                lines.append('# TYPE {}_{}_total counter'.format(prefix, name))
+                lines.append('{}_{}_total {}'.format(prefix, name, self.counts[name]))
+        return '\n'.join(lines) + '\n'
+
+    def __repr__(self):
+        return '[stages={0}, counts={1}]'.format(self.stages, self.counts)
+
+
+@contextmanager
+def collect():
+    '''
+    Context manager returning a Report of the stages and counts of the code
+    run within it, see listen
+    '''
+    with listen(Report()) as report:
+        yield report
+
+
+def _import_opentelemetry():
+    try:
+        from opentelemetry import trace, context
+    except ImportError:
+        raise ImportError('OpenTelemetry export requires opentelemetry-api, install it with '
+                          '"pip install opentelemetry-api"') from None
+    return trace, context
+
+
+class OpenTelemetryListener(Listener):
+    '''
+    Listener turning each stage into an OpenTelemetry span (nested in the
+    current span), with its CPU time as the cpu_time attribute, and each
+    count into an event of the current span. Requires opentelemetry-api
+    '''
+
+    def __init__(self, tracer=None):
+        '''
+        :param tracer: opentelemetry.trace.Tracer of the spans, by default
+            that of the global tracer provider
+        '''
+        self.trace, self.context = _import_opentelemetry()
+        self.tracer = tracer or self.trace.get_tracer('edgar')
+
+    def start_stage(self, name):
+        span = self.tracer.start_span(name)
+        token = self.context.attach(self.trace.set_span_in_context(span))
+        return span, token
+
+    def end_stage(self, name, state, wall_time, cpu_time):
+        span, token = state
+        span.set_attribute('cpu_time', cpu_time)
+        self.context.detach(token)
+        span.end()
+
+    def count(self, name, value):
+        span = self.trace.get_current_span()
+        if span.is_recording():
+            span.add_event(name, {'value': value})
@@ -0,0 +1,437 @@
+'''
+Durable job queue for bulk extractions that are too big for one host, e.g.
+a backfill of the full history of filings
+
+The filings of a query are split into shards by a hash of their accession
+number, and the queue is a SQLite database with a row per filing and a row
+per shard. Workers (processes, possibly on several machines) lease a shard
+at a time and extract its filings with an edgar.bulk.BulkExtractor into
+<output>/shards/<shard>, renewing the lease with heartbeats while they work.
+A shard whose lease expires, e.g. because its worker crashed, is claimed
+again by another worker, which resumes from the shard's checkpoint when the
+output directory is shared. A shard with failed filings is retried until
+max_attempts. Once every shard is done, merge_outputs concatenates the
+outputs of the shards, keeping one copy of the statements of each filing
+
+The same database holds the request budget of SharedRateLimiter, so that all
+of the workers together stay under EDGAR's rate limit. For workers on
+several machines the database (and output directory) have to be on a shared
+filesystem whose locks SQLite can use; a networked queue could implement the
+same methods as JobQueue
+
+usage:
+    python -m edgar.jobs init --queue jobs.db --year 2020 --quarter 1 --shards 64
+    python -m edgar.jobs work --queue jobs.db --output path/to/output
+    python -m edgar.jobs merge --queue jobs.db --output path/to/output
+'''
+import os
+import json
+import time
+import uuid
+import zlib
+import socket
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from edgar.edgar import FilingInfo, ARCHIVES_URL, get_filing_info
+from edgar.bulk import BulkExtractor, read_checkpoint, get_record_accession_number, STATEMENT_KINDS, \
+    DEFAULT_FORMS, CHECKPOINT_FILE, FAILURES_FILE, OUTPUT_FILE_EXTENSION
+from edgar.financials import DEFAULT_PARSER, PARSERS
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+SHARDS_DIRECTORY = 'shards'
+DEFAULT_LEASE_SECONDS = 600
+DEFAULT_MAX_ATTEMPTS = 3
+# seconds to wait for another worker's transaction before giving up
+LOCK_TIMEOUT = 60
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS filings (
+    accession_number TEXT PRIMARY KEY, shard INTEGER, company TEXT, form TEXT, cik TEXT, date_filed TEXT,
+    url TEXT);
+CREATE INDEX IF NOT EXISTS filings_shard ON filings (shard);
+CREATE TABLE IF NOT EXISTS shards (
+    shard INTEGER PRIMARY KEY, status TEXT, worker TEXT, lease_expires REAL, attempts INTEGER, failed INTEGER);
+'''
+
+
+class JobQueueException(Exception):
+    pass
+
+
+def get_shard(accession_number, shard_count):
+    return zlib.crc32(accession_number.encode('utf-8')) % shard_count
+
+
+def get_worker_id():
+    '''
+    Returns an id that is unique to this worker, e.g. host-1234-3f2a9c
+    '''
+    return '{}-{}-{}'.format(socket.gethostname(), os.getpid(), uuid.uuid4().hex[:6])
+
+
+class JobQueue:
+    '''
+    SQLite backed queue of shards of filings. Each method runs in its own
+    connection and transaction, so a JobQueue can be used from several
+    threads and several JobQueues (in several processes) can share a database
+    '''
+
+    def __init__(self, path, shard_count=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        '''
+        :param path: path of the SQLite database, created if it doesn't exist
+        :param shard_count: number of shards, only needed to create the queue
+        :param max_attempts: a shard that keeps failing is given up after this
+            many leases
+        '''
+        self.path = path
+        self.max_attempts = max_attempts
+
+        with self._transaction() as connection:
+            # not executescript, which would commit the transaction
+            for statement in SCHEMA.split(';'):
+                connection.execute(statement)
+            row = connection.execute("SELECT value FROM settings WHERE name = 'shard_count'").fetchone()
+            if row is not None:
+                self.shard_count = int(row[0])
+                if shard_count is not None and shard_count != self.shard_count:
+                    raise JobQueueException('{} has {} shards, not {}'.format(path, self.shard_count, shard_count))
+            elif shard_count is not None:
+                self.shard_count = shard_count
+                connection.execute("INSERT INTO settings VALUES ('shard_count', ?)", (str(shard_count),))
+                connection.executemany('INSERT INTO shards VALUES (?, ?, NULL, NULL, 0, 0)',
+                                       [(shard, PENDING) for shard in range(shard_count)])
+            else:
+                raise JobQueueException('{} is not a job queue, give a shard_count to create it'.format(path))
+
+    @contextmanager
+    def _transaction(self):
+        '''
+        Yields a connection in a transaction that holds the database's write
+        lock, which is committed (or rolled back) and closed on exit
+        '''
+        connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+        finally:
+            connection.close()
+
+    def add(self, filing_infos):
+        '''
+        Adds the filings of filing_infos that aren't in the queue yet, and
+        returns the number added. Shards that were done and get new filings
+        are pending again
+
+        :param filing_infos: iterable of edgar.edgar.FilingInfo objects
+        '''
+        rows = [(filing_info.accession_number, get_shard(filing_info.accession_number, self.shard_count),
+                 filing_info.company, filing_info.form, filing_info.cik, filing_info.date_filed, filing_info.url)
+                for filing_info in filing_infos]
+        added = 0
+        with self._transaction() as connection:
+            shards = set()
+            for row in rows:
+                if connection.execute('INSERT OR IGNORE INTO filings VALUES (?, ?, ?, ?, ?, ?, ?)', row).rowcount:
+                    shards.add(row[1])
+                    added += 1
+            connection.executemany('UPDATE shards SET status = ?, attempts = 0 WHERE shard = ? AND status != ?',
+                                   [(PENDING, shard, LEASED) for shard in shards])
+        return added
+
+    def claim(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        '''
+        Leases a pending shard, or a shard whose lease has expired, to worker
+        and returns its number, or None if there is no shard to claim
+        '''
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                'SELECT shard FROM shards WHERE attempts < ? AND (status = ? OR (status = ? AND lease_expires < ?)) '
+                'ORDER BY attempts, shard LIMIT 1', (self.max_attempts, PENDING, LEASED, now)).fetchone()
+            if row is None:
+                # shards that have expired too many times are given up
+                connection.execute('UPDATE shards SET status = ? WHERE status = ? AND lease_expires < ? '
+                                   'AND attempts >= ?', (FAILED, LEASED, now, self.max_attempts))
+                return None
+            connection.execute('UPDATE shards SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 '
+                               'WHERE shard = ?', (LEASED, worker, now + lease_seconds, row[0]))
+            return row[0]
+
+    def heartbeat(self, worker, shard, lease_seconds=DEFAULT_LEASE_SECONDS):
+        '''
+        Renews worker's lease of shard, and returns whether worker still held
+        it (if not, another worker may be working on shard)
+        '''
+        with self._transaction() as connection:
+            cursor = connection.execute('UPDATE shards SET lease_expires = ? WHERE shard = ? AND worker = ? '
+                                        'AND status = ?', (time.time() + lease_seconds, shard, worker, LEASED))
+            return cursor.rowcount == 1
+
+    def release(self, worker, shard, failed=0):
+        '''
+        Ends worker's lease of shard once its filings have been extracted, of
+        which failed failed. The shard is done, or pending to be retried if
+        some filings failed and it has attempts left. Returns whether worker
+        still held the lease
+        '''
+        with self._transaction() as connection:
+            row = connection.execute('SELECT attempts FROM shards WHERE shard = ? AND worker = ? AND status = ?',
+                                     (shard, worker, LEASED)).fetchone()
+            if row is None:
+                return False
+            if not failed:
+                status = DONE
+            else:
+                status = PENDING if row[0] < self.max_attempts else FAILED
+            connection.execute('UPDATE shards SET status = ?, lease_expires = NULL, failed = ? WHERE shard = ?',
+                               (status, failed, shard))
+            return True
+
+    def get_filing_infos(self, shard):
+        '''
+        Returns the FilingInfos of the filings of shard
+        '''
+        with self._transaction() as connection:
+            rows = connection.execute('SELECT company, form, cik, date_filed, url FROM filings WHERE shard = ? '
+                                      'ORDER BY accession_number', (shard,)).fetchall()
+        return [FilingInfo(company, form, cik, date_filed, url[len(ARCHIVES_URL):])
+                for company, form, cik, date_filed, url in rows]
+
+    def get_status(self):
+        '''
+        Returns {status:number of shards}
+        '''
+        with self._transaction() as connection:
+            return dict(connection.execute('SELECT status, COUNT(*) FROM shards GROUP BY status').fetchall())
+
+
+class SharedRateLimiter:
+    '''
+    Same as edgar.requests_wrapper.RateLimiter, but shared by all of the
+    processes using the database at path (e.g. all of the workers of a
+    JobQueue), so that they make at most max_per_second requests in total
+    '''
+
+    def __init__(self, path, max_per_second=10):
+        self.path = path
+        self.interval = 1.0 / max_per_second
+        connection = sqlite3.connect(path, timeout=LOCK_TIMEOUT)
+        with connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS rate (id INTEGER PRIMARY KEY, next_time REAL)')
+            connection.execute('INSERT OR IGNORE INTO rate VALUES (0, 0)')
+        connection.close()
+
+    def wait(self):
+        '''
+        Blocks until the next request is allowed
+        '''
+        connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            # wall clock time, since the processes may be on different machines
+            now = time.time()
+            next_time, = connection.execute('SELECT next_time FROM rate WHERE id = 0').fetchone()
+            connection.execute('UPDATE rate SET next_time = ? WHERE id = 0', (max(now, next_time) + self.interval,))
+            connection.execute('COMMIT')
+        finally:
+            connection.close()
+        if next_time > now:
+            time.sleep(next_time - now)
+
+
+def get_shard_directory(output_directory, shard):
+    return os.path.join(output_directory, SHARDS_DIRECTORY, str(shard))
+
+
+def run_worker(job_queue, output_directory, worker=None, lease_seconds=DEFAULT_LEASE_SECONDS,
+               requests_per_second=10, max_shards=None, **extractor_options):
+    '''
+    Claims shards of job_queue and extracts their filings until there are none
+    left to claim, and returns the number of shards that were extracted and
+    released. A shard whose lease is lost midway is dropped: nothing more is
+    written to its output, which is the other worker's from then on
+
+    :param job_queue: JobQueue
+    :param output_directory: directory of the shard outputs, shared by the
+        workers if a worker is to resume the shards of another
+    :param worker: id of this worker, see get_worker_id
+    :param lease_seconds: workers that don't heartbeat for this long lose
+        their shard. Heartbeats are sent every third of lease_seconds
+    :param requests_per_second: limit on the downloads of all of the workers
+        of job_queue together
+    :param max_shards: if set, stops after this many shards
+    :param extractor_options: passed on to BulkExtractor, e.g. max_workers
+    '''
+    worker = worker or get_worker_id()
+    rate_limiter = SharedRateLimiter(job_queue.path, requests_per_second)
+    shards = 0
+
+    while max_shards is None or shards < max_shards:
+        shard = job_queue.claim(worker, lease_seconds)
+        if shard is None:
+            break
+
+        extractor = BulkExtractor(get_shard_directory(output_directory, shard), rate_limiter=rate_limiter,
+                                  **extractor_options)
+        extracted = threading.Event()
+
+        def send_heartbeats():
+            while not extracted.wait(lease_seconds / 3):
+                if not job_queue.heartbeat(worker, shard, lease_seconds):
+                    # the shard was given to another worker
+                    extractor.stop(discard=True)
+                    return
+
+        heartbeat_thread = threading.Thread(target=send_heartbeats, daemon=True)
+        heartbeat_thread.start()
+        try:
+            extractor.run(job_queue.get_filing_infos(shard))
+        finally:
+            extracted.set()
+            heartbeat_thread.join()
+
+        if not extractor.stopped.is_set() and job_queue.release(worker, shard, extractor.failed):
+            shards += 1
+
+    return shards
+
+
+def _read_failures(shard_directory):
+    '''
+    Returns the lines of the last failure of each filing of shard_directory
+    that didn't succeed on a later attempt
+    '''
+    path = os.path.join(shard_directory, FAILURES_FILE)
+    if not os.path.exists(path):
+        return []
+    checkpointed = read_checkpoint(shard_directory)
+    # {accession_number:line}
+    failures = {}
+    with open(path, mode='r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                accession_number = json.loads(line)['accession_number']
+                failures.pop(accession_number, None)
+                if accession_number not in checkpointed:
+                    failures[accession_number] = line
+    return list(failures.values())
+
+
+def _read_output_lines(path, checkpointed):
+    '''
+    Yields the lines of the output at path of the filings of checkpointed,
+    once: the statements of a filing are written together, so the lines of
+    a filing that come after those of another one are those of a repeated
+    write (e.g. after a crash or a lost lease), which are left out
+    '''
+    written = set()
+    current = None
+    with open(path, mode='r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            accession_number = get_record_accession_number(line)
+            if accession_number != current:
+                written.add(current)
+                current = accession_number
+            if accession_number in checkpointed and accession_number not in written:
+                yield line
+
+
+def merge_outputs(job_queue, output_directory, statements=STATEMENT_KINDS):
+    '''
+    Concatenates the outputs of the shards of job_queue into
+    output_directory/<kind>.ndjson, without the repeated statements of the
+    filings that were written more than once or those of filings that
+    weren't checkpointed, and the failures that weren't retried
+    successfully into output_directory/failures.ndjson, and returns the
+    number of shards merged. Raises a JobQueueException if some shards
+    aren't done (or failed) yet
+    '''
+    status = job_queue.get_status()
+    unfinished = sum(count for shard_status, count in status.items() if shard_status not in [DONE, FAILED])
+    if unfinished:
+        raise JobQueueException('{} shards are not done yet'.format(unfinished))
+
+    shard_directories = [get_shard_directory(output_directory, shard) for shard in range(job_queue.shard_count)]
+    shard_directories = [directory for directory in shard_directories if os.path.exists(directory)]
+
+    checkpoints = {directory: read_checkpoint(directory) for directory in shard_directories}
+    for kind in statements:
+        with open(os.path.join(output_directory, kind + OUTPUT_FILE_EXTENSION), mode='w', encoding='utf-8') as output:
+            for directory in shard_directories:
+                path = os.path.join(directory, kind + OUTPUT_FILE_EXTENSION)
+                if os.path.exists(path):
+                    output.writelines(_read_output_lines(path, checkpoints[directory]))
+
+    with open(os.path.join(output_directory, FAILURES_FILE), mode='w', encoding='utf-8') as output:
+        for directory in shard_directories:
+            output.writelines(_read_failures(directory))
+    with open(os.path.join(output_directory, CHECKPOINT_FILE), mode='w', encoding='utf-8') as output:
+        for directory in shard_directories:
+            output.writelines(accession_number + '\n' for accession_number in sorted(checkpoints[directory]))
+
+    return len(shard_directories)
+
+
+def main(args=None):
+    arg_parser = argparse.ArgumentParser(prog='edgar-jobs', description='Distributed bulk extraction of statements')
+    commands = arg_parser.add_subparsers(dest='command')
+    commands.required = True
+
+    init = commands.add_parser('init', help='adds the filings of a period to a queue, creating it if needed')
+    init.add_argument('--queue', required=True, help='path of the SQLite job queue')
+    init.add_argument('--shards', type=int, default=None, help='number of shards of a new queue')
+    init.add_argument('--year', type=int, default=0)
+    init.add_argument('--quarter', type=int, default=0)
+    init.add_argument('--cik', default='')
+    init.add_argument('--forms', nargs='+', default=DEFAULT_FORMS)
+
+    work = commands.add_parser('work', help='extracts shards of a queue until none are left')
+    work.add_argument('--queue', required=True)
+    work.add_argument('--output', required=True)
+    work.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS, help='lease of a shard in seconds')
+    work.add_argument('--statements', nargs='+', default=STATEMENT_KINDS, choices=STATEMENT_KINDS)
+    work.add_argument('--parser', default=DEFAULT_PARSER, choices=PARSERS)
+    work.add_argument('--workers', type=int, default=None, help='parsing processes, one per CPU by default')
+    work.add_argument('--fetchers', type=int, default=2, help='downloading threads')
+    work.add_argument('--rate', type=float, default=10, help='maximum downloads per second of all the workers')
+
+    merge = commands.add_parser('merge', help='merges the outputs of the shards of a finished queue')
+    merge.add_argument('--queue', required=True)
+    merge.add_argument('--output', required=True)
+    merge.add_argument('--statements', nargs='+', default=STATEMENT_KINDS, choices=STATEMENT_KINDS)
+
+    status = commands.add_parser('status', help='prints the number of shards by status')
+    status.add_argument('--queue', required=True)
+
+    args = arg_parser.parse_args(args)
+    job_queue = JobQueue(args.queue, getattr(args, 'shards', None))
+
+    if args.command == 'init':
+        filing_infos = get_filing_info(cik=args.cik, forms=args.forms, year=args.year, quarter=args.quarter)
+        print('{} filings added'.format(job_queue.add(filing_infos)))
+    elif args.command == 'work':
+        shards = run_worker(job_queue, args.output, lease_seconds=args.lease, requests_per_second=args.rate,
+                            statements=args.statements, parser=args.parser, max_workers=args.workers,
+                            fetchers=args.fetchers)
+        print('{} shards extracted'.format(shards))
+    elif args.command == 'merge':
+        print('{} shards merged'.format(merge_outputs(job_queue, args.output, args.statements)))
+    print(job_queue.get_status())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+'''
+Statements of many companies for the same period, e.g. the annual income
+statements of hundreds of tickers for a year
+
+Going through Stock(symbol).get_filing for each ticker reads the quarter's
+index once per ticker. Here the symbols are resolved in one batch, the
+quarter's index is read and parsed once, and the filings are fetched
+concurrently, each one once even when several symbols share a cik
+'''
+from edgar.edgar import get_filing_info, FINANCIAL_FORM_MAP
+from edgar.symbol_index import resolve_symbols
+from edgar.filing import Filing
+from edgar.financials import FinancialReport
+from edgar.requests_wrapper import RateLimiter
+from edgar.instrumentation import bind_context
+from edgar.stock import NoFilingInfoException
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class StatementNotFoundException(Exception):
+    pass
+
+
+def get_panel(symbols, period='annual', year=0, quarter=0, statement='income_statements',
+              max_workers=DEFAULT_MAX_WORKERS, cache=None, rate_limiter=None):
+    '''
+    Returns (DataFrame, {symbol:exception}): the given statement of the
+    filings of symbols for the period, year and quarter as one tidy table
+    (see edgar.export.reports_to_frame, with the symbols as the company
+    column), and the errors of the symbols that have none. Errors are
+    collected rather than raised, so one bad symbol doesn't fail the others
+
+    :param symbols: iterable of symbols, e.g. ['AAPL', 'MSFT']
+    :param period: either "annual" (default) or "quarterly"
+    :param year: year of the index to read, if 0, will default latest
+    :param quarter: 1, 2, 3, 4, or default value of 0 to get the latest
+    :param statement: "income_statements" (default), "balance_sheets" or "cash_flows"
+    :param max_workers: number of filings fetched (and parsed) at once
+    :param cache: optional edgar.cache.ResultCache for the Filings' statements
+    :param rate_limiter: optional RateLimiter shared with other downloads,
+        by default the filings are fetched at up to 10 per second
+    '''
+    from edgar.export import reports_to_frame
+
+    reports, errors = get_panel_reports(symbols, period, year, quarter, statement, max_workers, cache,
+                                        rate_limiter)
+    return reports_to_frame(reports.values()), errors
+
+
+def get_panel_reports(symbols, period='annual', year=0, quarter=0, statement='income_statements',
+                      max_workers=DEFAULT_MAX_WORKERS, cache=None, rate_limiter=None):
+    '''
+    Returns ({symbol:FinancialReport}, {symbol:exception}) in the order of
+    symbols, see get_panel. A symbol that isn't in symbols.csv gets an
+    IndexError, one without a filing in the quarter a NoFilingInfoException,
+    and one whose filing doesn't have the statement a
+    StatementNotFoundException
+    '''
+    from concurrent.futures import ThreadPoolExecutor
+
+    rate_limiter = rate_limiter or RateLimiter()
+    # dict keys, to drop repeated symbols but keep the order
+    symbol_to_cik = resolve_symbols(dict.fromkeys(symbols))
+    errors = {}
+    for symbol, cik in symbol_to_cik.items():
+        if cik is None:
+            errors[symbol] = IndexError('could not find cik for {}, must add to symbols.csv'.format(symbol))
+
+    ciks = {cik for cik in symbol_to_cik.values() if cik is not None}
+    filing_infos = _get_filing_infos(ciks, period, year, quarter) if ciks else {}
+
+    def get_statement(filing_info):
+        rate_limiter.wait()
+        filing = Filing(url=filing_info.url, company=filing_info.cik, cache=cache)
+        result = getattr(filing, 'get_' + statement)()
+        # the statements of filings in the old format are lists of one report
+        if isinstance(result, list):
+            result = result[0] if result else None
+        if not result:
+            raise StatementNotFoundException('could not find {} in {}'.format(statement, filing_info.url))
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # one fetch per filing, shared by the symbols of the same cik
+        futures = {cik: executor.submit(bind_context(get_statement), filing_info)
+                   for cik, filing_info in filing_infos.items()}
+
+        reports = {}
+        for symbol, cik in symbol_to_cik.items():
+            if cik is None:
+                continue
+            if cik not in futures:
+                errors[symbol] = NoFilingInfoException('No {} filing info found for {}'.format(period, symbol))
+                continue
+            try:
+                financial_report = futures[cik].result()
+            except Exception as e:
+                errors[symbol] = e
+            else:
+                reports[symbol] = FinancialReport(symbol, financial_report.date_filed, financial_report.reports)
+
+    return reports, errors
+
+
+def _get_filing_infos(ciks, period, year, quarter):
+    '''
+    Returns {cik:FilingInfo} of the filings of ciks for the period in the
+    index of year and quarter, which is read once for all of them. When a
+    company has several filings, originals win over amendments (which often
+    only have part of the filing), then the latest one wins
+    '''
+    filing_infos = {}
+    for filing_info in get_filing_info(forms=FINANCIAL_FORM_MAP[period], year=year, quarter=quarter):
+        if filing_info.cik not in ciks:
+            continue
+        other = filing_infos.get(filing_info.cik)
+        if other is None or _get_preference(filing_info) > _get_preference(other):
+            filing_infos[filing_info.cik] = filing_info
+    return filing_infos
+
+
+def _get_preference(filing_info):
+    return not filing_info.form.endswith('/A'), filing_info.date_filed
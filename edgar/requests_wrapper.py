@@ -1,8 +1,15 @@
-import requests
+import threading
+import time
+from edgar.instrumentation import stage, count, request, FETCH_STAGE, BYTES_DOWNLOADED
 
 class GetRequest:
     def __init__(self, url):
-        response = requests.get(url)
+        # imported here since importing requests is slow and most of the package works without it
+        import requests
+        request(url)
+        with stage(FETCH_STAGE):
+            response = requests.get(url)
+        count(BYTES_DOWNLOADED, len(response.content))
         response.encoding = 'utf-8'
         if response.status_code != requests.codes.ok:
             raise RequestException('{}: {}'.format(response.status_code, response.text))
@@ -10,4 +17,28 @@ class GetRequest:
         self.response = response
 
 class RequestException(Exception):
-    pass
\ No newline at end of file
+    pass
+
+
+class RateLimiter:
+    '''
+    Spaces out requests so that there are at most max_per_second of them per
+    second across all of the threads that share the RateLimiter (EDGAR asks
+    for no more than 10 requests per second)
+    '''
+
+    def __init__(self, max_per_second=10):
+        self.interval = 1.0 / max_per_second
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        '''
+        Blocks until the next request is allowed
+        '''
+        with self.lock:
+            now = time.monotonic()
+            wait_time = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if wait_time > 0:
+            time.sleep(wait_time)
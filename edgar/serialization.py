@@ -0,0 +1,184 @@
+'''
+Fast JSON serialization of FinancialReports
+
+dumps writes the JSON of a report directly, without FinancialReportEncoder's
+reflection, and its output is byte for byte the same as
+FinancialReportEncoder().encode(report). loads rebuilds the FinancialReport
+from that JSON, going down its schema (report, its reports, their maps)
+rather than guessing the class of each object from its keys, so that e.g. a
+map whose names happen to be label and value stays a dict. write_ndjson and
+read_ndjson stream many reports, one per line
+
+orjson is used, when installed, for the compact output of
+dumps(..., compact=True), which has the same schema without the whitespace
+'''
+import json
+from json.encoder import encode_basestring_ascii
+from datetime import datetime
+from edgar.financials import FinancialElement, FinancialInfo, FinancialReport, FinancialReportEncoder, \
+    get_attributes
+from edgar.xbrl import XbrlFinancialElement
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+INFINITY = float('inf')
+
+# keys of the JSON objects of the elements of each class, in the order that they're written
+ELEMENT_KEYS = ('label', 'value')
+XBRL_ELEMENT_KEYS = ('label', 'value', 'unit', 'decimals')
+
+DATETIME_FORMATS = ['%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M:%S.%f']
+
+
+def _dumps_value(value):
+    '''
+    Returns the JSON of value, the same as JSONEncoder's
+    '''
+    value_type = type(value)
+    if value_type is float and -INFINITY < value < INFINITY:
+        return float.__repr__(value)
+    if value_type is str:
+        return encode_basestring_ascii(value)
+    if value is None:
+        return 'null'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        if value != value:
+            return 'NaN'
+        if value == INFINITY:
+            return 'Infinity'
+        if value == -INFINITY:
+            return '-Infinity'
+        return float.__repr__(value)
+    if isinstance(value, datetime):
+        return '"' + value.isoformat() + '"'
+    return FinancialReportEncoder().encode(value)
+
+
+def _dumps_element(financial_element):
+    element_type = type(financial_element)
+    if element_type is FinancialElement:
+        return '{"label": ' + _dumps_value(financial_element.label) + ', "value": ' + \
+               _dumps_value(financial_element.value) + '}'
+    if element_type is XbrlFinancialElement:
+        return '{"label": ' + _dumps_value(financial_element.label) + ', "value": ' + \
+               _dumps_value(financial_element.value) + ', "unit": ' + _dumps_value(financial_element.unit) + \
+               ', "decimals": ' + _dumps_value(financial_element.decimals) + '}'
+    return '{' + ', '.join(encode_basestring_ascii(key) + ': ' + _dumps_value(value)
+                           for key, value in get_attributes(financial_element).items()) + '}'
+
+
+def _dumps_info(financial_info):
+    return '{"date": ' + _dumps_value(financial_info.date) + ', "months": ' + \
+           _dumps_value(financial_info.months) + ', "map": {' + \
+           ', '.join(encode_basestring_ascii(name) + ': ' + _dumps_element(financial_element)
+                     for name, financial_element in financial_info.map.items()) + '}}'
+
+
+def _default(o):
+    # only used by json, orjson handles datetimes itself
+    if isinstance(o, datetime):
+        return o.isoformat()
+    return get_attributes(o)
+
+
+def dumps(financial_report, compact=False):
+    '''
+    Returns the JSON of financial_report
+
+    :param compact: if False, the JSON is the same as that of
+        FinancialReportEncoder. If True, it has no whitespace and non-ASCII
+        characters aren't escaped (and numbers may be written differently,
+        e.g. 1e16 instead of 1e+16); this uses orjson when it's installed
+    '''
+    if compact:
+        if orjson is not None:
+            return orjson.dumps(financial_report, default=_default).decode('utf-8')
+        return json.dumps(financial_report, default=_default, separators=(',', ':'), ensure_ascii=False)
+
+    return '{"company": ' + _dumps_value(financial_report.company) + ', "date_filed": ' + \
+           _dumps_value(financial_report.date_filed) + ', "reports": [' + \
+           ', '.join(_dumps_info(financial_info) for financial_info in financial_report.reports) + ']}'
+
+
+def write_ndjson(financial_reports, file, compact=False):
+    '''
+    Writes financial_reports to file as newline delimited JSON, i.e. the JSON
+    of one report per line, and returns the number of reports written
+
+    :param financial_reports: iterable of FinancialReport objects, which is
+        consumed one report at a time
+    :param file: text file opened for writing
+    :param compact: see dumps
+    '''
+    count = 0
+    for financial_report in financial_reports:
+        file.write(dumps(financial_report, compact))
+        file.write('\n')
+        count += 1
+    return count
+
+
+def _parse_datetime(text):
+    if text is None:
+        return None
+    for datetime_format in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(text, datetime_format)
+        except ValueError:
+            pass
+    raise ValueError('{} is not an ISO formatted datetime'.format(text))
+
+
+def _build_element(element):
+    keys = tuple(element)
+    if keys == ELEMENT_KEYS:
+        return FinancialElement(element['label'], element['value'])
+    if keys == XBRL_ELEMENT_KEYS:
+        return XbrlFinancialElement(element['label'], element['value'], element['unit'], element['decimals'])
+    # the attributes of another kind of element
+    return element
+
+
+def _build_info(info):
+    return FinancialInfo(_parse_datetime(info['date']), info['months'],
+                         {name: _build_element(element) for name, element in info['map'].items()})
+
+
+def build_report(report):
+    '''
+    Returns the FinancialReport of report, the JSON object of dumps as parsed
+    by json.loads (e.g. as part of a bigger object)
+    '''
+    return FinancialReport(report['company'], _parse_datetime(report['date_filed']),
+                           [_build_info(info) for info in report['reports']])
+
+
+def loads(text):
+    '''
+    Returns the FinancialReport of text, the JSON of dumps (in either form)
+    or of FinancialReportEncoder
+    '''
+    return build_report(json.loads(text))
+
+
+def read_ndjson(file):
+    '''
+    Yields the FinancialReports of a file written by write_ndjson, one line
+    at a time
+
+    :param file: text file opened for reading
+    '''
+    for line in file:
+        if line.strip():
+            yield loads(line)
@@ -1,10 +1,24 @@
 '''
 This module ties it all together; it will be the main module that's used 
 '''
-import pandas as pd
-from edgar.edgar import get_financial_filing_info, get_latest_quarter_dir, find_latest_filing_info_going_back_from, SYMBOLS_DATA_PATH
+from edgar.edgar import get_financial_filing_info, get_latest_quarter_dir, find_latest_filing_info_going_back_from
+from edgar.symbol_index import get_cik
+from edgar.requests_wrapper import RequestException
 from edgar.filing import Filing
-from datetime import datetime
+from edgar.financials import FinancialReport
+from edgar.instrumentation import bind_context
+from datetime import datetime, timedelta
+from collections import deque
+
+# for each period and statement, the offsets (in filings of the same period, latest first) of the filings
+# whose periods a filing also reports: 10-Ks have three years of income statements and cash flows and two of
+# balance sheets, 10-Qs have the same quarter of the previous year (but their balance sheets only have the
+# end of the previous fiscal year, which is a 10-K's)
+HISTORY_COVERAGE = {
+    'annual': {'income_statements': [0, 1, 2], 'balance_sheets': [0, 1], 'cash_flows': [0, 1, 2]},
+    'quarterly': {'income_statements': [0, 3], 'balance_sheets': [0], 'cash_flows': [0, 3]},
+}
+
 
 class Stock:
     def __init__(self, symbol):
@@ -13,16 +27,14 @@ class Stock:
 
 
     def _find_cik(self):
-        df = pd.read_csv(SYMBOLS_DATA_PATH, converters={'cik' : str})
-        try:
-            cik = df.loc[df['symbol'] == self.symbol]['cik'].iloc[0]
-            # print('cik for {} is {}'.format(self.symbol, cik))
-            return cik
-        except IndexError as e:
-            raise IndexError('could not find cik, must add to symbols.csv') from None
+        cik = get_cik(self.symbol)
+        if cik is None:
+            raise IndexError('could not find cik, must add to symbols.csv')
+        # print('cik for {} is {}'.format(self.symbol, cik))
+        return cik
 
 
-    def get_filing(self, period='annual', year=0, quarter=0):
+    def get_filing(self, period='annual', year=0, quarter=0, cache=None):
         '''
         Returns the Filing closest to the given period, year, and quarter.
         Raises NoFilingInfoException if nothing is found for the params.
@@ -30,6 +42,7 @@ class Stock:
         :param period: either "annual" (default) or "quarterly"
         :param year: year to search, if 0, will default latest
         :param quarter: 1, 2, 3, 4, or default value of 0 to get the latest
+        :param cache: optional edgar.cache.ResultCache for the Filing's statements
         '''
         filing_info_list = get_financial_filing_info(period=period, cik=self.cik, year=year, quarter=quarter)
 
@@ -56,11 +69,248 @@ class Stock:
         filing_info = filing_info_list[0]
 
         url = filing_info.url
-        filing = Filing(company=self.symbol, url=url)
+        filing = Filing(company=self.symbol, url=url, cache=cache)
 
         return filing
 
 
+    def iter_filings(self, period='annual', start_year=0, end_year=0, prefetch=2, cache=None):
+        '''
+        Yields the Filings of the given period filed from start_year to
+        end_year (both included), in the order they were filed. While a
+        Filing is being used, the next ones are downloaded (and parsed) in the
+        background, so at most prefetch + 1 Filings are held at a time
+
+        :param period: either "annual" (default) or "quarterly"
+        :param start_year: first year to search, if 0, defaults to end_year
+        :param end_year: last year to search, if 0, defaults to the current year
+        :param prefetch: number of filings downloaded ahead of the one being
+            used, along with the indexes of as many quarters. 0 downloads
+            each filing when it's first used
+        :param cache: optional edgar.cache.ResultCache for the Filings' statements
+        '''
+        quarters, current_quarter = _get_quarters(start_year, end_year)
+
+        if prefetch <= 0:
+            for year, quarter in quarters:
+                for filing_info in self._get_quarter_filing_infos(period, year, quarter, current_quarter):
+                    yield Filing(company=self.symbol, url=filing_info.url, cache=cache)
+            return
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=prefetch) as executor:
+            # (Filing, future of its download), in the order they're yielded
+            filings = deque()
+            for filing_info in self._iter_filing_infos(period, quarters, current_quarter, executor, prefetch):
+                filing = Filing(company=self.symbol, url=filing_info.url, cache=cache)
+                filings.append((filing, executor.submit(bind_context(_prefetch_filing), filing)))
+                if len(filings) > prefetch:
+                    yield _get_prefetched_filing(filings)
+            while filings:
+                yield _get_prefetched_filing(filings)
+
+    def plan_history(self, period='annual', start_year=0, end_year=0, statement='income_statements',
+                     max_workers=4):
+        '''
+        Returns the fewest FilingInfos (latest first) expected to hold the
+        given statement for every filing of the period filed from start_year
+        to end_year, since each filing also reports the periods of earlier
+        ones (see HISTORY_COVERAGE). Amendments are left out
+
+        :param period: either "annual" (default) or "quarterly"
+        :param start_year: first year to search, if 0, defaults to end_year
+        :param end_year: last year to search, if 0, defaults to the current year
+        :param statement: "income_statements" (default), "balance_sheets" or "cash_flows"
+        :param max_workers: number of quarter indexes read at once
+        '''
+        filing_infos = self._get_history_filing_infos(period, start_year, end_year, max_workers)
+        offsets = HISTORY_COVERAGE[period][statement]
+        return [filing_infos[i] for i in _plan_coverage(len(filing_infos), offsets, set())]
+
+    def get_history(self, period='annual', start_year=0, end_year=0, statement='income_statements',
+                    max_workers=4, cache=None, errors=None):
+        '''
+        Returns a FinancialReport with the given statement for every filing of
+        the period filed from start_year to end_year (one FinancialInfo per
+        filing, latest first), while fetching as few filings as possible.
+
+        The filings of plan_history are fetched first. Any filing whose period
+        they turn out not to hold (e.g. a smaller company reporting two years
+        instead of three) is then planned for and fetched in another round.
+        A period held by several filings is taken from the latest, so that
+        restated values win. A filing that can't be read is planned around
+        the same way, and its period is missing if no other filing holds it
+
+        :param period: either "annual" (default) or "quarterly"
+        :param start_year: first year to search, if 0, defaults to end_year
+        :param end_year: last year to search, if 0, defaults to the current year
+        :param statement: "income_statements" (default), "balance_sheets" or "cash_flows"
+        :param max_workers: number of filings (and quarter indexes) fetched at once
+        :param cache: optional edgar.cache.ResultCache for the Filings' statements
+        :param errors: optional dict that {url:exception} of the filings that
+            couldn't be read is added to
+        '''
+        from concurrent.futures import ThreadPoolExecutor
+
+        filing_infos = self._get_history_filing_infos(period, start_year, end_year, max_workers)
+        offsets = HISTORY_COVERAGE[period][statement]
+        # the windows in which the period of each filing ends: after the previous filing, before its own
+        dates_filed = [datetime.strptime(filing_info.date_filed, '%Y-%m-%d') for filing_info in filing_infos]
+        windows = [(dates_filed[i + 1] if i + 1 < len(dates_filed) else dates_filed[i] - timedelta(days=366),
+                    dates_filed[i]) for i in range(len(dates_filed))]
+
+        def get_statement(filing_info):
+            # errors are returned rather than raised, so that one filing doesn't fail the others
+            try:
+                filing = Filing(company=self.symbol, url=filing_info.url, cache=cache)
+                return filing, getattr(filing, 'get_' + statement)()
+            except Exception as e:
+                return None, e
+
+        # {index of a filing:(index of the filing it's taken from, FinancialInfo)}
+        periods = {}
+        fetched = {}
+        failed = set()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                planned = _plan_coverage(len(filing_infos), offsets, set(periods) | set(fetched) | failed)
+                if not planned:
+                    break
+                results = executor.map(bind_context(get_statement), [filing_infos[i] for i in planned])
+                for i, (filing, financial_report) in zip(planned, results):
+                    if filing is None:
+                        print('Warning: could not get {} of {}: {}'.format(statement, filing_infos[i].url,
+                                                                           financial_report))
+                        if errors is not None:
+                            errors[filing_infos[i].url] = financial_report
+                        failed.add(i)
+                        continue
+                    fetched[i] = filing
+                    for j, financial_info in _get_covered_periods(financial_report, windows):
+                        # the latest filing holding a period wins
+                        if j not in periods or periods[j][0] > i:
+                            periods[j] = (i, financial_info)
+
+        date_filed = fetched[min(fetched)].date_filed if fetched else None
+        return FinancialReport(self.symbol, date_filed, [periods[j][1] for j in sorted(periods)])
+
+    def _get_history_filing_infos(self, period, start_year, end_year, max_workers):
+        '''
+        Returns the FilingInfos of the given period filed from start_year to
+        end_year, latest first, without amendments
+        '''
+        from concurrent.futures import ThreadPoolExecutor
+
+        quarters, current_quarter = _get_quarters(start_year, end_year)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            quarter_filing_infos = list(executor.map(bind_context(
+                lambda year_quarter: self._get_quarter_filing_infos(period, *year_quarter, current_quarter)),
+                quarters))
+        filing_infos = [filing_info for filing_info_list in quarter_filing_infos for filing_info in filing_info_list
+                        if not filing_info.form.endswith('/A')]
+        filing_infos.reverse()
+        return filing_infos
+
+    def _get_quarter_filing_infos(self, period, year, quarter, current_quarter):
+        '''
+        Returns the FilingInfos of the given period, year and quarter in the
+        order they were filed
+        '''
+        try:
+            filing_info_list = get_financial_filing_info(period=period, cik=self.cik, year=year, quarter=quarter)
+        except RequestException:
+            if (year, quarter) == current_quarter:
+                # the index of a quarter that just started may not be there yet
+                return []
+            raise
+        return sorted(filing_info_list, key=lambda filing_info: filing_info.date_filed)
+
+    def _iter_filing_infos(self, period, quarters, current_quarter, executor, prefetch):
+        '''
+        Yields the FilingInfos of quarters in the order they were filed, with
+        the indexes of the next prefetch quarters read in the background
+        '''
+        quarter_filing_infos = deque()
+        for year, quarter in quarters:
+            quarter_filing_infos.append(executor.submit(bind_context(self._get_quarter_filing_infos), period, year,
+                                                        quarter, current_quarter))
+            if len(quarter_filing_infos) > prefetch:
+                yield from quarter_filing_infos.popleft().result()
+        while quarter_filing_infos:
+            yield from quarter_filing_infos.popleft().result()
+
+
+def _get_quarters(start_year, end_year):
+    '''
+    Returns the (year, quarter) tuples from start_year to end_year up to the
+    current quarter, and the current quarter
+    '''
+    now = datetime.now()
+    end_year = end_year or now.year
+    start_year = start_year or end_year
+    current_quarter = (now.year, (now.month - 1) // 3 + 1)
+    quarters = [(year, quarter) for year in range(start_year, end_year + 1) for quarter in range(1, 5)
+                if (year, quarter) <= current_quarter]
+    return quarters, current_quarter
+
+
+def _plan_coverage(count, offsets, covered):
+    '''
+    Returns the indexes of the filings to fetch (latest first) so that each
+    of count filings that isn't covered is, assuming that the filing at index
+    i holds the periods of the filings at i + each of offsets. Taking the
+    latest filing that isn't covered each time needs the fewest filings
+    '''
+    planned = []
+    expected = set(covered)
+    for i in range(count):
+        if i not in expected:
+            planned.append(i)
+            expected.update(i + offset for offset in offsets)
+    return planned
+
+
+def _get_covered_periods(financial_report, windows):
+    '''
+    Yields (index of a filing, FinancialInfo) for the periods of
+    financial_report that are those of the filings, i.e. the latest period of
+    the report's main length (that of its first column) ending in the window
+    of the filing
+    '''
+    # the statements of filings in the old format are lists of one report
+    if isinstance(financial_report, list):
+        financial_report = financial_report[0] if financial_report else None
+    if not financial_report or not financial_report.reports:
+        return
+    months = financial_report.reports[0].months
+    financial_infos = sorted((financial_info for financial_info in financial_report.reports
+                              if financial_info.months == months), key=lambda financial_info: financial_info.date,
+                             reverse=True)
+    found = set()
+    for financial_info in financial_infos:
+        for j, (start, end) in enumerate(windows):
+            if start < financial_info.date < end:
+                if j not in found:
+                    found.add(j)
+                    yield j, financial_info
+                break
+
+
+def _prefetch_filing(filing):
+    # the documents are only loaded when first used
+    filing.documents
+
+
+def _get_prefetched_filing(filings):
+    '''
+    Returns the first Filing of filings once its download is done. A Filing
+    whose download failed is returned as is, and fails again when it's used
+    '''
+    filing, future = filings.popleft()
+    future.exception()
+    return filing
+
 
 class NoFilingInfoException(Exception):
     pass
@@ -0,0 +1,143 @@
+'''
+In-memory index of the cik-to-symbol database, edgar/data/symbols.csv
+
+The index is loaded once per process, when a symbol or cik is first looked
+up, and is then a pair of dicts, so resolving a symbol (e.g. for each Stock
+that is created) is a dict lookup rather than a read of the csv
+
+The index can also be prebuilt with write_symbol_index (or
+python -m edgar.symbol_index [path]), which saves the two dicts as a pickle
+that is loaded instead of the csv for as long as it's newer. The pickle is
+next to the csv by default; where the package is installed read-only, it can
+be put elsewhere with the EDGAR_SYMBOL_INDEX_PATH environment variable or
+set_symbol_index_path. The csv is read whenever the pickle can't be
+'''
+import os
+import csv
+import sys
+import pickle
+import threading
+from edgar.edgar import SYMBOLS_DATA_PATH
+
+SYMBOL_INDEX_PATH = os.environ.get('EDGAR_SYMBOL_INDEX_PATH',
+                                   os.path.splitext(SYMBOLS_DATA_PATH)[0] + '.pickle')
+
+_lock = threading.Lock()
+# ({symbol:cik}, {cik:symbol}) once loaded
+_index = None
+
+
+def _read_symbols_csv(path):
+    '''
+    Returns ({symbol:cik}, {cik:symbol}) of the csv at path. When a symbol or
+    cik appears more than once, its first row wins
+    '''
+    symbol_to_cik = {}
+    cik_to_symbol = {}
+    with open(path, mode='r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            # matched exactly as written, like the rows of the csv always were
+            symbol = row['symbol']
+            cik = row['cik']
+            # some companies have no symbol
+            if not symbol or not cik:
+                continue
+            symbol = sys.intern(symbol)
+            cik = sys.intern(cik)
+            symbol_to_cik.setdefault(symbol, cik)
+            cik_to_symbol.setdefault(cik, symbol)
+    return symbol_to_cik, cik_to_symbol
+
+
+def write_symbol_index(path=None, csv_path=SYMBOLS_DATA_PATH):
+    '''
+    Writes the index of the csv at csv_path as a pickle at path (by default
+    SYMBOL_INDEX_PATH), which is then loaded instead of the csv while it's
+    newer than it, if path is SYMBOL_INDEX_PATH (see set_symbol_index_path)
+    '''
+    path = path or SYMBOL_INDEX_PATH
+    index = _read_symbols_csv(csv_path)
+    temporary_path = path + '.tmp'
+    with open(temporary_path, mode='wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, path)
+
+
+def set_symbol_index_path(path):
+    '''
+    Sets the path of the prebuilt index that is loaded instead of the csv,
+    see write_symbol_index, and drops the loaded index
+    '''
+    global SYMBOL_INDEX_PATH
+    SYMBOL_INDEX_PATH = path
+    reset_symbol_index()
+
+
+def _load_index():
+    try:
+        if os.path.getmtime(SYMBOL_INDEX_PATH) >= os.path.getmtime(SYMBOLS_DATA_PATH):
+            with open(SYMBOL_INDEX_PATH, mode='rb') as f:
+                return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError) as e:
+        # no pickle (the usual case) is fine, one that can't be read is reported
+        if os.path.exists(SYMBOL_INDEX_PATH):
+            print('Warning: could not load {}, reading {} instead: {}'.format(SYMBOL_INDEX_PATH, SYMBOLS_DATA_PATH, e))
+    return _read_symbols_csv(SYMBOLS_DATA_PATH)
+
+
+def _get_index():
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                _index = _load_index()
+    return _index
+
+
+def reset_symbol_index():
+    '''
+    Drops the loaded index, so that it's loaded again on the next lookup
+    (e.g. after symbols.csv was edited)
+    '''
+    global _index
+    with _lock:
+        _index = None
+
+
+def get_cik(symbol):
+    '''
+    Returns the cik of symbol, or None if it isn't in symbols.csv
+    '''
+    return _get_index()[0].get(symbol)
+
+
+def get_symbol(cik):
+    '''
+    Returns the symbol of cik (a string, e.g. '320193'), or None if it isn't
+    in symbols.csv
+    '''
+    return _get_index()[1].get(str(cik))
+
+
+def get_symbol_ciks():
+    '''
+    Returns the list of the ciks that have a symbol in symbols.csv
+    '''
+    return list(_get_index()[1])
+
+
+def resolve_symbols(symbols):
+    '''
+    Returns {symbol:cik} for symbols, with None as the cik of the symbols that
+    aren't in symbols.csv
+    '''
+    symbol_to_cik = _get_index()[0]
+    return {symbol: symbol_to_cik.get(symbol) for symbol in symbols}
+
+
+if __name__ == '__main__':
+    try:
+        write_symbol_index(*sys.argv[1:2])
+    except OSError as e:
+        sys.exit('could not write the symbol index ({}), give a writable path or set '
+                 'EDGAR_SYMBOL_INDEX_PATH'.format(e))
@@ -0,0 +1,358 @@
+'''
+Reads financial data directly from the XBRL instance document of a filing
+(EX-101.INS) instead of from the R*.htm reports rendered from it
+
+The instance is streamed: contexts and units are resolved as they are read,
+and each fact is turned into a FinancialElement and discarded from the tree
+as soon as it ends, so memory doesn't grow with the size of the document
+'''
+from xml.etree.ElementTree import XMLPullParser
+from datetime import datetime
+from edgar.financials import FinancialElement, FinancialInfo, FinancialReport, _intern
+from edgar.instrumentation import stage, XBRL_STAGE
+
+XBRLI_NS = 'http://www.xbrl.org/2003/instance'
+XBRLDI_NS = 'http://xbrl.org/2006/xbrldi'
+LINK_NS = 'http://www.xbrl.org/2003/linkbase'
+XLINK_NS = 'http://www.w3.org/1999/xlink'
+XSI_NS = 'http://www.w3.org/2001/XMLSchema-instance'
+
+# namespaces whose top level elements are never facts
+NON_FACT_NAMESPACES = [XBRLI_NS, LINK_NS]
+
+INSTANCE_DOCUMENT_TYPE = 'EX-101.INS'
+# inline XBRL filings include the instance extracted from the html as <name>_htm.xml
+EXTRACTED_INSTANCE_SUFFIX = '_htm.xml'
+LABEL_DOCUMENT_TYPE = 'EX-101.LAB'
+STANDARD_LABEL_ROLE = 'http://www.xbrl.org/2003/role/label'
+
+# the xml is fed to the parser in chunks of this many characters
+CHUNK_SIZE = 64 * 1024
+
+# average number of days in a month, used to get the months a duration covers
+DAYS_PER_MONTH = 365.25 / 12
+
+
+class XbrlParsingException(Exception):
+    pass
+
+
+class Context:
+    '''
+    Models an XBRL context: the period of a fact and, for facts that aren't
+    on the face of a statement, its dimensions (e.g. a business segment)
+    '''
+
+    def __init__(self, id, date, months, dimensions):
+        '''
+        :param date: instant or end date of the period
+        :param months: number of months the period covers (None if instant)
+        :param dimensions: list of (dimension, member) tuples, empty if the
+            context has no segment or scenario
+        '''
+        self.id = id
+        self.date = date
+        self.months = months
+        self.dimensions = dimensions
+
+    def __repr__(self):
+        return str(self.__dict__)
+
+
+class XbrlFinancialElement(FinancialElement):
+    '''
+    A FinancialElement read from an XBRL fact, which also knows its unit
+    (e.g. iso4217:USD, or iso4217:USD/xbrli:shares) and decimals
+    '''
+
+    __slots__ = ('unit', 'decimals')
+
+    def __init__(self, label, value, unit, decimals):
+        super().__init__(label, value)
+        self.unit = _intern(unit)
+        self.decimals = _intern(decimals)
+
+
+def _iter_top_level_elements(xml_text, namespaces, chunk_size=CHUNK_SIZE):
+    '''
+    Yields every child of the root element of xml_text once it has been read
+    in full. Each child is removed from the tree after it is yielded
+
+    :param namespaces: dict updated with {uri:prefix} as namespaces are declared
+    '''
+    # the xml declaration must be at the very start of the document
+    xml_text = xml_text.lstrip()
+    parser = XMLPullParser(events=('start-ns', 'start', 'end'))
+    root = None
+    depth = 0
+
+    for start in range(0, len(xml_text), chunk_size):
+        parser.feed(xml_text[start:start + chunk_size])
+
+        for event, item in parser.read_events():
+            if event == 'start-ns':
+                prefix, uri = item
+                namespaces.setdefault(uri, prefix)
+            elif event == 'start':
+                if root is None:
+                    root = item
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 1:
+                    yield item
+                    root.remove(item)
+
+    parser.close()
+
+
+def _split_tag(tag):
+    '''
+    Returns a tuple of the namespace uri and local name of an ElementTree tag
+    '''
+    if tag.startswith('{'):
+        uri, local_name = tag[1:].split('}', 1)
+        return uri, local_name
+    return '', tag
+
+
+def _qualified_name(uri, local_name, namespaces, separator='_'):
+    '''
+    Returns <prefix><separator><local_name>, e.g. us-gaap_Revenues, which is
+    how the rendered reports name XBRL elements
+    '''
+    prefix = namespaces.get(uri)
+    return local_name if not prefix else prefix + separator + local_name
+
+
+def _parse_date(text):
+    return datetime.strptime(text.strip()[:10], '%Y-%m-%d')
+
+
+def _process_context(element):
+    '''
+    Returns a Context from an xbrli:context element, or None if the context
+    has no usable period (e.g. forever)
+    '''
+    period = element.find('{%s}period' % XBRLI_NS)
+    if period is None:
+        return None
+
+    dimensions = []
+    for member in element.iter():
+        uri, local_name = _split_tag(member.tag)
+        if uri == XBRLDI_NS:
+            # explicitMember has the member as text, typedMember has it as a child
+            dimensions.append((member.get('dimension'), ''.join(member.itertext()).strip()))
+
+    return get_context(element.get('id'), period.findtext('{%s}instant' % XBRLI_NS),
+                       period.findtext('{%s}startDate' % XBRLI_NS), period.findtext('{%s}endDate' % XBRLI_NS),
+                       dimensions)
+
+
+def get_context(id, instant, start_date, end_date, dimensions):
+    '''
+    Returns a Context given the text of the dates of its period, or None if
+    the context has no usable period (e.g. forever)
+    '''
+    if instant is not None:
+        date = _parse_date(instant)
+        months = None
+    elif end_date is not None and start_date is not None:
+        date = _parse_date(end_date)
+        months = int(round((date - _parse_date(start_date)).days / DAYS_PER_MONTH))
+    else:
+        return None
+
+    return Context(id, date, months, dimensions)
+
+
+def _process_unit(element):
+    '''
+    Returns the measure of an xbrli:unit element, e.g. iso4217:USD, or
+    numerator/denominator for a divide, e.g. iso4217:USD/xbrli:shares
+    '''
+    divide = element.find('{%s}divide' % XBRLI_NS)
+    if divide is not None:
+        numerator = divide.find('{%s}unitNumerator' % XBRLI_NS)
+        denominator = divide.find('{%s}unitDenominator' % XBRLI_NS)
+        return '{}/{}'.format(_process_measures(numerator), _process_measures(denominator))
+    return _process_measures(element)
+
+
+def _process_measures(element):
+    return '*'.join(measure.text.strip() for measure in element.findall('{%s}measure' % XBRLI_NS))
+
+
+def _get_dimensional_name(name, dimensions):
+    '''
+    Returns the name of a fact for a context with dimensions, e.g.
+    us-gaap_Revenues[us-gaap_StatementBusinessSegmentsAxis=aapl_IPhoneMember]
+    '''
+    return '{}[{}]'.format(name, ','.join('{}={}'.format(dimension.replace(':', '_'), member.replace(':', '_'))
+                                          for dimension, member in dimensions))
+
+
+class FinancialInfoBuilder:
+    '''
+    Groups facts into FinancialInfo objects, one per period, as they are read.
+    Facts whose context or unit hasn't been read yet (unusual) are kept aside
+    and resolved by get_financial_info
+    '''
+
+    def __init__(self, labels=None, include_dimensions=False):
+        '''
+        :param labels: optional {xbrl element name:label}, the local name of
+            the element is used for those that aren't in labels
+        :param include_dimensions: whether to include facts of contexts with
+            dimensions; their names are suffixed with their dimensions, see
+            _get_dimensional_name
+        '''
+        self.labels = labels or {}
+        self.include_dimensions = include_dimensions
+        # {id:Context}, {id:unit}
+        self.contexts = {}
+        self.units = {}
+        # {(date, months):FinancialInfo}
+        self.financial_info = {}
+        self.pending_facts = []
+
+    def add_context(self, context):
+        if context is not None:
+            self.contexts[context.id] = context
+
+    def add_unit(self, id, unit):
+        self.units[id] = unit
+
+    def add_fact(self, name, local_name, context_ref, unit_ref, decimals, value, label=None):
+        '''
+        :param name: xbrl element name, e.g. us-gaap_Revenues
+        :param unit_ref: id of the unit of the fact, None if it isn't numeric
+        :param value: value of the fact
+        :param label: label of the fact, if known from the document itself
+        '''
+        fact = (name, local_name, context_ref, unit_ref, decimals, value, label)
+        if context_ref in self.contexts and (unit_ref is None or unit_ref in self.units):
+            self._add_fact(*fact)
+        else:
+            self.pending_facts.append(fact)
+
+    def _add_fact(self, name, local_name, context_ref, unit_ref, decimals, value, label):
+        context = self.contexts.get(context_ref)
+        if context is None:
+            return
+        if context.dimensions:
+            if not self.include_dimensions:
+                return
+            name = _get_dimensional_name(name, context.dimensions)
+
+        key = (context.date, context.months)
+        if key not in self.financial_info:
+            self.financial_info[key] = FinancialInfo(context.date, context.months, {})
+        financial_info_map = self.financial_info[key].map
+
+        if name not in financial_info_map:
+            # duplicate facts have the same value, the first one wins
+            financial_info_map[_intern(name)] = XbrlFinancialElement(label or self.labels.get(name, local_name),
+                                                                     value, self.units.get(unit_ref), decimals)
+
+    def get_financial_info(self):
+        '''
+        Returns the list of FinancialInfo objects, most recent periods first
+        like the rendered reports
+        '''
+        for fact in self.pending_facts:
+            self._add_fact(*fact)
+        self.pending_facts = []
+
+        return sorted(self.financial_info.values(), key=lambda info: (info.date, info.months or 0), reverse=True)
+
+
+def _process_facts(xml_text, labels=None, include_dimensions=False):
+    '''
+    Returns a list of FinancialInfo objects, one per period, with every
+    numeric fact in the XBRL instance xml_text, in one pass over xml_text.
+    Non-numeric facts (text blocks, dei information) and nil facts are
+    skipped, as are facts with a unit whose value isn't a number (with a
+    warning)
+
+    :param labels: see FinancialInfoBuilder
+    :param include_dimensions: see FinancialInfoBuilder
+    '''
+    namespaces = {}
+    builder = FinancialInfoBuilder(labels, include_dimensions)
+
+    for element in _iter_top_level_elements(xml_text, namespaces):
+        uri, local_name = _split_tag(element.tag)
+
+        if uri == XBRLI_NS and local_name == 'context':
+            builder.add_context(_process_context(element))
+            continue
+        if uri == XBRLI_NS and local_name == 'unit':
+            builder.add_unit(element.get('id'), _process_unit(element))
+            continue
+
+        unit_ref = element.get('unitRef')
+        if uri in NON_FACT_NAMESPACES or unit_ref is None or element.get('{%s}nil' % XSI_NS) == 'true':
+            continue
+
+        name = _qualified_name(uri, local_name, namespaces)
+        try:
+            value = float(element.text)
+        except (ValueError, TypeError):
+            print('Warning: {} (from {}) is not numeric - ignoring'.format(element.text, name))
+            continue
+        builder.add_fact(name, local_name, element.get('contextRef'), unit_ref, element.get('decimals'), value)
+
+    return builder.get_financial_info()
+
+
+def read_labels(label_xml_text):
+    '''
+    Returns {xbrl element name:standard label} from a label linkbase
+    (EX-101.LAB), e.g. {'us-gaap_SalesRevenueNet': 'Sales Revenue, Net'}
+
+    :param label_xml_text: xml of the label linkbase
+    '''
+    # {locator label:element name}, {label resource label:text}, [(from, to)]
+    locators = {}
+    resources = {}
+    arcs = []
+    namespaces = {}
+
+    for label_link in _iter_top_level_elements(label_xml_text, namespaces):
+        for element in label_link:
+            uri, local_name = _split_tag(element.tag)
+            if uri != LINK_NS:
+                continue
+            xlink_label = element.get('{%s}label' % XLINK_NS)
+            if local_name == 'loc':
+                locators[xlink_label] = element.get('{%s}href' % XLINK_NS).split('#')[-1]
+            elif local_name == 'label':
+                if element.get('{%s}role' % XLINK_NS, STANDARD_LABEL_ROLE) == STANDARD_LABEL_ROLE:
+                    resources[xlink_label] = (element.text or '').strip()
+            elif local_name == 'labelArc':
+                arcs.append((element.get('{%s}from' % XLINK_NS), element.get('{%s}to' % XLINK_NS)))
+
+    labels = {}
+    for from_label, to_label in arcs:
+        if from_label in locators and to_label in resources:
+            labels.setdefault(locators[from_label], resources[to_label])
+    return labels
+
+
+def get_xbrl_financial_report(company, date_filed, xml_text, label_xml_text=None, include_dimensions=False):
+    '''
+    Returns a FinancialReport with every numeric fact of an XBRL instance
+
+    :param company: identifier of the company that the instance belongs to
+    :param date_filed: datetime representing ACCEPTANCE-DATETIME of Filing
+    :param xml_text: xml of the XBRL instance document
+    :param label_xml_text: optional xml of the label linkbase of the filing,
+        used for the labels of the FinancialElements
+    :param include_dimensions: see _process_facts
+    '''
+    with stage(XBRL_STAGE):
+        labels = read_labels(label_xml_text) if label_xml_text else None
+        financial_info = _process_facts(xml_text, labels, include_dimensions)
+    return FinancialReport(company, date_filed, financial_info)
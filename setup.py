@@ -6,10 +6,17 @@ here = os.path.abspath(os.path.dirname(__file__))
 
 requires = [
     'pandas>=0.22.0',
+    'numpy>=1.14.0',
     'beautifulsoup4==4.9.0',
     'word2number==1.1'
 ]
 
+extras = {
+    'lxml': ['lxml>=4.0.0'],
+    'arrow': ['pyarrow>=1.0.0'],
+    'orjson': ['orjson>=3.0.0'],
+}
+
 test_requirements = [
     'pytest==4.0.1'
 ]
@@ -35,6 +42,10 @@ setup(
     keywords=['sec', 'edgar', 'financials', 'stock', 'fundamental', 'analysis'],
     python_requires=">=3.6.10",
     install_requires=requires,
+    extras_require=extras,
+    entry_points={
+        'console_scripts': ['edgar-bulk=edgar.bulk:main', 'edgar-jobs=edgar.jobs:main'],
+    },
     tests_require=test_requirements,
     classifiers=[
         'Intended Audience :: Developers',
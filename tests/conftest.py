@@ -0,0 +1,36 @@
+import os
+import pytest
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data')
+
+
+def read_data_file(filename):
+    with open(os.path.join(DATA_DIR, filename), mode='r', encoding='utf-8') as f:
+        return f.read()
+
+
+class FakeGetRequest:
+    '''
+    Stands in for edgar.requests_wrapper.GetRequest, serving the sample filing
+    in tests/data regardless of the url
+    '''
+    text = None
+
+    def __init__(self, url):
+        self.url = url
+        self.response = self
+
+
+@pytest.fixture
+def sample_filing_text():
+    return read_data_file('sample_filing.txt')
+
+
+@pytest.fixture
+def offline_filing(monkeypatch, sample_filing_text):
+    '''
+    Patches the Filing download so that any url returns the sample filing
+    '''
+    FakeGetRequest.text = sample_filing_text
+    monkeypatch.setattr('edgar.filing.GetRequest', FakeGetRequest)
+    return FakeGetRequest
@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import threading
+from edgar.bulk import BulkExtractor, read_checkpoint, read_output, CHECKPOINT_FILE, FAILURES_FILE
+from edgar.edgar import FilingInfo
+from tests.conftest import read_data_file
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+FAILING_FILE = 'edgar/data/320193/0000320193-16-000099.txt'
+
+
+def get_filing_infos():
+    return [FilingInfo('APPLE INC', '10-Q', '320193', '2016-01-27',
+                       'edgar/data/320193/0000320193-16-00007{}.txt'.format(i)) for i in range(3)] + \
+           [FilingInfo('APPLE INC', '10-Q', '320193', '2016-01-27', FAILING_FILE)]
+
+
+class BulkGetRequest:
+    text = read_data_file('sample_filing.txt')
+    urls = []
+
+    def __init__(self, url):
+        if url.endswith(FAILING_FILE):
+            raise ConnectionError('{} is unavailable'.format(url))
+        BulkGetRequest.urls.append(url)
+        self.response = self
+
+
+def test_bulk_extraction(monkeypatch, tmp_path):
+    monkeypatch.setattr('edgar.bulk.GetRequest', BulkGetRequest)
+    output_directory = str(tmp_path)
+
+    extractor = BulkExtractor(output_directory, statements=['income_statements', 'cash_flows'], max_workers=2,
+                              requests_per_second=100, queue_size=2)
+    assert extractor.run(get_filing_infos()) == 3
+    assert extractor.failed == 1
+
+    assert read_checkpoint(output_directory) == {'0000320193-16-00007{}'.format(i) for i in range(3)}
+    with open(os.path.join(output_directory, 'income_statements.ndjson'), encoding='utf-8') as f:
+        records = list(read_output(f))
+    # each statement with the filing it's from
+    assert sorted(accession_number for accession_number, _, _ in records) == \
+        ['0000320193-16-00007{}'.format(i) for i in range(3)]
+    accession_number, url, income_statement = records[0]
+    assert url.endswith(accession_number + '.txt')
+    assert income_statement.company == '320193'
+    assert 'us-gaap_SalesRevenueNet' in income_statement.reports[0].map
+    assert os.path.exists(os.path.join(output_directory, 'cash_flows.ndjson'))
+    assert not os.path.exists(os.path.join(output_directory, 'balance_sheets.ndjson'))
+
+    with open(os.path.join(output_directory, FAILURES_FILE), encoding='utf-8') as f:
+        failure = json.loads(f.readline())
+    assert failure['accession_number'] == '0000320193-16-000099'
+    assert failure['stage'] == 'fetch'
+    assert 'ConnectionError' in failure['error']
+
+    # resuming only retries the failed filing
+    BulkGetRequest.urls = []
+    extractor = BulkExtractor(output_directory, statements=['income_statements', 'cash_flows'], max_workers=2)
+    assert extractor.run(get_filing_infos()) == 0
+    assert extractor.skipped == 3 and extractor.failed == 1
+    assert BulkGetRequest.urls == []
+    with open(os.path.join(output_directory, CHECKPOINT_FILE), encoding='utf-8') as f:
+        assert len(f.readlines()) == 3
+
+
+class FailingWriteExtractor(BulkExtractor):
+    def _write(self, result_queue):
+        result_queue.get()
+        # the results of the other filings fill result_queue in the meantime
+        time.sleep(0.5)
+        raise OSError('No space left on device')
+
+
+def test_write_error_is_raised(monkeypatch, tmp_path):
+    monkeypatch.setattr('edgar.bulk.GetRequest', BulkGetRequest)
+    extractor = FailingWriteExtractor(str(tmp_path), max_workers=2, requests_per_second=1000, queue_size=2)
+    errors = []
+
+    def run():
+        try:
+            extractor.run(get_filing_infos() * 3)
+        except OSError as e:
+            errors.append(e)
+
+    # run raises the error instead of hanging on the results it no longer reads
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(20)
+    assert not thread.is_alive()
+    assert 'No space left' in str(errors[0])
+
+
+def test_no_accession_number(monkeypatch, tmp_path):
+    monkeypatch.setattr('edgar.bulk.GetRequest', BulkGetRequest)
+    output_directory = str(tmp_path)
+    filing_infos = [FilingInfo('APPLE INC', '10-Q', '320193', '2016-01-27', 'edgar/data/320193/filing.txt')]
+
+    extractor = BulkExtractor(output_directory, statements=['income_statements'], max_workers=1)
+    assert extractor.run(filing_infos) == 0
+    assert extractor.failed == 1
+    with open(os.path.join(output_directory, FAILURES_FILE), encoding='utf-8') as f:
+        failure = json.loads(f.readline())
+    assert failure['stage'] == 'write'
+    assert 'no accession number' in failure['error']
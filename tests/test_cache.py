@@ -0,0 +1,93 @@
+import os
+import threading
+import pytest
+from edgar.filing import Filing
+from edgar.cache import ResultCache, get_parser_version
+from edgar.edgar import get_accession_number
+from edgar.serialization import dumps
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+SAMPLE_URL = 'https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000070.txt'
+
+
+class FailingGetRequest:
+    def __init__(self, url):
+        raise AssertionError('{} should not be fetched'.format(url))
+
+
+@pytest.mark.parametrize('in_directory', [False, True])
+def test_cache_hit_does_not_fetch(offline_filing, monkeypatch, tmp_path, in_directory):
+    cache = ResultCache(str(tmp_path) if in_directory else None)
+    income_statements = Filing(SAMPLE_URL, company='AAPL', cache=cache).get_income_statements()
+    assert cache.misses == 1 and len(cache) == 1
+
+    monkeypatch.setattr('edgar.filing.GetRequest', FailingGetRequest)
+    if in_directory:
+        # a new cache over the same directory, as in a later run
+        cache = ResultCache(str(tmp_path))
+    cached_income_statements = Filing(SAMPLE_URL, company='AAPL', cache=cache).get_income_statements()
+    assert cache.hits == 1
+    assert dumps(cached_income_statements) == dumps(income_statements)
+
+
+def test_cache_keys():
+    key = ResultCache.get_key(SAMPLE_URL, 'income_statements', 'html.parser', 'AAPL')
+    assert key == ResultCache.get_key(SAMPLE_URL.replace('.txt', '-index.htm'), 'income_statements',
+                                      'html.parser', 'AAPL')
+    assert key != ResultCache.get_key(SAMPLE_URL, 'balance_sheets', 'html.parser', 'AAPL')
+    assert key != ResultCache.get_key(SAMPLE_URL, 'income_statements', 'lxml', 'AAPL')
+    assert len(get_parser_version()) == 16
+    assert get_accession_number(SAMPLE_URL) == '0000320193-16-000070'
+
+
+@pytest.mark.parametrize('in_directory', [False, True])
+def test_lru_eviction(tmp_path, in_directory):
+    cache = ResultCache(str(tmp_path) if in_directory else None)
+    for key in ['a', 'b', 'c']:
+        cache.put(key, key * 100)
+    # room for exactly three results
+    cache.max_bytes = cache.total_bytes
+    assert cache.get('a') == 'a' * 100
+    cache.put('d', 'd' * 100)
+
+    assert 'b' not in cache
+    assert [key in cache for key in ['a', 'c', 'd']] == [True, True, True]
+    assert cache.total_bytes <= cache.max_bytes
+    if in_directory:
+        assert sorted(ResultCache(str(tmp_path)).sizes) == ['a', 'c', 'd']
+
+
+@pytest.mark.parametrize('in_directory', [False, True])
+def test_threads(tmp_path, in_directory):
+    cache = ResultCache(str(tmp_path) if in_directory else None)
+    keys = ['a', 'b', 'c', 'd']
+    # room for about two results, so that the threads evict each other's
+    cache.put('a', 'a' * 1000)
+    cache.max_bytes = cache.total_bytes * 2
+    errors = []
+
+    def work(thread):
+        try:
+            for i in range(200):
+                key = keys[(thread + i) % len(keys)]
+                cache.put(key, key * 1000)
+                result = cache.get(key)
+                assert result is None or result == key * 1000
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(thread,)) for thread in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert cache.total_bytes == sum(cache.sizes.values())
+    if in_directory:
+        assert sorted(filename for filename in os.listdir(str(tmp_path))) == \
+            sorted(key + '.pickle.z' for key in cache.sizes)
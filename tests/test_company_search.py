@@ -0,0 +1,78 @@
+import edgar.company_search as company_search
+from edgar.company_search import CompanyIndex, normalize_name, search_companies, set_company_index, \
+    get_company_index, DEFAULT_QUARTERS
+from edgar.edgar import FilingInfo
+from edgar.requests_wrapper import RequestException
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+COMPANIES = [('APPLE COMPUTER INC', '320193'), ('APPLE INC', '320193'), ('APPLE HOSPITALITY REIT, INC.', '1418121'),
+             ('APPLIED MATERIALS INC /DE', '6951'), ('BANK OF AMERICA CORP /DE/', '70858'),
+             ('MICROSOFT CORP', '789019'), ('BERKSHIRE HATHAWAY INC', '1067983'),
+             ('BERKSHIRE HILLS BANCORP INC', '1108134')]
+
+
+def get_names(companies):
+    return [company.name for company in companies]
+
+
+def test_search():
+    index = CompanyIndex(COMPANIES)
+    assert len(index) == 7
+    assert normalize_name('Bank of America Corp /DE/') == 'bank of america corp de'
+
+    # names starting with the query, then names with words starting with its words, then similar names
+    assert get_names(index.search('apple')) == ['APPLE HOSPITALITY REIT, INC.', 'APPLE INC']
+    assert get_names(index.search('appl', limit=2)) == ['APPLE HOSPITALITY REIT, INC.', 'APPLE INC']
+    assert get_names(index.search('Berkshire H')) == ['BERKSHIRE HATHAWAY INC', 'BERKSHIRE HILLS BANCORP INC']
+    assert get_names(index.search('bank america')) == ['BANK OF AMERICA CORP /DE/']
+    assert get_names(index.search('hathaway')) == ['BERKSHIRE HATHAWAY INC']
+    assert get_names(index.search('micrsoft')) == ['MICROSOFT CORP']
+
+    # by symbol, from symbols.csv
+    apple = index.search('AAPL')[0]
+    assert (apple.name, apple.cik, apple.symbol) == ('APPLE INC', '320193', 'AAPL')
+
+    assert index.search('') == []
+    assert index.search('zzzzzzzz') == []
+
+
+def test_search_companies():
+    set_company_index(CompanyIndex.from_filing_infos(
+        [FilingInfo('MICROSOFT CORP', '10-K', '789019', '2019-08-01', 'edgar/data/789019/0001564590-19-027952.txt')]))
+    try:
+        assert [company.cik for company in search_companies('microsoft')] == ['789019']
+    finally:
+        set_company_index(None)
+
+
+def test_default_index(monkeypatch):
+    quarters = []
+
+    def fake_get_filing_info(year, quarter):
+        quarters.append((year, quarter))
+        if len(quarters) == DEFAULT_QUARTERS:
+            # the index of the quarter that just started isn't there yet
+            raise RequestException('404')
+        if len(quarters) == 1:
+            return [FilingInfo('MICROSOFT CORPORATION', '10-K', '789019', '2019-08-01', 'edgar/data/789019/1.txt')]
+        return [FilingInfo('MICROSOFT CORP', '10-Q', '789019', '2019-10-01', 'edgar/data/789019/2.txt'),
+                FilingInfo('BERKSHIRE HATHAWAY INC', '10-Q', '1067983', '2019-10-01', 'edgar/data/1067983/3.txt')]
+
+    monkeypatch.setattr(company_search, 'get_filing_info', fake_get_filing_info)
+    set_company_index(None)
+    try:
+        index = get_company_index()
+        # oldest quarter first, so the latest names win
+        assert len(set(quarters)) == DEFAULT_QUARTERS and quarters == sorted(quarters)
+        assert get_names(search_companies('microsoft')) == ['MICROSOFT CORP']
+        assert get_names(search_companies('berkshire')) == ['BERKSHIRE HATHAWAY INC']
+        # from symbols.csv, without a filing in the indexes
+        apple = search_companies('AAPL')[0]
+        assert (apple.name, apple.cik, apple.symbol) == (None, '320193', 'AAPL')
+        assert len(index) > 3
+    finally:
+        set_company_index(None)
@@ -0,0 +1,45 @@
+import pytest
+from edgar.filing import Filing
+from edgar.container import ContainerException
+from edgar.serialization import dumps
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+SAMPLE_URL = 'https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000070.txt'
+
+
+class FailingGetRequest:
+    def __init__(self, url):
+        raise AssertionError('{} should not be fetched'.format(url))
+
+
+def test_from_container(offline_filing, monkeypatch, tmp_path):
+    path = str(tmp_path / 'filing.edgar')
+    filing = Filing(SAMPLE_URL, company='AAPL')
+    filing.to_container(path)
+
+    monkeypatch.setattr('edgar.filing.GetRequest', FailingGetRequest)
+    container_filing = Filing.from_container(path, company='AAPL')
+    assert container_filing.url == SAMPLE_URL
+    assert container_filing.date_filed == filing.date_filed
+    assert list(container_filing.documents) == list(filing.documents)
+    # documents are only built when used
+    assert container_filing.container.documents.documents == {}
+
+    assert [dumps(report) for report in container_filing.get_financial_data()] == \
+        [dumps(report) for report in filing.get_financial_data()]
+    assert dumps(container_filing.get_xbrl_financial_data()) == dumps(filing.get_xbrl_financial_data())
+    for filename, document in filing.documents.items():
+        assert container_filing.documents[filename].doc_text.data == document.doc_text.data
+        assert container_filing.documents[filename].description == document.description
+    container_filing.container.close()
+
+
+def test_not_a_container(tmp_path):
+    path = tmp_path / 'filing.txt'
+    path.write_text('<SEC-DOCUMENT>')
+    with pytest.raises(ContainerException):
+        Filing.from_container(str(path))
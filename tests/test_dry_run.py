@@ -0,0 +1,96 @@
+import json
+import threading
+import pytest
+from edgar.cache import ResultCache
+from edgar.dry_run import DryRun, DryRunException, is_index_url, get_filing_index_url
+from edgar.edgar import FilingInfo
+from edgar.financials import DEFAULT_PARSER
+from edgar.requests_wrapper import GetRequest
+from edgar.stock import Stock
+
+FILING_URL = 'https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000070.txt'
+CACHED_FILING_URL = 'https://www.sec.gov/Archives/edgar/data/320193/0000320193-15-000050.txt'
+MASTER_IDX = '\n'.join(['header'] * 11 + [
+    '1000209|MEDALLION FINANCIAL CORP|10-Q|2016-02-08|edgar/data/1000209/0001193125-16-004285.txt',
+    '1000228|HENRY SCHEIN INC|10-Q|2016-02-09|edgar/data/1000228/0001193125-16-003023.txt',
+    '320193|APPLE INC|10-Q|2016-01-27|edgar/data/320193/0000320193-16-000070.txt',
+    '789019|MICROSOFT CORP|10-Q|2016-01-28|edgar/data/789019/0000789019-16-000001.txt',
+    ''])
+FILING_INDEX_JSON = json.dumps({'directory': {'item': [
+    {'name': '0000320193-16-000070-index.htm', 'size': ''},
+    {'name': '0000320193-16-000070.txt', 'size': '2500000'},
+    {'name': 'aapl-20151226.xml', 'size': '1200000'}]}})
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+        self.content = text.encode('utf-8')
+
+
+def fake_get(url):
+    if url.endswith('master.idx'):
+        return FakeResponse(MASTER_IDX)
+    if url == get_filing_index_url(FILING_URL):
+        return FakeResponse(FILING_INDEX_JSON)
+    raise AssertionError('{} was downloaded'.format(url))
+
+
+def test_is_index_url():
+    assert is_index_url('https://www.sec.gov/Archives/edgar/full-index/2016/QTR1/master.idx')
+    assert is_index_url('https://www.sec.gov/Archives/edgar/daily-index/2019/QTR1/master.20190102.idx')
+    assert is_index_url(get_filing_index_url(FILING_URL))
+    assert not is_index_url(FILING_URL)
+    assert get_filing_index_url(FILING_URL) == \
+        'https://www.sec.gov/Archives/edgar/data/320193/000032019316000070/index.json'
+
+
+def test_dry_run(monkeypatch):
+    monkeypatch.setattr('requests.get', fake_get)
+    cache = ResultCache()
+    cache.put(cache.get_key(CACHED_FILING_URL, 'income_statements', DEFAULT_PARSER, 'AAPL'), None)
+
+    with DryRun(cache=cache, requests_per_second=4) as dry_run:
+        filing = Stock('AAPL').get_filing(period='quarterly', year=2016, quarter=1)
+        dry_run.add_filing(filing, ['income_statements'])
+        dry_run.add_filing_infos([FilingInfo('APPLE INC', '10-K', '320193', '2015-10-28',
+                                             'edgar/data/320193/0000320193-15-000050.txt')],
+                                 ['income_statements'], company='AAPL')
+        # using the filing would download it
+        with pytest.raises(DryRunException):
+            filing.get_income_statements()
+
+    assert dry_run.index_urls == ['https://www.sec.gov/Archives/edgar/full-index/2016/QTR1/master.idx']
+    assert dry_run.index_bytes == len(MASTER_IDX)
+    assert dry_run.hits == [CACHED_FILING_URL]
+    assert set(dry_run.misses) == {FILING_URL}
+    assert dry_run.request_count == 1
+    assert dry_run.estimated_seconds == 0.25
+
+    # from the size of the complete submission text file
+    assert dry_run.estimate_sizes() == 2500000
+    assert dry_run.index_urls[-1] == get_filing_index_url(FILING_URL)
+
+
+def test_other_threads(monkeypatch):
+    monkeypatch.setattr('requests.get', lambda url: FakeResponse('filing'))
+    responses = []
+
+    with DryRun() as dry_run:
+        # a download on another thread isn't part of the dry run
+        thread = threading.Thread(target=lambda: responses.append(GetRequest(FILING_URL).response))
+        thread.start()
+        thread.join()
+        with pytest.raises(DryRunException):
+            GetRequest(FILING_URL)
+
+    assert [response.text for response in responses] == ['filing']
+    assert dry_run.misses == [FILING_URL]
+    # and nothing is listening anymore
+    assert GetRequest(FILING_URL).response.text == 'filing'
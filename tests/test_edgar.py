@@ -1,7 +1,8 @@
 import pytest
 import re
 from datetime import datetime
-from edgar.edgar import get_filing_info, SUPPORTED_FORMS, InvalidInputException
+from edgar.edgar import get_filing_info, get_daily_filing_info, get_daily_index_dates, SUPPORTED_FORMS, \
+    InvalidInputException, FilingInfo
     
 def setup_module(module):
     print('setup_module      module:%s' % module.__name__)
@@ -18,6 +19,48 @@ def test_get_filing_info():
         validate_filing_info(filing_info)
 
 
+DAILY_INDEX = '''Description:           Daily Index of EDGAR Dissemination Feed by Company Name
+Last Data Received:    Jan 02, 2019
+Comments:              webmaster@sec.gov
+Anonymous FTP:         ftp://ftp.sec.gov/edgar/
+
+
+
+
+CIK|Company Name|Form Type|Date Filed|File Name
+--------------------------------------------------------------------------------
+1000045|NICHOLAS FINANCIAL INC|4|20190102|edgar/data/1000045/0001000045-19-000001.txt
+1000209|MEDALLION FINANCIAL CORP|8-K|20190102|edgar/data/1000209/0001193125-19-000470.txt
+'''
+
+DAILY_INDEX_JSON = '''{"directory": {"item": [
+    {"name": "company.20190103.idx", "type": "file", "href": "company.20190103.idx"},
+    {"name": "master.20190103.idx", "type": "file", "href": "master.20190103.idx"},
+    {"name": "master.20190102.idx", "type": "file", "href": "master.20190102.idx"},
+    {"name": "master.20190102.idx.gz", "type": "file", "href": "master.20190102.idx.gz"}
+]}}'''
+
+
+def test_daily_index(monkeypatch):
+    urls = []
+
+    class DailyIndexRequest:
+        def __init__(self, url):
+            urls.append(url)
+            self.response = self
+            self.text = DAILY_INDEX_JSON if url.endswith('index.json') else DAILY_INDEX
+
+    monkeypatch.setattr('edgar.edgar.GetRequest', DailyIndexRequest)
+    assert get_daily_index_dates(2019, 1) == [datetime(2019, 1, 2), datetime(2019, 1, 3)]
+
+    filing_infos = get_daily_filing_info(datetime(2019, 1, 2), forms=['4'])
+    assert urls[-1] == 'https://www.sec.gov/Archives/edgar/daily-index/2019/QTR1/master.20190102.idx'
+    assert len(filing_infos) == 1
+    assert filing_infos[0].cik == '1000045'
+    assert filing_infos[0].date_filed == '2019-01-02'
+    assert filing_infos[0].url == 'https://www.sec.gov/Archives/edgar/data/1000045/0001000045-19-000001.txt'
+
+
 def validate_filing_info(filing_info):
     validate_company(filing_info)
     validate_form(filing_info)
@@ -55,6 +98,14 @@ def validate_url(filing_info):
     assert pattern.search(filing_info.url) is not None
 
 
+def test_filing_info_not_strings():
+    filing_info = FilingInfo('APPLE INC', '10-Q', 320193, None, 'edgar/data/320193/0000320193-16-000070.txt')
+    # kept as they are
+    assert filing_info.cik == 320193
+    assert filing_info.date_filed is None
+    assert filing_info.accession_number == '0000320193-16-000070'
+
+
 
 def test_get_filing_info_forms_filter():
     forms = ['4', '10-Q']
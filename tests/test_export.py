@@ -0,0 +1,60 @@
+import pytest
+from datetime import datetime
+from edgar.filing import Filing
+from edgar.financials import FinancialReport, FinancialInfo, FinancialElement
+from edgar.export import reports_to_frame, reports_to_table, write_parquet, COLUMNS
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+SAMPLE_URL = 'https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000070.txt'
+
+
+def get_financial_reports():
+    return [
+        FinancialReport('AAPL', datetime(2016, 1, 27), [
+            FinancialInfo(datetime(2015, 12, 26), 3, {
+                'us-gaap_SalesRevenueNet': FinancialElement('Net sales', 75872000000.0),
+                'us-gaap_EarningsPerShareBasic': FinancialElement('Basic (in dollars per share)', 3.3)}),
+            FinancialInfo(datetime(2015, 9, 26), None, {
+                'us-gaap_Assets': FinancialElement('Total assets', 290479000000.0),
+                'dei_DocumentType': FinancialElement('DocumentType', '10-Q')})]),
+        FinancialReport('MSFT', datetime(2016, 1, 28), [
+            FinancialInfo(datetime(2015, 12, 31), 6, {'us-gaap_Revenues': FinancialElement('Revenue', 44574000000)})]),
+    ]
+
+
+def test_reports_to_frame():
+    frame = reports_to_frame(get_financial_reports())
+
+    assert list(frame.columns) == COLUMNS
+    assert list(frame['company']) == ['AAPL', 'AAPL', 'AAPL', 'MSFT']
+    assert list(frame['element']) == ['us-gaap_SalesRevenueNet', 'us-gaap_EarningsPerShareBasic', 'us-gaap_Assets',
+                                      'us-gaap_Revenues']
+    assert list(frame['value']) == [75872000000.0, 3.3, 290479000000.0, 44574000000.0]
+    assert frame['months'].isna().tolist() == [False, False, True, False]
+    assert frame['date'][2] == datetime(2015, 9, 26)
+    assert frame.groupby('company')['value'].count().to_dict() == {'AAPL': 3, 'MSFT': 1}
+
+
+def test_to_frame(offline_filing):
+    financial_report = Filing(SAMPLE_URL, company='AAPL').get_income_statements()
+    frame = financial_report.to_frame()
+    assert len(frame) == sum(len(financial_info.map) for financial_info in financial_report.reports)
+    assert frame[frame['element'] == 'us-gaap_SalesRevenueNet']['value'].tolist() == [75872000000.0, 74599000000.0]
+
+
+def test_reports_to_table(tmp_path):
+    pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+
+    table = reports_to_table(get_financial_reports())
+    assert table.column_names == COLUMNS
+    assert table.column('value').to_pylist() == [75872000000.0, 3.3, 290479000000.0, 44574000000.0]
+    assert table.column('months').to_pylist() == [3, 3, None, 6]
+
+    path = str(tmp_path / 'reports.parquet')
+    write_parquet(get_financial_reports(), path)
+    assert pq.read_table(path).equals(table)
@@ -1,6 +1,8 @@
 import pytest
 import json
 from edgar.stock import Stock
+import edgar.filing as filing_module
+from edgar.filing import Filing
 from edgar.financials import FinancialReportEncoder
 
     
@@ -61,4 +63,81 @@ def test_get_cash_flows():
     print(FinancialReportEncoder().encode(result)) # for easy QA using JSON
     # ensure certain data points are correct
     profit_loss = result.reports[0].map['us-gaap_ProfitLoss'].value
-    assert profit_loss == -745351000.0
\ No newline at end of file
+    assert profit_loss == -745351000.0
+
+############## Offline Testing ##############
+
+SAMPLE_URL = 'https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000070.txt'
+
+
+def test_get_financial_data_filing_summary_order(offline_filing):
+    filing = Filing(SAMPLE_URL, company='AAPL')
+    result = filing.get_financial_data()
+    assert len(result) == 3
+    assert 'us-gaap_SalesRevenueNet' in result[0].reports[0].map
+    assert 'us-gaap_Assets' in result[1].reports[0].map
+    assert 'us-gaap_NetIncomeLoss' in result[2].reports[0].map
+
+
+def test_get_financial_data_concurrently(offline_filing):
+    filing = Filing(SAMPLE_URL, company='AAPL')
+    encoder = FinancialReportEncoder()
+    expected = [encoder.encode(report) for report in filing.get_financial_data()]
+    result = [encoder.encode(report) for report in filing.get_financial_data(max_workers=2)]
+    assert result == expected
+
+    # the process pool is started once and reused
+    executor = filing_module._process_pools[2]
+    other_filing = Filing(SAMPLE_URL, company='AAPL')
+    assert [encoder.encode(report) for report in other_filing.get_financial_data(max_workers=2)] == expected
+    assert filing_module._process_pools[2] is executor
+
+
+def test_get_financial_data_executor(offline_filing):
+    from concurrent.futures import ThreadPoolExecutor
+
+    filing = Filing(SAMPLE_URL, company='AAPL')
+    encoder = FinancialReportEncoder()
+    expected = [encoder.encode(report) for report in filing.get_financial_data()]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        result = [encoder.encode(report) for report in
+                  Filing(SAMPLE_URL, company='AAPL').get_financial_data(executor=executor)]
+    assert result == expected
+
+
+class BrokenExecutor:
+    def submit(self, function, *args):
+        from concurrent.futures.process import BrokenProcessPool
+        raise BrokenProcessPool('a worker died')
+
+
+def test_get_financial_data_executor_errors(sample_filing_text):
+    from concurrent.futures import ThreadPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    from edgar.cache import ResultCache
+
+    cache = ResultCache()
+    filing = Filing.from_text(SAMPLE_URL, sample_filing_text, company='AAPL', cache=cache)
+    # not mistaken for a filing in the old format
+    with pytest.raises(BrokenProcessPool):
+        filing.get_financial_data(executor=BrokenExecutor())
+    assert len(cache) == 0
+
+    executor = ThreadPoolExecutor(max_workers=2)
+    executor.shutdown()
+    with pytest.raises(RuntimeError):
+        filing.get_financial_data(executor=executor)
+    assert len(cache) == 0
+
+
+def test_failed_download_not_retried(monkeypatch):
+    urls = []
+
+    def failing_get_request(url):
+        urls.append(url)
+        raise ConnectionError('{} is unavailable'.format(url))
+
+    monkeypatch.setattr('edgar.filing.GetRequest', failing_get_request)
+    with pytest.raises(ConnectionError):
+        Filing(SAMPLE_URL, company='AAPL').get_income_statements()
+    assert urls == [SAMPLE_URL]
@@ -0,0 +1,108 @@
+import pytest
+import pickle
+from datetime import datetime
+from edgar.filing import Filing
+from edgar.financials import get_financial_report, get_old_financial_report, FinancialReportEncoder, PARSERS, \
+    FinancialReport, FinancialInfo, FinancialElement, LineItems, _process_financial_values, _get_unit_multipliers, \
+    _normalize_old_report_text
+from tests.conftest import read_data_file
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+SAMPLE_URL = 'https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000070.txt'
+STATEMENT_FILES = ['R2.htm', 'R4.htm', 'R7.htm']
+
+
+@pytest.mark.parametrize('filename', STATEMENT_FILES)
+def test_parsers_give_identical_reports(offline_filing, filename):
+    pytest.importorskip('lxml')
+    filing = Filing(SAMPLE_URL, company='AAPL')
+    financial_html_text = filing.documents[filename].doc_text.data
+    encoder = FinancialReportEncoder()
+
+    results = [encoder.encode(get_financial_report('AAPL', filing.date_filed, financial_html_text, parser))
+               for parser in PARSERS]
+    assert len(set(results)) == 1
+
+
+def test_get_financial_report_values(offline_filing):
+    filing = Filing(SAMPLE_URL, company='AAPL')
+    result = get_financial_report('AAPL', filing.date_filed, filing.documents['R2.htm'].doc_text.data)
+    assert result.reports[0].months == 3
+    assert result.reports[0].map['us-gaap_SalesRevenueNet'].value == 75872000000.0
+    assert result.reports[0].map['us-gaap_NonoperatingIncomeExpense'].value == -402000000.0
+    assert result.reports[0].map['us-gaap_EarningsPerShareBasic'].value == 3.3
+    assert result.reports[0].map['us-gaap_WeightedAverageNumberOfSharesOutstandingBasic'].value == 5558930000.0
+    assert 'aapl_RestructuringSpecialItem' not in result.reports[1].map
+
+
+def test_unknown_parser(offline_filing):
+    with pytest.raises(ValueError):
+        Filing(SAMPLE_URL, company='AAPL', parser='regex')
+
+
+def test_process_financial_values():
+    texts = ['$ 1,234', '(56)', '$ 3.30', '2,000', '—', '1.2.3', '']
+    xbrl_elements = ['us-gaap_Revenues', 'us-gaap_Revenues', 'us-gaap_EarningsPerShareBasic',
+                     'us-gaap_WeightedAverageNumberOfSharesOutstandingBasic', 'us-gaap_Revenues',
+                     'us-gaap_Revenues', 'us-gaap_Revenues']
+    values = _process_financial_values(texts, xbrl_elements, 'shares in Thousands, $ in Millions')
+    assert values == [1234000000.0, -56000000.0, 3.3, 2000000.0, None, None, None]
+
+
+def test_get_unit_multipliers():
+    assert _get_unit_multipliers('shares in Thousands, $ in Millions') == (1000, 1000000)
+    assert _get_unit_multipliers('$ in Billions') == (1, 1000000000)
+    assert _get_unit_multipliers('USD ($)') == (1, 1)
+
+
+def test_normalize_old_report_text():
+    text = 'Total liabilities and\n shareholders’\xa0equity\n$\n39,572\n\n(9\n\n)\n\nCommon stock, no\npar value'
+    assert _normalize_old_report_text(text) == 'Total liabilities and shareholders equity\n$\n39,572\n\n(9)\n\n' \
+                                               'Common stock, nopar value'
+
+
+def test_get_old_financial_report():
+    result = get_old_financial_report('AAPL', datetime(2008, 11, 5), read_data_file('legacy_10k.htm'))
+    balance_sheet, income_statement, cash_flow = result.reports
+    assert balance_sheet.date == datetime(2008, 9, 27)
+    assert balance_sheet.map['Total assets'].value == 39572000000
+    assert balance_sheet.map['Common stock'].value == 7177
+    assert balance_sheet.map['Accumulated other comprehensive (loss)/income'].value == -9000000
+    assert income_statement.map['Net sales'].value == 32479000000
+    assert income_statement.map['Restructuring costs'].value == 0
+    assert income_statement.map['Shares used in computing earnings per share Diluted'].value == 902139000
+    assert cash_flow.months == 12
+    assert cash_flow.map['None - Purchases of short-term investments'].value == -22965000000
+
+
+def test_line_items_index():
+    lines = ['Net sales', '10', 'Basic', '1', 'Diluted', '2', 'Net sales', 'Basic', '3']
+    items = LineItems(lines)
+    for line in set(lines):
+        for start in range(len(lines)):
+            try:
+                expected = lines.index(line, start)
+            except ValueError:
+                with pytest.raises(ValueError):
+                    items.index(line, start)
+            else:
+                assert items.index(line, start) == expected
+
+
+def test_slotted_financial_report():
+    financial_report = FinancialReport('AAPL', datetime(2016, 1, 27))
+    financial_report.add_financial_info(FinancialInfo(datetime(2015, 12, 26), 3, {
+        'us-gaap_SalesRevenueNet': FinancialElement('Net sales', 75872000000.0)}))
+
+    # the default reports aren't shared
+    assert FinancialReport('AAPL', datetime(2016, 1, 27)).reports == []
+    assert not hasattr(financial_report.reports[0].map['us-gaap_SalesRevenueNet'], '__dict__')
+    assert FinancialReportEncoder().encode(financial_report) == \
+        '{"company": "AAPL", "date_filed": "2016-01-27T00:00:00", "reports": [{"date": "2015-12-26T00:00:00", ' \
+        '"months": 3, "map": {"us-gaap_SalesRevenueNet": {"label": "Net sales", "value": 75872000000.0}}}]}'
+    assert pickle.loads(pickle.dumps(financial_report)).reports[0].map['us-gaap_SalesRevenueNet'].value == \
+        75872000000.0
@@ -0,0 +1,24 @@
+import pytest
+from bs4 import BeautifulSoup
+from edgar.html_text import extract_text
+from edgar.financials import OldStatementsRead
+from tests.conftest import read_data_file
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+@pytest.mark.parametrize('chunk_size', [7, 1024, 64 * 1024])
+def test_extract_text_matches_soup(chunk_size):
+    html_text = read_data_file('legacy_10k.htm') + \
+        '<script>var a = 1;</script><p>a<!-- c -->b<![CDATA[x]]>&#150;&amp;</p>'
+    expected = BeautifulSoup(html_text, 'html.parser').text.replace('\xa0', ' ')
+    assert extract_text(html_text, chunk_size=chunk_size) == expected
+
+
+def test_extract_text_stops_after_statements():
+    html_text = read_data_file('legacy_10k.htm')
+    text = extract_text(html_text, stop=OldStatementsRead(), chunk_size=64)
+    assert 'STATEMENTS OF CASH FLOWS' in text
+    assert 'networking solutions' not in text
@@ -0,0 +1,39 @@
+import sys
+import subprocess
+
+# microseconds that importing edgar.stock may take, well above its usual import time
+IMPORT_TIME_THRESHOLD = 300000
+# only imported by the code that needs them
+LAZY_MODULES = ['pandas', 'numpy', 'bs4', 'word2number', 'requests', 'lxml', 'pyarrow']
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+def get_import_times(module):
+    '''
+    Returns {module:cumulative import time in microseconds} of the modules
+    imported by importing module in a new interpreter
+    '''
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                            stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    import_times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                import_times[name.strip()] = int(cumulative)
+    return import_times
+
+
+def test_heavy_dependencies_are_lazy():
+    import_times = get_import_times('edgar.stock')
+    assert 'edgar.stock' in import_times
+    assert [module for module in import_times if module.split('.')[0] in LAZY_MODULES] == []
+
+
+def test_import_time():
+    # best of a few runs, since a single run can be slowed by the machine
+    import_time = min(get_import_times('edgar.stock')['edgar.stock'] for _ in range(3))
+    assert import_time < IMPORT_TIME_THRESHOLD
@@ -0,0 +1,98 @@
+import pytest
+from datetime import datetime
+from edgar.filing import Filing
+from edgar.inline_xbrl import get_inline_xbrl_financial_report, InlineXbrlParsingException, _process_inline_value
+from tests.conftest import read_data_file
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+SAMPLE_URL = 'https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000070.txt'
+
+
+def test_get_inline_xbrl_financial_report():
+    result = get_inline_xbrl_financial_report('AAPL', None, read_data_file('inline_10q.htm'))
+
+    assert [(info.date, info.months) for info in result.reports] == [
+        (datetime(2020, 12, 26), 3), (datetime(2020, 12, 26), None), (datetime(2019, 12, 28), 3)]
+    quarter = result.reports[0].map
+    revenue = quarter['us-gaap_RevenueFromContractWithCustomerExcludingAssessedTax']
+    assert (revenue.label, revenue.value, revenue.unit) == ('Total net sales', 111439000000.0, 'iso4217:USD')
+    assert quarter['us-gaap_NonoperatingIncomeExpense'].value == -45000000.0
+    assert quarter['us-gaap_NonoperatingIncomeExpense'].label == 'Other income/(expense), net'
+    assert quarter['aapl_SpecialItem'].value == 0
+    assert quarter['us-gaap_EarningsPerShareBasic'].unit == 'iso4217:USD/xbrli:shares'
+    assert quarter['us-gaap_WeightedAverageNumberOfSharesOutstandingBasic'].value == 16935119000.0
+    # hidden facts and facts nested in text blocks are included, the text blocks aren't
+    assert quarter['us-gaap_IncomeTaxesPaidNet'].value == 2000000000.0
+    assert quarter['us-gaap_EffectiveIncomeTaxRateContinuingOperations'].value == 0.144
+    assert 'us-gaap_IncomeTaxDisclosureTextBlock' not in quarter
+    assert result.reports[1].map['us-gaap_Assets'].value == 354054000000.0
+
+
+def test_non_numeric_and_dimensions():
+    result = get_inline_xbrl_financial_report('AAPL', None, read_data_file('inline_10q.htm'),
+                                              include_dimensions=True, include_non_numeric=True)
+    quarter = result.reports[0].map
+    assert quarter['dei_DocumentType'].value == '10-Q'
+    # ix:exclude content is left out
+    assert quarter['us-gaap_IncomeTaxDisclosureTextBlock'].value == 'The Company’s effective tax rate was 14.4%.'
+    assert quarter['us-gaap_RevenueFromContractWithCustomerExcludingAssessedTax'
+                   '[srt_ProductOrServiceAxis=us-gaap_ProductMember]'].value == 95678000000.0
+
+
+@pytest.mark.parametrize('text, format, scale, sign, value', [
+    ('1,234', 'ixt:num-dot-decimal', '3', None, 1234000.0),
+    ('1.234,5', 'ixt:numcommadecimal', None, '-', -1234.5),
+    ('—', 'ixt:fixed-zero', '6', None, 0.0),
+    ('no', 'ixt-sec:numwordsen', None, None, 0.0),
+    ('three', 'ixt-sec:numwordsen', None, None, 3.0),
+])
+def test_process_inline_value(text, format, scale, sign, value):
+    assert _process_inline_value(text, format, scale, sign) == value
+
+
+@pytest.mark.parametrize('text, format', [
+    ('(', 'ixt:num-dot-decimal'),
+    ('n/a', None),
+    ('1.2.3', 'ixt:num-dot-decimal'),
+    ('many', 'ixt-sec:numwordsen'),
+])
+def test_process_inline_value_not_a_number(text, format):
+    with pytest.raises(ValueError):
+        _process_inline_value(text, format)
+
+
+def test_malformed_and_continued_facts():
+    html_text = read_data_file('inline_10q.htm').replace(
+        '<p>CONDENSED CONSOLIDATED BALANCE SHEETS (Unaudited)</p>',
+        '<p><ix:nonFraction unitRef="usd" contextRef="i0c1" decimals="-6" name="us-gaap:Liabilities" '
+        'format="ixt:num-dot-decimal" scale="6">n/a</ix:nonFraction>'
+        '<ix:nonNumeric contextRef="i0c1" name="us-gaap:CommitmentsAndContingencies" continuedAt="c1">'
+        'Commitments start here</ix:nonNumeric></p>'
+        '<p>CONDENSED CONSOLIDATED BALANCE SHEETS (Unaudited)</p>'
+        '<ix:continuation id="c1" continuedAt="c2">and continue</ix:continuation>'
+        '<ix:continuation id="c2">to the end.</ix:continuation>')
+    result = get_inline_xbrl_financial_report('AAPL', None, html_text, include_non_numeric=True)
+    quarter = result.reports[0].map
+    # the fact that isn't a number is skipped, the others are still read
+    assert 'us-gaap_Liabilities' not in quarter
+    assert quarter['us-gaap_NonoperatingIncomeExpense'].value == -45000000.0
+    assert quarter['us-gaap_CommitmentsAndContingencies'].value == \
+        'Commitments start here and continue to the end.'
+
+
+def test_filing_falls_back_to_inline_xbrl(offline_filing):
+    sample_filing_text = read_data_file('sample_filing.txt').replace('EX-101.INS', 'EX-101.XXX')
+    offline_filing.text = sample_filing_text.replace('<html><body><p>Quarterly report</p></body></html>',
+                                                     '<XBRL>\n' + read_data_file('inline_10q.htm') + '\n</XBRL>')
+    filing = Filing(SAMPLE_URL, company='AAPL')
+    result = filing.get_xbrl_financial_data()
+    assert result.reports[1].map['us-gaap_Assets'].value == 354054000000.0
+
+
+def test_no_inline_facts():
+    with pytest.raises(InlineXbrlParsingException):
+        get_inline_xbrl_financial_report('AAPL', None, '<html><body><p>Quarterly report</p></body></html>')
@@ -0,0 +1,97 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import edgar.instrumentation as instrumentation
+from edgar.instrumentation import collect, stage, count, bind_context, FETCH_STAGE, SGML_STAGE, SOUP_STAGE, STATEMENTS_STAGE, \
+    BYTES_DOWNLOADED, CACHE_HITS, CACHE_MISSES, DOCUMENTS
+from edgar.cache import ResultCache
+from edgar.filing import Filing
+from edgar.requests_wrapper import GetRequest
+
+URL = 'https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000070.txt'
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+        self.content = text.encode('utf-8')
+
+
+def test_disabled():
+    assert instrumentation._listeners == ()
+    assert instrumentation._context_listeners.get() == ()
+    # the same do-nothing context manager every time
+    assert stage(FETCH_STAGE) is stage(SGML_STAGE)
+    with stage(FETCH_STAGE):
+        count(BYTES_DOWNLOADED, 10)
+
+
+def test_collect(monkeypatch, sample_filing_text):
+    monkeypatch.setattr('requests.get', lambda url: FakeResponse(sample_filing_text))
+    cache = ResultCache()
+
+    with collect() as report:
+        GetRequest(URL)
+        filing = Filing.from_text(URL, sample_filing_text, 'AAPL', cache=cache)
+        filing.get_income_statements()
+        Filing(URL, 'AAPL', cache=cache).get_income_statements()
+
+    assert instrumentation._listeners == ()
+    assert report.stages[FETCH_STAGE].calls == 1
+    assert report.stages[SGML_STAGE].calls == 1
+    assert report.stages[SOUP_STAGE].calls >= 1
+    assert report.stages[STATEMENTS_STAGE].calls == 1
+    assert report.stages[SGML_STAGE].wall_time > 0
+    assert report.counts[BYTES_DOWNLOADED] == len(sample_filing_text.encode('utf-8'))
+    assert report.counts[DOCUMENTS] == len(filing.documents)
+    assert report.counts[CACHE_MISSES] == 1
+    assert report.counts[CACHE_HITS] == 1
+
+    metrics = report.to_prometheus()
+    assert 'edgar_stage_calls_total{stage="sgml"} 1\n' in metrics
+    assert '# TYPE edgar_stage_wall_seconds_total counter\n' in metrics
+    assert 'edgar_cache_hits_total 1\n' in metrics
+
+
+def test_concurrent_collects():
+    barrier = threading.Barrier(2)
+    reports = {}
+
+    def work(documents):
+        with collect() as report:
+            # both collects are open at once
+            barrier.wait()
+            for _ in range(documents):
+                count(DOCUMENTS)
+            barrier.wait()
+        reports[documents] = report
+
+    threads = [threading.Thread(target=work, args=(documents,)) for documents in (1, 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert reports[1].counts == {DOCUMENTS: 1}
+    assert reports[2].counts == {DOCUMENTS: 2}
+
+
+def test_bind_context():
+    def work():
+        with stage(SGML_STAGE):
+            count(DOCUMENTS)
+
+    with collect() as report:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # the threads of the executor only see the listeners of the context they are bound to
+            executor.submit(work).result()
+            for future in [executor.submit(bind_context(work)) for _ in range(3)]:
+                future.result()
+
+    assert report.stages[SGML_STAGE].calls == 3
+    assert report.counts == {DOCUMENTS: 3}
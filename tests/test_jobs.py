@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import threading
+import pytest
+from edgar.jobs import JobQueue, JobQueueException, SharedRateLimiter, run_worker, merge_outputs, \
+    get_shard_directory, DONE, FAILED
+from edgar.bulk import read_checkpoint, read_output, FAILURES_FILE
+from tests.test_bulk import BulkGetRequest, get_filing_infos
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+def test_queue_leases(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    job_queue = JobQueue(path, shard_count=1)
+    assert job_queue.add(get_filing_infos()) == 4
+    assert job_queue.add(get_filing_infos()) == 0
+    assert [filing_info.url for filing_info in job_queue.get_filing_infos(0)] == \
+           sorted(filing_info.url for filing_info in get_filing_infos())
+
+    # a worker whose lease expired loses its shard to the next worker
+    assert job_queue.claim('a', lease_seconds=-1) == 0
+    assert job_queue.claim('b') == 0
+    assert job_queue.claim('c') is None
+    assert not job_queue.heartbeat('a', 0)
+    assert not job_queue.release('a', 0)
+    assert job_queue.heartbeat('b', 0)
+    assert job_queue.release('b', 0)
+    assert job_queue.get_status() == {DONE: 1}
+
+    assert JobQueue(path).shard_count == 1
+    with pytest.raises(JobQueueException):
+        JobQueue(path, shard_count=2)
+    with pytest.raises(JobQueueException):
+        JobQueue(str(tmp_path / 'other.db'))
+
+
+def test_shared_rate_limiter(tmp_path):
+    rate_limiters = [SharedRateLimiter(str(tmp_path / 'jobs.db'), 50) for _ in range(2)]
+    start = time.monotonic()
+    for _ in range(3):
+        for rate_limiter in rate_limiters:
+            rate_limiter.wait()
+    # the sixth request waits for the five before it
+    assert time.monotonic() - start >= 5 / 50
+
+
+def test_run_worker_and_merge(monkeypatch, tmp_path):
+    monkeypatch.setattr('edgar.bulk.GetRequest', BulkGetRequest)
+    job_queue = JobQueue(str(tmp_path / 'jobs.db'), shard_count=3, max_attempts=2)
+    job_queue.add(get_filing_infos())
+    output_directory = str(tmp_path / 'output')
+
+    with pytest.raises(JobQueueException):
+        merge_outputs(job_queue, output_directory)
+
+    # the shard of the failing filing is retried once, then given up
+    assert run_worker(job_queue, output_directory, requests_per_second=100, statements=['income_statements'],
+                      max_workers=1) == 3 + 1
+    assert job_queue.get_status() == {DONE: 2, FAILED: 1}
+
+    # a filing written again after a crash, and one that was written but never checkpointed
+    path = next(path for path in (os.path.join(get_shard_directory(output_directory, shard), 'income_statements.ndjson')
+                                  for shard in range(3)) if os.path.exists(path) and os.path.getsize(path))
+    with open(path, encoding='utf-8') as f:
+        line = f.readline()
+    with open(path, mode='a', encoding='utf-8') as f:
+        f.write(line)
+        f.write(line.replace('0000320193-16-00007', '0000320193-16-00008'))
+
+    assert merge_outputs(job_queue, output_directory, statements=['income_statements']) == 3
+    with open(os.path.join(output_directory, 'income_statements.ndjson'), encoding='utf-8') as f:
+        assert sorted(accession_number for accession_number, _, _ in read_output(f)) == \
+            ['0000320193-16-00007{}'.format(i) for i in range(3)]
+    assert read_checkpoint(output_directory) == {'0000320193-16-00007{}'.format(i) for i in range(3)}
+    with open(os.path.join(output_directory, FAILURES_FILE), encoding='utf-8') as f:
+        assert [json.loads(line)['accession_number'] for line in f] == ['0000320193-16-000099']
+
+
+def test_run_worker_lost_lease(monkeypatch, tmp_path):
+    job_queue = JobQueue(str(tmp_path / 'jobs.db'), shard_count=1, max_attempts=1)
+    job_queue.add(get_filing_infos()[:3])
+    output_directory = str(tmp_path / 'output')
+    lost = threading.Event()
+
+    def heartbeat(worker, shard, lease_seconds):
+        # another worker claimed the shard
+        lost.set()
+        return False
+
+    class SlowGetRequest(BulkGetRequest):
+        def __init__(self, url):
+            # the filings are still being extracted when the lease is lost
+            lost.wait()
+            time.sleep(0.05)
+            super().__init__(url)
+
+    monkeypatch.setattr('edgar.bulk.GetRequest', SlowGetRequest)
+    monkeypatch.setattr(job_queue, 'heartbeat', heartbeat)
+
+    # the shard isn't counted, and nothing is written to its output once the lease is lost
+    assert run_worker(job_queue, output_directory, lease_seconds=0.3, requests_per_second=100,
+                      statements=['income_statements'], max_workers=1) == 0
+    shard_directory = get_shard_directory(output_directory, 0)
+    assert read_checkpoint(shard_directory) == set()
+    for name in [FAILURES_FILE, 'income_statements.ndjson']:
+        assert os.path.getsize(os.path.join(shard_directory, name)) == 0
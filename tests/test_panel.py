@@ -0,0 +1,51 @@
+from edgar.edgar import FilingInfo
+from edgar.panel import get_panel
+from edgar.stock import NoFilingInfoException
+from tests.conftest import read_data_file
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+FAILING_FILE = 'edgar/data/789019/0000789019-16-000099.txt'
+
+
+class PanelGetRequest:
+    text = read_data_file('sample_filing.txt')
+    urls = []
+
+    def __init__(self, url):
+        PanelGetRequest.urls.append(url)
+        if url.endswith(FAILING_FILE):
+            raise ConnectionError('{} is unavailable'.format(url))
+        self.response = self
+
+
+def test_panel(monkeypatch):
+    index_reads = []
+
+    def fake_filing_info(cik='', forms=[], year=0, quarter=0):
+        index_reads.append((year, quarter))
+        return [FilingInfo('APPLE INC', '10-Q/A', '320193', '2016-03-01', 'edgar/data/320193/0000320193-16-000080.txt'),
+                FilingInfo('APPLE INC', '10-Q', '320193', '2016-01-27', 'edgar/data/320193/0000320193-16-000070.txt'),
+                FilingInfo('MICROSOFT CORP', '10-Q', '789019', '2016-01-28', FAILING_FILE),
+                FilingInfo('OTHER CORP', '10-Q', '1', '2016-01-28', 'edgar/data/1/0000000001-16-000001.txt')]
+
+    monkeypatch.setattr('edgar.panel.get_filing_info', fake_filing_info)
+    monkeypatch.setattr('edgar.filing.GetRequest', PanelGetRequest)
+
+    frame, errors = get_panel(['AAPL', 'MSFT', 'IDRA', 'NOPE', 'AAPL'], period='quarterly', year=2016, quarter=1)
+
+    # the index is read once, and only the filings of the symbols are fetched, originals over amendments
+    assert index_reads == [(2016, 1)]
+    assert sorted(set(PanelGetRequest.urls)) == ['https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000070.txt',
+                                            'https://www.sec.gov/Archives/' + FAILING_FILE]
+
+    assert set(frame['company']) == {'AAPL'}
+    assert 'us-gaap_SalesRevenueNet' in set(frame['element'])
+
+    assert sorted(errors) == ['IDRA', 'MSFT', 'NOPE']
+    assert isinstance(errors['MSFT'], ConnectionError)
+    assert isinstance(errors['IDRA'], NoFilingInfoException)
+    assert isinstance(errors['NOPE'], IndexError)
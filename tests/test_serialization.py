@@ -0,0 +1,59 @@
+import io
+from datetime import datetime
+from edgar.filing import Filing
+from edgar.financials import FinancialReportEncoder, FinancialReport, FinancialInfo, FinancialElement
+from edgar.serialization import dumps, loads, write_ndjson, read_ndjson
+import edgar.serialization
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+SAMPLE_URL = 'https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000070.txt'
+
+
+def get_financial_reports():
+    filing = Filing(SAMPLE_URL, company='AAPL')
+    return filing.get_financial_data() + [filing.get_xbrl_financial_data()]
+
+
+def test_dumps_matches_encoder(offline_filing):
+    for financial_report in get_financial_reports():
+        assert dumps(financial_report) == FinancialReportEncoder().encode(financial_report)
+
+
+def test_loads_round_trip(offline_filing):
+    for financial_report in get_financial_reports():
+        for compact in [False, True]:
+            loaded_report = loads(dumps(financial_report, compact))
+            assert dumps(loaded_report) == dumps(financial_report)
+            assert isinstance(loaded_report.reports[0].date, datetime)
+
+
+def test_compact_without_orjson(offline_filing, monkeypatch):
+    financial_report = get_financial_reports()[0]
+    compact_json = dumps(financial_report, compact=True)
+    monkeypatch.setattr(edgar.serialization, 'orjson', None)
+    assert dumps(financial_report, compact=True) == compact_json
+
+
+def test_ndjson(offline_filing):
+    financial_reports = get_financial_reports()
+    file = io.StringIO()
+    assert write_ndjson(iter(financial_reports), file) == len(financial_reports)
+    assert file.getvalue().count('\n') == len(financial_reports)
+
+    file.seek(0)
+    assert [dumps(financial_report) for financial_report in read_ndjson(file)] == \
+        [dumps(financial_report) for financial_report in financial_reports]
+
+
+def test_loads_dict_like_element():
+    # the value of an element that looks like an element itself
+    value = {'label': 'Revenues', 'value': 1.0}
+    financial_report = FinancialReport('AAPL', datetime(2016, 1, 27), [
+        FinancialInfo(datetime(2015, 12, 26), 3, {'Revenues': FinancialElement('Revenues', value)})])
+    loaded_report = loads(dumps(financial_report))
+    assert loaded_report.reports[0].map['Revenues'].value == value
+    assert isinstance(loaded_report.reports[0].map['Revenues'], FinancialElement)
@@ -1,7 +1,9 @@
 import pytest
 import json
+from datetime import datetime
+from edgar.edgar import FilingInfo
 from edgar.stock import Stock, NoFilingInfoException
-from edgar.financials import FinancialReportEncoder
+from edgar.financials import FinancialReportEncoder, FinancialReport, FinancialInfo, FinancialElement
 
     
 def setup_module(module):
@@ -22,6 +24,110 @@ def test_get_filing():
 
 
 
+def fake_financial_filing_info(period, cik, year, quarter):
+    # two filings per quarter, listed out of order, and none in 2016 Q3
+    if (year, quarter) == (2016, 3):
+        return []
+    return [FilingInfo('APPLE INC', '10-Q', cik, '{}-{:02d}-{:02d}'.format(year, quarter * 3, day),
+                       'edgar/data/{}/0000320193-{}-{:06d}.txt'.format(cik, str(year)[2:], quarter * 100 + day))
+            for day in [20, 10]]
+
+
+def test_iter_filings(offline_filing, monkeypatch):
+    monkeypatch.setattr('edgar.stock.get_financial_filing_info', fake_financial_filing_info)
+    stock = Stock(symbol='AAPL')
+
+    filings = stock.iter_filings(period='quarterly', start_year=2015, end_year=2016, prefetch=3)
+    urls = []
+    for filing in filings:
+        # the filing was downloaded in the background
+        assert filing._documents is not None
+        assert filing.company == 'AAPL'
+        urls.append(filing.url)
+    assert len(urls) == 14
+    # in the order the filings were filed, as given by their accession numbers
+    accession_numbers = [url.rsplit('/', 1)[1] for url in urls]
+    assert accession_numbers == sorted(accession_numbers)
+
+    # without prefetching, filings are only downloaded when used
+    filing = next(stock.iter_filings(period='quarterly', start_year=2016, end_year=2016, prefetch=0))
+    assert filing._documents is None
+    assert filing.url == urls[8]
+    assert filing.url.endswith('0000320193-16-000110.txt')
+
+
+def fake_annual_filing_info(period, cik, year, quarter):
+    # a 10-K filed every October for the fiscal year ended in September, and an amendment in 2016
+    if quarter != 4:
+        return []
+    filing_infos = [FilingInfo('APPLE INC', '10-K', cik, '{}-10-28'.format(year),
+                               'edgar/data/{}/{}.txt'.format(cik, year))]
+    if year == 2016:
+        filing_infos.append(FilingInfo('APPLE INC', '10-K/A', cik, '2016-12-01', 'edgar/data/{}/2016a.txt'.format(cik)))
+    return filing_infos
+
+
+class HistoryFiling:
+    urls = []
+
+    def __init__(self, company, url, cache=None):
+        HistoryFiling.urls.append(url)
+        self.year = int(url.rsplit('/', 1)[1][:4])
+        self.date_filed = datetime(self.year, 10, 28)
+
+    def get_income_statements(self):
+        # three years of revenue, with values restated in later filings, but only two years in 2013
+        years = 2 if self.year == 2013 else 3
+        return FinancialReport('AAPL', self.date_filed, [
+            FinancialInfo(datetime(self.year - i, 9, 30), 12,
+                          {'Revenues': FinancialElement('Revenues', '{}:{}'.format(self.year - i, self.year))})
+            for i in range(years)])
+
+
+def test_history(monkeypatch):
+    monkeypatch.setattr('edgar.stock.get_financial_filing_info', fake_annual_filing_info)
+    monkeypatch.setattr('edgar.stock.Filing', HistoryFiling)
+    stock = Stock(symbol='AAPL')
+
+    # 7 years of 10-Ks, each with three years of income statements
+    plan = stock.plan_history(start_year=2010, end_year=2016)
+    assert [filing_info.date_filed for filing_info in plan] == ['2016-10-28', '2013-10-28', '2010-10-28']
+
+    HistoryFiling.urls = []
+    history = stock.get_history(start_year=2010, end_year=2016)
+    # the 2013 filing turns out to only have two years, so the 2011 one is fetched too
+    assert [url.rsplit('/', 1)[1] for url in HistoryFiling.urls] == ['2016.txt', '2013.txt', '2010.txt', '2011.txt']
+    assert history.company == 'AAPL'
+    assert history.date_filed == datetime(2016, 10, 28)
+    # one period per filing, from the latest filing that has it
+    assert [financial_info.map['Revenues'].value for financial_info in history.reports] == \
+           ['2016:2016', '2015:2016', '2014:2016', '2013:2013', '2012:2013', '2011:2011', '2010:2011']
+
+
+class OldFormatHistoryFiling(HistoryFiling):
+    def get_income_statements(self):
+        if self.year == 2013:
+            raise ConnectionError('2013 is unavailable')
+        # the statements of filings in the old format are lists of one report
+        return [super().get_income_statements()]
+
+
+def test_history_old_format_and_errors(monkeypatch):
+    monkeypatch.setattr('edgar.stock.get_financial_filing_info', fake_annual_filing_info)
+    monkeypatch.setattr('edgar.stock.Filing', OldFormatHistoryFiling)
+
+    HistoryFiling.urls = []
+    errors = {}
+    history = Stock(symbol='AAPL').get_history(start_year=2010, end_year=2016, errors=errors)
+    # the 2013 filing fails, so the 2012 one is fetched for the years it would have held
+    assert [url.rsplit('/', 1)[1] for url in HistoryFiling.urls] == ['2016.txt', '2013.txt', '2010.txt', '2012.txt']
+    assert list(errors) == ['https://www.sec.gov/Archives/edgar/data/320193/2013.txt']
+    assert isinstance(errors['https://www.sec.gov/Archives/edgar/data/320193/2013.txt'], ConnectionError)
+    # only the period of the failed filing is missing
+    assert [financial_info.map['Revenues'].value for financial_info in history.reports] == \
+           ['2016:2016', '2015:2016', '2014:2016', '2012:2012', '2011:2012', '2010:2012']
+
+
 ############## Negative Testing ##############
 
 def test_init_unknown_symbol():
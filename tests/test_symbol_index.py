@@ -0,0 +1,69 @@
+import os
+import pandas as pd
+import edgar.symbol_index as symbol_index
+from edgar.symbol_index import get_cik, get_symbol, resolve_symbols, write_symbol_index, reset_symbol_index, \
+    set_symbol_index_path
+from edgar.edgar import SYMBOLS_DATA_PATH
+from edgar.stock import Stock
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+def test_lookups():
+    assert get_cik('AAPL') == '320193'
+    assert get_symbol('320193') == 'AAPL'
+    assert get_symbol(320193) == 'AAPL'
+    assert get_cik('ZZZZZZZZZZZZZZZ') is None
+    assert resolve_symbols(['AAPL', 'ZZZZZZZZZZZZZZZ']) == {'AAPL': '320193', 'ZZZZZZZZZZZZZZZ': None}
+    assert Stock('AAPL').cik == '320193'
+
+
+def test_same_ciks_as_csv():
+    df = pd.read_csv(SYMBOLS_DATA_PATH, converters={'cik': str})
+    symbols = df['symbol'].dropna().unique()
+    expected = {symbol: df.loc[df['symbol'] == symbol]['cik'].iloc[0] for symbol in symbols[:200]}
+    assert resolve_symbols(expected) == expected
+
+
+def test_prebuilt_index(monkeypatch, tmp_path):
+    index_path = str(tmp_path / 'symbols.pickle')
+    write_symbol_index(index_path)
+    monkeypatch.setattr(symbol_index, 'SYMBOL_INDEX_PATH', index_path)
+    monkeypatch.setattr(symbol_index, '_read_symbols_csv', None)
+    reset_symbol_index()
+    try:
+        assert get_cik('AAPL') == '320193'
+    finally:
+        monkeypatch.undo()
+        reset_symbol_index()
+    assert os.path.getsize(index_path) > 0
+
+
+def test_symbol_index_path(monkeypatch, tmp_path):
+    index_path = str(tmp_path / 'symbols.pickle')
+    write_symbol_index(index_path)
+    default_path = symbol_index.SYMBOL_INDEX_PATH
+    monkeypatch.setattr(symbol_index, '_read_symbols_csv', None)
+    set_symbol_index_path(index_path)
+    try:
+        assert get_cik('AAPL') == '320193'
+    finally:
+        monkeypatch.undo()
+        set_symbol_index_path(default_path)
+    assert symbol_index.SYMBOL_INDEX_PATH == default_path
+
+
+def test_unreadable_index(monkeypatch, tmp_path):
+    index_path = str(tmp_path / 'symbols.pickle')
+    with open(index_path, mode='wb') as f:
+        f.write(b'not a pickle')
+    monkeypatch.setattr(symbol_index, 'SYMBOL_INDEX_PATH', index_path)
+    reset_symbol_index()
+    try:
+        # the csv is read instead
+        assert get_cik('AAPL') == '320193'
+    finally:
+        monkeypatch.undo()
+        reset_symbol_index()
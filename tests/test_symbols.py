@@ -0,0 +1,245 @@
+import pytest
+from xml.etree.ElementTree import ParseError
+from datetime import datetime
+import edgar.data.symbols as symbols
+from edgar.data.symbols import SymbolCrawler, SymbolUpdater, read_issuer, read_symbols, write_symbols, \
+    read_checkpoint, read_watermark, process_symbol_filing
+from edgar.edgar import FilingInfo
+from edgar.instrumentation import collect, FETCH_STAGE, REQUESTS, BYTES_DOWNLOADED
+
+FORM_4 = '''<SEC-DOCUMENT>0000320193-18-000100.txt : 20181116
+<DOCUMENT>
+<TYPE>4
+<SEQUENCE>1
+<TEXT>
+<XML>
+<?xml version="1.0"?>
+<ownershipDocument>
+    <schemaVersion>X0306</schemaVersion>
+    <documentType>4</documentType>
+    <issuer>
+        <issuerCik>0000320193</issuerCik>
+        <issuerName>Apple Inc.</issuerName>
+        <issuerTradingSymbol>AAPL</issuerTradingSymbol>
+    </issuer>
+    <reportingOwner>
+        <reportingOwnerId>
+            <rptOwnerCik>0001214128</rptOwnerCik>
+        </reportingOwnerId>
+    </reportingOwner>
+</ownershipDocument>
+</XML>
+</TEXT>
+</DOCUMENT>
+</SEC-DOCUMENT>
+'''
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+def test_read_issuer():
+    lines = iter(FORM_4.splitlines())
+    assert read_issuer(lines) == ('320193', 'AAPL')
+    # the rest of the filing isn't read
+    assert next(lines).strip() == '</issuer>'
+    assert read_issuer(['<DOCUMENT>', '<TEXT>', 'no xml', '</TEXT>']) == (None, None)
+
+
+class FakeStreamResponse:
+    status_code = 200
+    encoding = None
+
+    def __init__(self, text):
+        self.text = text
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.text.splitlines())
+
+
+def test_process_symbol_filing_instrumented(monkeypatch):
+    monkeypatch.setattr('requests.get', lambda url, stream=False: FakeStreamResponse(FORM_4))
+
+    with collect() as report:
+        assert process_symbol_filing('https://www.sec.gov/Archives/edgar/data/320193/0000320193-18-000100.txt') == \
+            ('320193', 'AAPL')
+
+    assert report.counts[REQUESTS] == 1
+    assert report.stages[FETCH_STAGE].calls == 1
+    # only the lines up to the issuer are read
+    read_text = FORM_4[:FORM_4.index('    </issuer>')]
+    assert report.counts[BYTES_DOWNLOADED] == len(read_text.encode('utf-8'))
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def fake_index_json(year='', quarter=''):
+    if not year:
+        return {'directory': {'item': [{'type': 'dir', 'name': '2003', 'href': '2003/'},
+                                       {'type': 'dir', 'name': '2018', 'href': '2018/'}]}}
+    return {'directory': {'item': [{'type': 'dir', 'name': 'QTR1', 'href': 'QTR1/'},
+                                   {'type': 'dir', 'name': 'QTR2', 'href': 'QTR2/'}]}}
+
+
+def fake_filing_info(forms, year, quarter):
+    # ciks 1 to 5 in QTR2, 4 to 7 in QTR1, with cik 2 filed twice (e.g. by an owner)
+    ciks = [1, 2, 2, 3, 4, 5] if quarter == 'QTR2/' else [4, 5, 6, 7]
+    return [FilingInfo('COMPANY {}'.format(cik), '4', str(cik), '2018-01-01',
+                       'edgar/data/{0}/{0:010d}-18-{1:06d}.txt'.format(cik, i)) for i, cik in enumerate(ciks)]
+
+
+def test_crawler_resumes(monkeypatch, tmp_path):
+    csv_path = str(tmp_path / 'symbols.csv')
+    checkpoint_path = str(tmp_path / 'symbols.checkpoint.json')
+    monkeypatch.setattr(symbols, 'get_index_json', fake_index_json)
+    monkeypatch.setattr(symbols, '_get_filing_info', fake_filing_info)
+
+    fetched = []
+    interrupted = []
+
+    def process_symbol_filing(filing_url):
+        cik = filing_url.split('/')[6]
+        if cik == '5' and not interrupted:
+            interrupted.append(cik)
+            raise Interrupted()
+        fetched.append(cik)
+        return cik, 'SYM' + cik
+
+    monkeypatch.setattr(symbols, 'process_symbol_filing', process_symbol_filing)
+
+    with pytest.raises(Interrupted):
+        SymbolCrawler(csv_path, checkpoint_path, max_workers=1, checkpoint_interval=2).run()
+    # the first two batches of QTR2 were checkpointed
+    assert [row[0] for row in read_symbols(csv_path)] == ['1', '2', '3']
+    assert read_checkpoint(checkpoint_path)['position'] == 4
+
+    fetched.clear()
+    SymbolCrawler(csv_path, checkpoint_path, max_workers=2, checkpoint_interval=2).run()
+    assert fetched == ['4', '5', '6', '7']
+    rows = read_symbols(csv_path)
+    assert [row[:4] for row in rows] == [['1', 'SYM1', '2018/', 'QTR2/'], ['2', 'SYM2', '2018/', 'QTR2/'],
+                                         ['3', 'SYM3', '2018/', 'QTR2/'], ['4', 'SYM4', '2018/', 'QTR2/'],
+                                         ['5', 'SYM5', '2018/', 'QTR2/'], ['6', 'SYM6', '2018/', 'QTR1/'],
+                                         ['7', 'SYM7', '2018/', 'QTR1/']]
+    assert read_checkpoint(checkpoint_path)['completed_quarters'] == ['2018/QTR2/', '2018/QTR1/']
+
+
+DAILY_FILINGS = {
+    # cik 1 changed its symbol, cik 3 is new and cik 2 is unchanged
+    datetime(2019, 1, 9): [('1', 'edgar/data/1/0000000100-19-000001.txt'),
+                           ('100', 'edgar/data/1/0000000100-19-000001.txt')],
+    datetime(2019, 1, 2): [('1', 'edgar/data/1/0000000101-19-000001.txt'),
+                           ('100', 'edgar/data/100/0000000101-19-000001.txt'),
+                           ('3', 'edgar/data/3/0000000003-19-000001.txt')],
+    datetime(2018, 12, 31): [('2', 'edgar/data/2/0000000102-18-000001.txt'),
+                             ('102', 'edgar/data/2/0000000102-18-000001.txt')],
+    # before the watermark
+    datetime(2018, 9, 28): [('4', 'edgar/data/4/0000000004-18-000001.txt')],
+}
+ISSUERS = {'0000000100-19-000001': ('1', 'NEW1'), '0000000101-19-000001': ('1', 'OLD1'),
+           '0000000003-19-000001': ('3', 'SYM3'), '0000000102-18-000001': ('2', 'SYM2'),
+           '0000000004-18-000001': ('4', 'SYM4')}
+
+
+def patch_daily_indexes(monkeypatch, daily_filings):
+    monkeypatch.setattr(symbols, 'get_daily_index_dates', lambda year, quarter: sorted(
+        date for date in daily_filings if (date.year, (date.month - 1) // 3 + 1) == (year, quarter)))
+    monkeypatch.setattr(symbols, 'get_daily_filing_info', lambda date, forms: [
+        FilingInfo('COMPANY', '4', cik, date.strftime('%Y-%m-%d'), file) for cik, file in daily_filings[date]])
+
+
+def test_updater(monkeypatch, tmp_path):
+    csv_path = str(tmp_path / 'symbols.csv')
+    watermark_path = str(tmp_path / 'symbols.watermark.json')
+    write_symbols([['1', 'OLD1', '2018/', 'QTR4/', 'url1'], ['2', 'SYM2', '2018/', 'QTR3/', 'url2']], csv_path)
+
+    patch_daily_indexes(monkeypatch, DAILY_FILINGS)
+    fetched = []
+
+    def process_symbol_filing(filing_url):
+        fetched.append(filing_url)
+        return ISSUERS[filing_url.split('/')[-1][:-4]]
+
+    monkeypatch.setattr(symbols, 'process_symbol_filing', process_symbol_filing)
+
+    # without a watermark, the update starts at the latest quarter of the csv
+    assert read_watermark(watermark_path, read_symbols(csv_path)) == datetime(2018, 9, 30)
+    updater = SymbolUpdater(csv_path, watermark_path, max_workers=2)
+    changed_rows = updater.run(until=datetime(2019, 1, 10))
+    assert sorted(row[:2] for row in changed_rows) == [['1', 'NEW1'], ['3', 'SYM3']]
+    # the older form of cik 1 isn't fetched
+    assert len(fetched) == 3
+    assert [row[:4] for row in read_symbols(csv_path)][-1] == ['2', 'SYM2', '2018/', 'QTR3/']
+    assert sorted(row[:4] for row in read_symbols(csv_path)[:2]) == [['1', 'NEW1', '2019/', 'QTR1/'],
+                                                                     ['3', 'SYM3', '2019/', 'QTR1/']]
+    assert read_watermark(watermark_path) == datetime(2019, 1, 9)
+
+    fetched.clear()
+    assert updater.run(until=datetime(2019, 1, 10)) == []
+    assert fetched == []
+
+
+PARENT_DAILY_FILINGS = {
+    # cik 10 is the issuer of its own forms and an owner in those of its subsidiary, cik 20
+    datetime(2019, 1, 9): [('10', 'edgar/data/10/0000000010-19-000002.txt'),
+                           ('500', 'edgar/data/500/0000000010-19-000002.txt')],
+    datetime(2019, 1, 8): [('20', 'edgar/data/20/0000000020-19-000001.txt'),
+                           ('10', 'edgar/data/10/0000000020-19-000001.txt')],
+    datetime(2019, 1, 7): [('30', 'edgar/data/30/0000000030-19-000001.txt'),
+                           ('600', 'edgar/data/600/0000000030-19-000001.txt')],
+    datetime(2019, 1, 5): [('20', 'edgar/data/20/0000000020-19-000002.txt'),
+                           ('700', 'edgar/data/700/0000000020-19-000002.txt')],
+    # the same owner as the latest form of cik 10
+    datetime(2019, 1, 4): [('10', 'edgar/data/10/0000000010-19-000001.txt'),
+                           ('500', 'edgar/data/500/0000000010-19-000001.txt')],
+}
+PARENT_ISSUERS = {'0000000010-19-000002': ('10', 'SYM10'), '0000000020-19-000001': ('20', 'SYM20'),
+                  '0000000030-19-000001': ('30', 'SYM30'), '0000000010-19-000001': ('10', 'OLD10')}
+
+
+def test_updater_owners_and_failures(monkeypatch, tmp_path):
+    csv_path = str(tmp_path / 'symbols.csv')
+    watermark_path = str(tmp_path / 'symbols.watermark.json')
+    write_symbols([], csv_path)
+
+    patch_daily_indexes(monkeypatch, PARENT_DAILY_FILINGS)
+    fetched = []
+    failing = ['0000000030-19-000001']
+
+    def process_symbol_filing(filing_url):
+        accession_number = filing_url.split('/')[-1][:-4]
+        fetched.append(accession_number)
+        if accession_number in failing:
+            raise ConnectionError()
+        if accession_number == '0000000020-19-000002':
+            # never readable, so it doesn't hold the watermark back
+            raise ParseError('not well-formed')
+        return PARENT_ISSUERS[accession_number]
+
+    monkeypatch.setattr(symbols, 'process_symbol_filing', process_symbol_filing)
+
+    updater = SymbolUpdater(csv_path, watermark_path, max_workers=1)
+    changed_rows = updater.run(since=datetime(2019, 1, 1), until=datetime(2019, 1, 10))
+    # the form of the subsidiary is read even though its parent was, the older form of the parent isn't
+    assert sorted(row[:2] for row in changed_rows) == [['10', 'SYM10'], ['20', 'SYM20']]
+    assert sorted(fetched) == ['0000000010-19-000002', '0000000020-19-000001', '0000000020-19-000002',
+                               '0000000030-19-000001']
+    # the watermark stays before the form that couldn't be read because of a dropped connection, but not before
+    # the malformed one
+    assert read_watermark(watermark_path) == datetime(2019, 1, 6)
+
+    failing.clear()
+    fetched.clear()
+    changed_rows = updater.run(until=datetime(2019, 1, 10))
+    assert [row[:2] for row in changed_rows] == [['30', 'SYM30']]
+    assert '0000000030-19-000001' in fetched
+    assert read_watermark(watermark_path) == datetime(2019, 1, 9)
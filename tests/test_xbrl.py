@@ -0,0 +1,92 @@
+import pytest
+from datetime import datetime
+from edgar.filing import Filing
+from edgar.xbrl import read_labels, get_xbrl_financial_report, XbrlParsingException
+from tests.conftest import read_data_file
+
+
+def setup_module(module):
+    print('setup_module      module:%s' % module.__name__)
+
+
+SAMPLE_URL = 'https://www.sec.gov/Archives/edgar/data/320193/0000320193-16-000070.txt'
+
+
+def test_get_xbrl_financial_data(offline_filing):
+    filing = Filing(SAMPLE_URL, company='AAPL')
+    result = filing.get_xbrl_financial_data()
+
+    assert [(info.date, info.months) for info in result.reports] == [
+        (datetime(2015, 12, 26), 3), (datetime(2015, 12, 26), None), (datetime(2015, 9, 26), None),
+        (datetime(2014, 12, 27), 3)]
+    quarter = result.reports[0].map
+    assert quarter['us-gaap_SalesRevenueNet'].value == 75872000000.0
+    assert quarter['us-gaap_SalesRevenueNet'].label == 'Sales Revenue, Net'
+    assert quarter['us-gaap_SalesRevenueNet'].unit == 'iso4217:USD'
+    assert quarter['us-gaap_NonoperatingIncomeExpense'].value == -402000000.0
+    assert quarter['us-gaap_EarningsPerShareBasic'].unit == 'iso4217:USD/xbrli:shares'
+    assert quarter['us-gaap_WeightedAverageNumberOfSharesOutstandingBasic'].value == 5558930000.0
+    # dimensional, nil and non-numeric facts are left out
+    assert len(quarter) == 4
+    assert 'aapl_RestructuringSpecialItem' not in result.reports[3].map
+    # context defined after the fact
+    assert result.reports[2].map['us-gaap_Assets'].value == 290479000000.0
+
+
+def test_xbrl_matches_rendered_reports(offline_filing):
+    filing = Filing(SAMPLE_URL, company='AAPL')
+    xbrl_reports = {(info.date, info.months): info.map for info in filing.get_xbrl_financial_data().reports}
+
+    for financial_report in filing.get_financial_data():
+        for info in financial_report.reports:
+            for name, element in info.map.items():
+                if name in xbrl_reports[(info.date, info.months)]:
+                    assert xbrl_reports[(info.date, info.months)][name].value == element.value
+
+
+def test_include_dimensions(offline_filing):
+    filing = Filing(SAMPLE_URL, company='AAPL')
+    quarter = filing.get_xbrl_financial_data(include_dimensions=True).reports[0].map
+    assert quarter['us-gaap_SalesRevenueNet[us-gaap_StatementBusinessSegmentsAxis=aapl_IPhoneMember]'].value == \
+        51635000000.0
+
+
+def test_read_labels():
+    label_xml_text = '''<?xml version="1.0" encoding="UTF-8"?>
+<link:linkbase xmlns:link="http://www.xbrl.org/2003/linkbase" xmlns:xlink="http://www.w3.org/1999/xlink">
+  <link:labelLink xlink:type="extended">
+    <link:loc xlink:href="aapl.xsd#aapl_Special" xlink:label="loc" xlink:type="locator"/>
+    <link:label xlink:label="lab" xlink:role="http://www.xbrl.org/2003/role/terseLabel">Terse</link:label>
+    <link:label xlink:label="lab" xlink:role="http://www.xbrl.org/2003/role/label">Special item</link:label>
+    <link:labelArc xlink:from="loc" xlink:to="lab" xlink:type="arc"/>
+  </link:labelLink>
+</link:linkbase>'''
+    assert read_labels(label_xml_text) == {'aapl_Special': 'Special item'}
+
+
+def test_malformed_facts():
+    xml_text = '''<?xml version="1.0" encoding="UTF-8"?>
+<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance" xmlns:us-gaap="http://fasb.org/us-gaap/2015-01-31"
+            xmlns:iso4217="http://www.xbrl.org/2003/iso4217">
+  <xbrli:context id="FY15">
+    <xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">0000320193</xbrli:identifier></xbrli:entity>
+    <xbrli:period><xbrli:instant>2015-09-26</xbrli:instant></xbrli:period>
+  </xbrli:context>
+  <xbrli:unit id="usd"><xbrli:measure>iso4217:USD</xbrli:measure></xbrli:unit>
+  <us-gaap:Assets contextRef="FY15" unitRef="usd" decimals="-6">290479000000</us-gaap:Assets>
+  <us-gaap:Liabilities contextRef="FY15" unitRef="usd" decimals="-6"></us-gaap:Liabilities>
+  <us-gaap:Goodwill contextRef="FY15" unitRef="usd" decimals="-6">   </us-gaap:Goodwill>
+  <us-gaap:Inventory contextRef="FY15" unitRef="usd" decimals="-6">n/a</us-gaap:Inventory>
+</xbrli:xbrl>'''
+    # bad facts are skipped rather than failing the whole instance
+    result = get_xbrl_financial_report('AAPL', datetime(2015, 10, 28), xml_text)
+    assert len(result.reports) == 1
+    assert list(result.reports[0].map) == ['us-gaap_Assets']
+    assert result.reports[0].map['us-gaap_Assets'].value == 290479000000.0
+
+
+def test_no_instance_document(offline_filing):
+    offline_filing.text = read_data_file('sample_filing.txt').replace('EX-101.INS', 'EX-101.XXX')
+    filing = Filing(SAMPLE_URL, company='AAPL')
+    with pytest.raises(XbrlParsingException):
+        filing.get_xbrl_financial_data()